@@ -5,311 +5,539 @@ Biology Research Search Engine - Flask Web Application
 A comprehensive web interface for searching and browsing biology research articles.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import sqlite3
+from flask import Flask, Response, g, render_template, request, jsonify, redirect, url_for
+from werkzeug.http import is_resource_modified
 import os
+import re
 import csv
+import glob
+import gzip
+import inspect
 import json
-import re
-from datetime import datetime
-from typing import List, Dict, Tuple
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Tuple
 import threading
 import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+from database import DEFAULT_SLOW_QUERY_MS, DatabaseManager, extract_title_from_content
+from metrics import REGISTRY
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
 
 # Configuration
-DB_PATH = 'biology_articles.db'
+DB_PATH = os.environ.get('DB_PATH', 'biology_articles.db')
+# Open the database read-only and never write to it, as production workers do
+# (see wsgi.py); ingest then runs outside the web process
+DB_READ_ONLY = os.environ.get('DB_READ_ONLY', '0') != '0'
+# Pooled read-only connections per process and the size of their shared memory map
+READ_POOL_SIZE = int(os.environ.get('READ_POOL_SIZE', 8))
+MMAP_SIZE = int(os.environ.get('MMAP_SIZE', 256 * 1024 * 1024))
+# Per-route and per-statement latency histograms, served at /metrics
+METRICS = os.environ.get('METRICS', '1') != '0'
+# Statements at least this slow are logged with their query plan
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS))
 ARTICLES_DIR = 'scraped_articles'
 SUMMARY_CSV = 'scraped_summary.csv'
+# Set to 0 when the scraper writes straight into the database (--db)
+LOAD_ARTICLES_FROM_FILES = os.environ.get('LOAD_ARTICLES_FROM_FILES', '1') != '0'
+# Diffs with more changed files than this are applied with a bulk load and one FTS rebuild
+INCREMENTAL_LOAD_LIMIT = 200
+# Cached search result pages (0 disables the cache) and their lifetime in seconds
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 1024))
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', 300))
+# BM25 weights for matches in the title and in the article body
+SEARCH_TITLE_WEIGHT = float(os.environ.get('SEARCH_TITLE_WEIGHT', 10.0))
+SEARCH_CONTENT_WEIGHT = float(os.environ.get('SEARCH_CONTENT_WEIGHT', 1.0))
+# Store article and passage text zlib-compressed
+COMPRESS_ARTICLES = os.environ.get('COMPRESS_ARTICLES', '0') != '0'
+# Collapse near-duplicate articles into one canonical article during ingest (needs numpy)
+DEDUPLICATE_ARTICLES = os.environ.get('DEDUPLICATE_ARTICLES', '0') != '0'
+# Update the precomputed related-article lists after the startup load
+SIMILAR_ARTICLES = os.environ.get('SIMILAR_ARTICLES', '1') != '0'
+# Related articles shown on an article page
+RELATED_ON_PAGE = 5
+# Cache-Control per endpoint. Search and statistics responses carry validators
+# derived from the corpus generation and articles from their update time, so
+# once max-age runs out clients and proxies revalidate with a cheap 304.
+CACHE_CONTROL = {
+    'index': 'public, max-age=60',
+    'search': 'public, max-age=30',
+    'view_article': 'public, max-age=300',
+    'api_search': 'public, max-age=30',
+    'api_suggest': 'public, max-age=300',
+    'api_stats': 'public, max-age=60',
+    'api_similar': 'public, max-age=300',
+    'api_duplicates': 'public, max-age=60',
+    'dashboard': 'public, max-age=60',
+    'about': 'public, max-age=3600',
+    'healthz': 'no-store',
+    'readyz': 'no-store',
+    'export_metrics': 'no-store',
+}
+# Text responses at least this large are gzip or brotli compressed when the client accepts it
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 512))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 4))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/plain', 'text/css', 'application/json', 'application/javascript'}
+
+def open_database(db_path: str = None, read_only: bool = None) -> DatabaseManager:
+    """Open a database with the configured pool, cache, ranking and storage settings."""
+    return DatabaseManager(db_path or DB_PATH, read_pool_size=READ_POOL_SIZE, mmap_size=MMAP_SIZE,
+                           search_cache_size=SEARCH_CACHE_SIZE, search_cache_ttl=SEARCH_CACHE_TTL,
+                           title_weight=SEARCH_TITLE_WEIGHT, content_weight=SEARCH_CONTENT_WEIGHT,
+                           compress=COMPRESS_ARTICLES, deduplicate=DEDUPLICATE_ARTICLES,
+                           read_only=DB_READ_ONLY if read_only is None else read_only,
+                           metrics=METRICS, slow_query_ms=SLOW_QUERY_MS)
+
+REGISTRY.enabled = METRICS
+REQUEST_SECONDS = REGISTRY.histogram('http_request_duration_seconds', 'Request latency per route',
+                                     ['route', 'method', 'status'])
 
-class DatabaseManager:
-    """Manages database operations for articles and search functionality."""
+# Initialize database
+db = open_database()
+
+def resolve_article_path(file_path: str) -> str:
+    """Normalize a summary CSV path, which may have been written on Windows."""
+    return file_path.replace('\\', os.sep).replace('/', os.sep)
+
+def summary_row_hash(row: Dict) -> str:
+    """Fingerprint the summary CSV metadata stored alongside an article."""
+    key = '|'.join(row[field] for field in ('url', 'word_count', 'content_type', 'saved_file_path'))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def read_article_row(row: Dict) -> Dict:
+    """Read one summary row's text file into a database row, or None if it is missing."""
+    file_path = resolve_article_path(row['saved_file_path'])
+    if not os.path.exists(file_path):
+        return None
     
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self.init_database()
+    with open(file_path, 'rb') as content_file:
+        data = content_file.read()
+    content = data.decode('utf-8')
     
-    def init_database(self):
-        """Initialize the database with required tables."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create articles table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY,
-                article_id INTEGER,
-                url TEXT,
-                title TEXT,
-                content TEXT,
-                word_count INTEGER,
-                content_type TEXT,
-                file_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(article_id)
-            )
-        ''')
-        
-        # Create search index for full-text search
-        cursor.execute('''
-            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
-                article_id UNINDEXED,
-                title,
-                content,
-                content='articles',
-                content_rowid='id'
-            )
-        ''')
-        
-        # Create triggers to maintain FTS index
-        cursor.execute('''
-            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
-                INSERT INTO articles_fts(article_id, title, content) 
-                VALUES (new.article_id, new.title, new.content);
-            END
-        ''')
-        
-        cursor.execute('''
-            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
-                DELETE FROM articles_fts WHERE article_id = old.article_id;
-            END
-        ''')
-        
-        cursor.execute('''
-            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
-                UPDATE articles_fts SET title = new.title, content = new.content 
-                WHERE article_id = old.article_id;
-            END
-        ''')
-        
-        conn.commit()
-        conn.close()
+    return {
+        'article_id': int(row['article_id']),
+        'url': row['url'],
+        # Extract title from the beginning of content or URL
+        'title': extract_title_from_content(content, row['url']),
+        'content': content,
+        'word_count': int(row['word_count']),
+        'content_type': row['content_type'],
+        'file_path': row['saved_file_path'],
+        'content_hash': hashlib.sha256(data).hexdigest()
+    }
+
+def read_in_batches(func, items: List, workers: int = 8, batch_size: int = 500):
+    """Yield batches of ``func(item)`` results (None dropped), computing the next batch on a
+    thread pool while the caller works on the current one."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = None
+        for start in range(0, len(items), batch_size):
+            futures = [executor.submit(func, item) for item in items[start:start + batch_size]]
+            if pending is not None:
+                yield [result for result in (future.result() for future in pending) if result is not None]
+            pending = futures
+        if pending is not None:
+            yield [result for result in (future.result() for future in pending) if result is not None]
+
+def load_articles_from_files(summary_csv: str = None, database: DatabaseManager = None,
+                             workers: int = 8, batch_size: int = 500, full: bool = False,
+                             progress: Callable[[int, int], None] = None) -> Dict:
+    """Sync the database with the scraped files, touching only added, changed or removed articles.
+
+    Files whose mtime, size and summary row match the recorded source state are
+    skipped without being read; files that were touched but hash the same only
+    have their state refreshed. Returns counts per outcome. ``full`` ignores the
+    recorded state when deciding what to read and reloads every file; articles
+    whose file is gone are removed either way. ``progress(done, total)`` is called
+    after the scan and after each batch of files is read.
+    """
+    start = time.perf_counter()
+    report = {'added': 0, 'changed': 0, 'unchanged': 0, 'removed': 0, 'missing': 0}
+    summary_csv = summary_csv or SUMMARY_CSV
+    database = database or db
+    if not os.path.exists(ARTICLES_DIR):
+        return report
     
-    def insert_article(self, article_id: int, url: str, title: str, content: str, 
-                      word_count: int, content_type: str, file_path: str):
-        """Insert or update an article in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO articles 
-            (article_id, url, title, content, word_count, content_type, file_path)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (article_id, url, title, content, word_count, content_type, file_path))
-        
-        conn.commit()
-        conn.close()
+    # Load from CSV summary first
+    if not os.path.exists(summary_csv):
+        return report
     
-    def search_articles(self, query: str, limit: int = 50) -> List[Dict]:
-        """Search articles using full-text search."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if query:
-            # Full-text search
-            cursor.execute('''
-                SELECT a.article_id, a.url, a.title, a.word_count, a.content_type,
-                       snippet(articles_fts, 2, '<mark>', '</mark>', '...', 30) as snippet
-                FROM articles_fts fts
-                JOIN articles a ON a.article_id = fts.article_id
-                WHERE articles_fts MATCH ?
-                ORDER BY rank
-                LIMIT ?
-            ''', (query, limit))
-        else:
-            # Return all articles if no query
-            cursor.execute('''
-                SELECT article_id, url, title, word_count, content_type,
-                       substr(content, 1, 200) || '...' as snippet
-                FROM articles
-                ORDER BY article_id
-                LIMIT ?
-            ''', (limit,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'article_id': row[0],
-                'url': row[1],
-                'title': row[2],
-                'word_count': row[3],
-                'content_type': row[4],
-                'snippet': row[5]
-            })
-        
-        conn.close()
-        return results
+    with open(summary_csv, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
     
-    def get_article(self, article_id: int) -> Dict:
-        """Get a specific article by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT article_id, url, title, content, word_count, content_type, file_path
-            FROM articles
-            WHERE article_id = ?
-        ''', (article_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+    known = database.get_sources()
+    seen = set()
+    candidates = []
+    for row in rows:
+        article_id = int(row['article_id'])
+        try:
+            stat = os.stat(resolve_article_path(row['saved_file_path']))
+        except OSError:
+            report['missing'] += 1
+            continue
         
-        if row:
-            return {
-                'article_id': row[0],
-                'url': row[1],
-                'title': row[2],
-                'content': row[3],
-                'word_count': row[4],
-                'content_type': row[5],
-                'file_path': row[6]
-            }
-        return None
+        seen.add(article_id)
+        source = known.get(article_id)
+        row_hash = summary_row_hash(row)
+        if (not full and source and source['mtime_ns'] == stat.st_mtime_ns and source['size'] == stat.st_size
+                and source['row_hash'] == row_hash):
+            report['unchanged'] += 1
+            continue
+        candidates.append((row, stat, row_hash))
     
-    def get_statistics(self) -> Dict:
-        """Get database statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM articles')
-        total_articles = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT SUM(word_count) FROM articles')
-        total_words = cursor.fetchone()[0] or 0
-        
-        cursor.execute('SELECT content_type, COUNT(*) FROM articles GROUP BY content_type')
-        content_types = dict(cursor.fetchall())
-        
-        cursor.execute('SELECT AVG(word_count) FROM articles')
-        avg_words = cursor.fetchone()[0] or 0
-        
-        conn.close()
-        
-        return {
-            'total_articles': total_articles,
-            'total_words': total_words,
-            'average_words': round(avg_words, 0),
-            'content_types': content_types
-        }
-
-# Initialize database
-db = DatabaseManager(DB_PATH)
-
-def load_articles_from_files():
-    """Load articles from scraped files into the database."""
-    if not os.path.exists(ARTICLES_DIR):
-        return 0
+    total = len(seen)
+    done = total - len(candidates)
+    if progress:
+        progress(done, total)
     
-    loaded = 0
+    sources = []
     
-    # Load from CSV summary first
-    if os.path.exists(SUMMARY_CSV):
-        with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                article_id = int(row['article_id'])
-                file_path = row['saved_file_path']
-                
-                # Read the content from the text file
-                if os.path.exists(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as content_file:
-                        content = content_file.read()
-                    
-                    # Extract title from the beginning of content or URL
-                    title = extract_title_from_content(content, row['url'])
-                    
-                    db.insert_article(
-                        article_id=article_id,
-                        url=row['url'],
-                        title=title,
-                        content=content,
-                        word_count=int(row['word_count']),
-                        content_type=row['content_type'],
-                        file_path=file_path
-                    )
-                    loaded += 1
+    def changed_batches():
+        """Read candidate files, keeping those whose content or metadata really changed."""
+        nonlocal done
+        for batch in read_in_batches(lambda item: (read_article_row(item[0]), item[1], item[2]),
+                                     candidates, workers, batch_size):
+            articles = []
+            for article, stat, row_hash in batch:
+                if article is None:
+                    report['missing'] += 1
+                    continue
+                source = known.get(article['article_id'])
+                sources.append({
+                    'article_id': article['article_id'],
+                    'file_path': article['file_path'],
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'content_hash': article['content_hash'],
+                    'row_hash': row_hash
+                })
+                if (not full and source and source['content_hash'] == article['content_hash']
+                        and source['row_hash'] == row_hash):
+                    report['unchanged'] += 1
+                    continue
+                report['changed' if source else 'added'] += 1
+                articles.append(article)
+            yield articles
+            done += len(batch)
+            if progress:
+                progress(done, total)
     
-    return loaded
-
-def extract_title_from_content(content: str, url: str) -> str:
-    """Extract a title from the article content or URL."""
-    lines = content.split('\n')
+    removed = [article_id for article_id in known if article_id not in seen]
     
-    # Look for the first substantial line as title
-    for line in lines:
-        line = line.strip()
-        if len(line) > 20 and len(line) < 200:
-            # Clean up common artifacts
-            line = re.sub(r'^[^\w]*', '', line)  # Remove leading non-word chars
-            line = re.sub(r'[^\w]*$', '', line)  # Remove trailing non-word chars
-            if line:
-                return line
+    if len(candidates) > INCREMENTAL_LOAD_LIMIT:
+        # Large diffs: one bulk transaction with a single FTS rebuild
+        database.bulk_insert_articles(changed_batches())
+    else:
+        for articles in changed_batches():
+            database.insert_articles(articles)
     
-    # Fallback: extract from URL
-    if 'PMC' in url:
-        pmc_match = re.search(r'PMC\d+', url)
-        if pmc_match:
-            return f"Biology Research Article - {pmc_match.group()}"
+    database.record_sources(sources, removed)
+    report['removed'] = len(removed)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+# Startup load state, reported by /healthz and /readyz. A process that does
+# not load the scraped files itself (python app.py starts the load; gunicorn
+# app:app and flask run do not) reports the ingest state recorded in the
+# database, or 'skipped' when loading is disabled
+load_status = {
+    'state': 'skipped' if not LOAD_ARTICLES_FROM_FILES or DB_READ_ONLY else 'external',
+    'processed': 0,
+    'total': 0,
+    'started_at': None,
+    'finished_at': None,
+    'report': None,
+    'error': None
+}
+load_status_lock = threading.Lock()
+
+def update_load_status(**fields):
+    with load_status_lock:
+        load_status.update(fields)
+
+def get_load_status() -> Dict:
+    with load_status_lock:
+        status = dict(load_status)
+    if status['state'] == 'external':
+        # Loaded by another process (serve.py's ingest), which records its state in the database
+        status['state'] = db.get_ingest_state() or 'skipped'
+    return status
+
+def run_background_load():
+    """Sync the database with the scraped files, recording progress in load_status."""
+    update_load_status(state='loading', started_at=datetime.now().isoformat())
+    try:
+        report = load_articles_from_files(progress=lambda done, total: update_load_status(processed=done, total=total))
+        update_load_status(state='ready', report=report, finished_at=datetime.now().isoformat())
+        print(f"Articles: {report['added']} added, {report['changed']} changed, "
+              f"{report['unchanged']} unchanged, {report['removed']} removed "
+              f"({report['missing']} missing files) in {report.get('seconds', 0):.2f}s")
+    except Exception as e:
+        update_load_status(state='failed', error=str(e), finished_at=datetime.now().isoformat())
+        print(f"Loading articles failed: {e}")
+        return
     
-    return "Biology Research Article"
+    if SIMILAR_ARTICLES:
+        try:
+            # Imported here so numpy/scipy are only needed for related articles
+            from similarity import update_similarity_index
+            similarity = update_similarity_index(db)
+            print(f"Related articles: {similarity['mode']} update, {similarity['vectorized']} articles vectorized, "
+                  f"{similarity['lists']} lists written in {similarity['seconds']:.2f}s")
+        except Exception as e:
+            print(f"Updating related articles failed: {e}")
+
+def start_background_load() -> threading.Thread:
+    """Start the startup load on a daemon thread so the server can accept requests meanwhile."""
+    thread = threading.Thread(target=run_background_load, name='article-loader', daemon=True)
+    thread.start()
+    return thread
+
+def deployment_tag() -> str:
+    """Fingerprint of the code, templates and ranking settings that shape responses.
+
+    Mixed into every ETag so that clients holding pages from a previous
+    version are not told their copy is still current.
+    """
+    digest = hashlib.sha1(repr((SEARCH_TITLE_WEIGHT, SEARCH_CONTENT_WEIGHT)).encode('utf-8'))
+    paths = [__file__, inspect.getfile(DatabaseManager)]
+    paths += sorted(glob.glob(os.path.join(app.root_path, app.template_folder, '*.html')))
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+ETAG_SALT = os.environ.get('ETAG_SALT') or deployment_tag()
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an SQLite UTC timestamp such as created_at or updated_at."""
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc) if value else None
+
+def not_modified(*parts, last_modified: datetime = None):
+    """Give this request's response an ETag derived from ``parts`` and a Last-Modified date.
+
+    Returns a 304 response if the client's If-None-Match or If-Modified-Since
+    already matches, so the caller can skip building the body; otherwise None.
+    """
+    key = '|'.join(str(part) for part in (ETAG_SALT,) + parts)
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    g.validators = (etag, last_modified)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return Response(status=304)
+    return None
+
+def corpus_not_modified():
+    """not_modified for responses that only change when the corpus generation does."""
+    version = db.get_corpus_version()
+    return not_modified(request.endpoint, version['instance'], version['generation'],
+                        last_modified=datetime.fromtimestamp(version['modified_at'], timezone.utc))
+
+def compress_response(response: Response):
+    """Encode a text response with brotli or gzip, whichever the client prefers and we have."""
+    if response.status_code == 304 or response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return
+    
+    accepted = request.accept_encodings
+    if brotli and accepted['br'] and accepted['br'] >= accepted['gzip']:
+        body, encoding = brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    elif accepted['gzip']:
+        body, encoding = gzip.compress(body, GZIP_LEVEL, mtime=0), 'gzip'
+    else:
+        return
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+@app.before_request
+def start_request_timer():
+    if REGISTRY.enabled:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """Observe the request's latency, including the caching and compression registered after this."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route, request.method, str(response.status_code))
+    return response
+
+@app.after_request
+def apply_http_caching(response: Response) -> Response:
+    """Add validators, the endpoint's Cache-Control policy and content encoding."""
+    validators = g.pop('validators', None)
+    if response.status_code in (200, 304):
+        if validators:
+            etag, last_modified = validators
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+        policy = CACHE_CONTROL.get(request.endpoint)
+        if policy and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = policy
+    compress_response(response)
+    return response
 
 # Routes
 @app.route('/')
 def index():
     """Main search interface."""
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
     stats = db.get_statistics()
     return render_template('index.html', stats=stats)
 
 @app.route('/search')
 def search():
     """Search results page."""
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
     query = request.args.get('q', '').strip()
-    page = int(request.args.get('page', 1))
+    page = max(request.args.get('page', 1, type=int), 1)
+    cursor = request.args.get('cursor') or None
     per_page = 20
     
-    if query:
-        results = db.search_articles(query, limit=per_page * page)
-        # Simple pagination - get results for current page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        page_results = results[start_idx:end_idx]
-    else:
-        page_results = db.search_articles('', limit=per_page)
-        results = page_results
+    try:
+        results = db.search_page(query, limit=per_page, offset=(page - 1) * per_page, cursor=cursor)
+    except ValueError:
+        # Stale or hand-edited cursor: fall back to the page number
+        results = db.search_page(query, limit=per_page, offset=(page - 1) * per_page)
     
     return render_template('search_results.html', 
-                         results=page_results, 
+                         results=results['results'], 
                          query=query,
                          page=page,
-                         has_more=len(results) >= per_page * page)
+                         per_page=per_page,
+                         total=results['total'],
+                         next_cursor=results['next_cursor'],
+                         has_more=results['next_cursor'] is not None)
 
 @app.route('/article/<int:article_id>')
 def view_article(article_id):
-    """View a specific article."""
+    """View a specific article, optionally scrolled to one of its passages."""
     article = db.get_article(article_id)
     if not article:
         return "Article not found", 404
+    if article['canonical_id'] is not None:
+        return redirect(url_for('view_article', article_id=article['canonical_id'], **request.args))
+    updated_at = article['updated_at']
+    unmodified = not_modified(request.endpoint, article_id, updated_at, db.get_corpus_version()['similarity'],
+                              last_modified=parse_timestamp(updated_at))
+    if unmodified:
+        return unmodified
     
-    return render_template('article.html', article=article)
+    passage = request.args.get('passage', type=int)
+    return render_template('article.html', article=article,
+                           passages=db.get_passages(article_id), passage=passage,
+                           similar=db.get_similar(article_id, RELATED_ON_PAGE))
 
 @app.route('/api/search')
 def api_search():
-    """API endpoint for search functionality."""
+    """API endpoint for search functionality.
+
+    Pages with ``offset`` or, for stable deep paging, with the ``next_cursor``
+    returned by the previous page.
+    """
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
     query = request.args.get('q', '').strip()
-    limit = min(int(request.args.get('limit', 20)), 100)
+    limit = max(min(request.args.get('limit', 20, type=int), 100), 1)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    cursor = request.args.get('cursor') or None
+    
+    try:
+        page = db.search_page(query, limit=limit, offset=offset, cursor=cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'query': query,
+        'results': page['results'],
+        'count': len(page['results']),
+        'total': page['total'],
+        'offset': page['offset'],
+        'next_cursor': page['next_cursor']
+    })
+
+@app.route('/api/suggest')
+def api_suggest():
+    """API endpoint for search box autocomplete: completes the last word of the query."""
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
+    query = request.args.get('q', '')
+    limit = max(min(request.args.get('limit', 8, type=int), 20), 1)
     
-    results = db.search_articles(query, limit=limit)
+    head, _, last_word = query.rpartition(' ')
+    prefix = re.sub(r'\W', '', last_word)
+    suggestions = db.suggest_terms(prefix, limit=limit) if prefix else []
     return jsonify({
         'query': query,
-        'results': results,
-        'count': len(results)
+        'suggestions': [
+            dict(suggestion, query=f"{head.strip()} {suggestion['term']}".strip())
+            for suggestion in suggestions
+        ]
+    })
+
+@app.route('/api/similar/<int:article_id>')
+def api_similar(article_id):
+    """API endpoint for an article's precomputed related articles, most similar first."""
+    version = db.get_corpus_version()
+    unmodified = not_modified(request.endpoint, version['instance'], version['similarity'], article_id)
+    if unmodified:
+        return unmodified
+    limit = max(min(request.args.get('limit', 10, type=int), 50), 1)
+    
+    similar = db.get_similar(article_id, limit=limit)
+    if not similar and not db.get_article(article_id):
+        return jsonify({'error': 'Article not found'}), 404
+    return jsonify({
+        'article_id': article_id,
+        'similar': similar,
+        'count': len(similar)
+    })
+
+@app.route('/api/duplicates')
+def api_duplicates():
+    """API endpoint for clusters of near-duplicate articles and the index space collapsing them saves."""
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
+    limit = max(min(request.args.get('limit', 50, type=int), 200), 1)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    info = db.get_index_info()
+    return jsonify({
+        'clusters': db.get_duplicate_clusters(limit=limit, offset=offset),
+        'offset': offset,
+        'duplicates': info['duplicates'],
+        'index_bytes': info['index_bytes'] + info['passage_index_bytes'],
+        'index_bytes_saved': info['duplicate_index_bytes_saved']
     })
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for statistics."""
+    unmodified = corpus_not_modified()
+    if unmodified:
+        return unmodified
     return jsonify(db.get_statistics())
 
 @app.route('/dashboard')
@@ -318,16 +546,42 @@ def dashboard():
     stats = db.get_statistics()
     return render_template('dashboard.html', stats=stats)
 
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving."""
+    return jsonify({
+        'status': 'ok',
+        'load': get_load_status(),
+        'search_cache': db.search_cache.stats() if db.search_cache else None
+    })
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once the startup load has finished, 503 with progress until then."""
+    status = get_load_status()
+    ready = status['state'] in ('ready', 'skipped')
+    return jsonify({'ready': ready, 'load': status}), 200 if ready else 503
+
+@app.route('/metrics')
+def export_metrics():
+    """Prometheus scrape endpoint: this process's route and SQL latency histograms."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/about')
 def about():
     """About page."""
     return render_template('about.html')
 
 if __name__ == '__main__':
-    # Load articles into database on startup
-    print("Loading articles into database...")
-    loaded_count = load_articles_from_files()
-    print(f"Loaded {loaded_count} articles into database")
+    # Development server; serve production traffic with serve.py or wsgi.py.
+    # Load articles into database in the background; the server serves what is
+    # already in the database meanwhile. The debug reloader's watcher process
+    # does not serve, so only the child it spawns loads.
+    debug = os.environ.get('FLASK_DEBUG', '1') != '0'
+    if (LOAD_ARTICLES_FROM_FILES and not DB_READ_ONLY
+            and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')):
+        print("Loading articles into database in the background...")
+        start_background_load()
     
     # Run the Flask app
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=debug, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
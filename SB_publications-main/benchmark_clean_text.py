@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the text cleaner.
+
+Runs the single-pass compiled clean_text over every file in scraped_articles/,
+reports throughput in MB/s, and checks that its output is identical to the
+original five-pass implementation.
+
+Usage: python benchmark_clean_text.py [--articles-dir DIR] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from typing import Callable, List
+
+from scrape_articles import clean_text
+
+
+def legacy_clean_text(text: str) -> str:
+    """The original multi-pass cleaner, kept as the equivalence reference."""
+    if not text:
+        return ""
+
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)\[\]\{\}\"\'\/\\\n]', ' ', text)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+def load_corpus(articles_dir: str) -> List[str]:
+    """Read every article text file in the directory."""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(articles_dir, '*.txt'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    return texts
+
+
+def measure(cleaner: Callable[[str], str], texts: List[str], repeat: int) -> float:
+    """Return the best wall time over ``repeat`` passes of the cleaner over the corpus."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            cleaner(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text over the scraped corpus.")
+    parser.add_argument('--articles-dir', default='scraped_articles', help="Directory of article_N.txt files")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes per cleaner; the best is reported")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.articles_dir)
+    if not texts:
+        print(f"No articles found in {args.articles_dir}")
+        return 1
+
+    megabytes = sum(len(text.encode('utf-8')) for text in texts) / (1024 * 1024)
+    print(f"Corpus: {len(texts)} files, {megabytes:.1f} MB")
+
+    cleaners = [
+        ('legacy (5 passes)', legacy_clean_text),
+        ('compiled (1 pass)', clean_text),
+        ('compiled, keep paragraphs', lambda text: clean_text(text, keep_paragraphs=True)),
+    ]
+    baseline = None
+    for name, cleaner in cleaners:
+        seconds = measure(cleaner, texts, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:28s} {seconds:7.3f}s  {megabytes / seconds:7.1f} MB/s  {baseline / seconds:5.2f}x")
+
+    mismatches = [i for i, text in enumerate(texts) if clean_text(text) != legacy_clean_text(text)]
+    print(f"Output identical to legacy on {len(texts) - len(mismatches)}/{len(texts)} files")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for compressed article storage.
+
+Loads the scraped corpus into one database with plain-text storage and one
+with zlib-compressed storage, then reports the database size, the bytes
+spent on stored text, load time, and p50/p95 latency of the operations that
+read the text: search result pages (passage snippets), the article listing,
+get_article and get_passages. The result cache is disabled so every call
+reaches SQLite.
+
+Usage: python benchmark_compression.py [--scale 1] [--repeat 5]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from app import load_articles_from_files, SUMMARY_CSV
+from benchmark_loader import write_synthetic_summary
+from benchmark_search_concurrency import QUERIES, percentile
+from database import DatabaseManager
+
+
+def time_calls(func: Callable, args: List, repeat: int) -> Dict:
+    """Call ``func`` with each argument ``repeat`` times; return p50/p95 in ms."""
+    latencies = []
+    for _ in range(repeat):
+        for arg in args:
+            start = time.perf_counter()
+            func(arg)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': percentile(latencies, 50), 'p95_ms': percentile(latencies, 95)}
+
+
+def measure(name: str, db_path: str, summary_csv: str, compress: bool, repeat: int) -> Dict:
+    start = time.perf_counter()
+    database = DatabaseManager(db_path, search_cache_size=0, compress=compress)
+    load_articles_from_files(summary_csv=summary_csv, database=database)
+    load_seconds = time.perf_counter() - start
+    database.maintain_index()
+
+    info = database.get_index_info()
+    with database.reader() as conn:
+        article_ids = [row[0] for row in conn.execute('SELECT article_id FROM articles')]
+    sample = random.Random(0).sample(article_ids, min(100, len(article_ids)))
+
+    result = {
+        'load_s': load_seconds,
+        'database_mb': info['database_bytes'] / (1024 * 1024),
+        'text_mb': info['text_bytes'] / (1024 * 1024),
+        'search': time_calls(lambda q: database.search_page(q), QUERIES, repeat),
+        'listing': time_calls(lambda page: database.search_page('', offset=page * 20), range(10), repeat),
+        'get_article': time_calls(database.get_article, sample, repeat),
+        'get_passages': time_calls(database.get_passages, sample, repeat),
+    }
+    database.close()
+
+    print(f"{name}: {result['database_mb']:.1f} MB database, {result['text_mb']:.1f} MB stored text, "
+          f"loaded in {result['load_s']:.2f}s")
+    for operation in ('search', 'listing', 'get_article', 'get_passages'):
+        print(f"  {operation:12s} p50 {result[operation]['p50_ms']:7.2f} ms  "
+              f"p95 {result[operation]['p95_ms']:7.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plain vs compressed article storage.")
+    parser.add_argument('--scale', type=int, default=1, help="Multiplier for the synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=5, help="Passes over each operation's inputs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_csv = SUMMARY_CSV
+        if args.scale > 1:
+            with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            summary_csv = os.path.join(tmp, 'synthetic_summary.csv')
+            write_synthetic_summary(rows, args.scale, summary_csv)
+
+        plain = measure('plain', os.path.join(tmp, 'plain.db'), summary_csv, False, args.repeat)
+        compressed = measure('compressed', os.path.join(tmp, 'compressed.db'), summary_csv, True, args.repeat)
+
+        saved = plain['database_mb'] - compressed['database_mb']
+        print(f"Database {saved:.1f} MB smaller ({saved / plain['database_mb']:.0%}), "
+              f"stored text {plain['text_mb'] / compressed['text_mb']:.1f}x smaller")
+        for operation in ('search', 'listing', 'get_article', 'get_passages'):
+            print(f"  {operation:12s} p50 {compressed[operation]['p50_ms'] - plain[operation]['p50_ms']:+7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for near-duplicate collapsing during ingest.
+
+Adds near-duplicates to the scraped corpus: exact copies under another URL
+(a repeated or mirrored link) and copies with a small fraction of their
+words dropped (the same paper extracted from HTML and from PDF). Loads it
+with and without deduplication and reports load time, the measured size of
+the full-text and passage indexes, how many duplicates were collapsed and
+the per-article cost of the MinHash/LSH lookup.
+
+Usage: python benchmark_duplicates.py [--mirrors 0.1] [--variants 0.1] [--drop 0.03]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from app import load_articles_from_files, resolve_article_path, SUMMARY_CSV
+from database import DatabaseManager
+from duplicates import minhash
+
+
+def write_duplicated_summary(rows: List[Dict], mirrors: float, variants: float, drop: float,
+                             tmp: str) -> Dict:
+    """Write a summary CSV with extra mirror and variant rows; return the CSV path and the copy counts."""
+    rng = random.Random(0)
+    extra = []
+    next_id = max(int(row['article_id']) for row in rows) + 1
+    for row in rng.sample(rows, int(len(rows) * mirrors)):
+        extra.append(dict(row, article_id=str(next_id), url=f"{row['url']}?mirror"))
+        next_id += 1
+    for row in rng.sample(rows, int(len(rows) * variants)):
+        with open(resolve_article_path(row['saved_file_path']), 'r', encoding='utf-8') as f:
+            words = f.read().split()
+        kept = [word for word in words if rng.random() >= drop]
+        path = os.path.join(tmp, f"variant_{next_id}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(' '.join(kept))
+        extra.append(dict(row, article_id=str(next_id), url=f"{row['url']}pdf/", saved_file_path=path,
+                          word_count=str(len(kept)), content_type='PDF'))
+        next_id += 1
+
+    path = os.path.join(tmp, 'duplicated_summary.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows + extra)
+    return {'path': path, 'mirrors': int(len(rows) * mirrors), 'variants': int(len(rows) * variants)}
+
+
+def measure(name: str, db_path: str, summary_csv: str, deduplicate: bool) -> Dict:
+    start = time.perf_counter()
+    database = DatabaseManager(db_path, search_cache_size=0, deduplicate=deduplicate)
+    loaded = load_articles_from_files(summary_csv=summary_csv, database=database)
+    load_seconds = time.perf_counter() - start
+    database.maintain_index()
+    info = database.get_index_info()
+    database.close()
+
+    result = {
+        'articles': loaded['added'],
+        'load_s': load_seconds,
+        'index_mb': (info['index_bytes'] + info['passage_index_bytes']) / (1024 * 1024),
+        'database_mb': info['database_bytes'] / (1024 * 1024),
+        'duplicates': info['duplicates'],
+        'estimated_saved_mb': info['duplicate_index_bytes_saved'] / (1024 * 1024),
+    }
+    print(f"{name:12s} {result['articles']} articles loaded in {result['load_s']:.2f}s, "
+          f"{result['index_mb']:.1f} MB full-text + passage index, {result['database_mb']:.1f} MB database, "
+          f"{result['duplicates']} duplicates collapsed")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate collapsing during ingest.")
+    parser.add_argument('--mirrors', type=float, default=0.1, help="Fraction of articles added again unchanged")
+    parser.add_argument('--variants', type=float, default=0.1,
+                        help="Fraction of articles added again with some words dropped")
+    parser.add_argument('--drop', type=float, default=0.03, help="Fraction of words dropped from variants")
+    args = parser.parse_args()
+
+    with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary = write_duplicated_summary(rows, args.mirrors, args.variants, args.drop, tmp)
+        print(f"Corpus: {len(rows)} articles + {summary['mirrors']} mirrors + "
+              f"{summary['variants']} variants with {args.drop:.0%} of words dropped")
+        plain = measure('all indexed', os.path.join(tmp, 'plain.db'), summary['path'], False)
+        collapsed = measure('deduplicated', os.path.join(tmp, 'dedupe.db'), summary['path'], True)
+
+        saved = plain['index_mb'] - collapsed['index_mb']
+        print(f"Index {saved:.1f} MB smaller ({saved / plain['index_mb']:.0%}), estimated "
+              f"{collapsed['estimated_saved_mb']:.1f} MB; "
+              f"{collapsed['duplicates']} of {summary['mirrors'] + summary['variants']} copies caught")
+
+        texts = []
+        for row in rows[:200]:
+            with open(resolve_article_path(row['saved_file_path']), 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+        start = time.perf_counter()
+        for text in texts:
+            minhash(text)
+        print(f"MinHash signature: {(time.perf_counter() - start) * 1000 / len(texts):.2f} ms per article")
+
+
+if __name__ == "__main__":
+    main()
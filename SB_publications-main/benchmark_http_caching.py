@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark for HTTP validators and response compression.
+
+Serves the Flask app on a local port over the scraped corpus and requests
+/api/search, /search, /api/stats and /article/<id> from --clients threads in
+three modes: uncompressed full responses (Accept-Encoding: identity), gzip
+(or brotli, if installed) full responses, and revalidation with If-None-Match
+against the ETag of an earlier response. Reports bytes on the wire and
+p50/p99 latency per route and mode.
+
+Usage: python benchmark_http_caching.py [--clients 4] [--requests 200]
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import requests
+from werkzeug.serving import make_server
+
+import app as search_app
+from app import load_articles_from_files, brotli
+from benchmark_search_concurrency import QUERIES, percentile
+from database import DatabaseManager
+
+MODES = {
+    'identity': {'Accept-Encoding': 'identity'},
+    'compressed': {'Accept-Encoding': 'br, gzip' if brotli else 'gzip'},
+    'revalidate': {'Accept-Encoding': 'br, gzip' if brotli else 'gzip'},
+}
+
+
+def route_urls(database: DatabaseManager) -> Dict[str, List[str]]:
+    with database.reader() as conn:
+        article_ids = [row[0] for row in conn.execute('SELECT article_id FROM articles')]
+    sample = random.Random(0).sample(article_ids, min(50, len(article_ids)))
+    return {
+        '/api/search': [f"/api/search?q={query}" for query in QUERIES],
+        '/search': [f"/search?q={query}" for query in QUERIES],
+        '/api/stats': ['/api/stats'],
+        '/article/<id>': [f"/article/{article_id}" for article_id in sample],
+    }
+
+
+def fetch(session: requests.Session, url: str, headers: Dict) -> requests.Response:
+    """GET ``url`` without decoding the body, so its length is what crossed the wire."""
+    response = session.get(url, headers=headers, stream=True)
+    response.wire_body = response.raw.read(decode_content=False)
+    response.raise_for_status()
+    return response
+
+
+def run_mode(base_url: str, urls: List[str], mode: str, clients: int, requests_per_client: int) -> Dict:
+    headers = MODES[mode]
+    etags = {}
+    if mode == 'revalidate':
+        # Prime the ETags the clients revalidate against
+        with requests.Session() as session:
+            etags = {url: fetch(session, base_url + url, headers).headers['ETag'] for url in urls}
+
+    latencies, sizes, statuses = [], [], []
+    lock = threading.Lock()
+
+    def client(offset: int):
+        local_latencies, local_sizes, local_statuses = [], [], []
+        with requests.Session() as session:
+            for url in itertools.islice(itertools.cycle(urls), offset, offset + requests_per_client):
+                request_headers = dict(headers, **({'If-None-Match': etags[url]} if url in etags else {}))
+                start = time.perf_counter()
+                response = fetch(session, base_url + url, request_headers)
+                local_latencies.append((time.perf_counter() - start) * 1000)
+                local_sizes.append(len(response.wire_body))
+                local_statuses.append(response.status_code)
+        with lock:
+            latencies.extend(local_latencies)
+            sizes.extend(local_sizes)
+            statuses.extend(local_statuses)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'req_per_s': len(latencies) / elapsed,
+        'bytes_per_response': sum(sizes) / len(sizes),
+        'not_modified': statuses.count(304),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ETag revalidation and response compression.")
+    parser.add_argument('--clients', type=int, default=4, help="Concurrent client threads")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per client per route and mode")
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = DatabaseManager(os.path.join(tmp, 'search.db'), read_pool_size=args.clients)
+        loaded = load_articles_from_files(database=database)
+        search_app.db = database
+        server = make_server('127.0.0.1', 0, search_app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        print(f"Corpus: {loaded['added']} articles, {args.clients} clients, "
+              f"{'brotli' if brotli else 'gzip'} compression")
+
+        try:
+            for route, urls in route_urls(database).items():
+                print(route)
+                baseline = None
+                for mode in MODES:
+                    result = run_mode(base_url, urls, mode, args.clients, args.requests)
+                    baseline = baseline or result
+                    print(f"  {mode:10s} {result['bytes_per_response']:9.0f} B/resp "
+                          f"({result['bytes_per_response'] / baseline['bytes_per_response']:6.1%})  "
+                          f"{result['req_per_s']:7.1f} req/s  p50 {result['p50_ms']:6.2f} ms  "
+                          f"p99 {result['p99_ms']:6.2f} ms  {result['not_modified']:5d} x 304")
+        finally:
+            server.shutdown()
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
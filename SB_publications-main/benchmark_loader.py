@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for loading scraped articles into the search database.
+
+Compares the original per-row loader (one connection, INSERT and commit per
+article) with the bulk loader in app.load_articles_from_files, on the current
+corpus and on a synthetic corpus that repeats it --scale times.
+
+Usage: python benchmark_loader.py [--scale 50] [--skip-legacy-synthetic]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from app import load_articles_from_files, read_article_row, SUMMARY_CSV
+from database import DatabaseManager
+
+
+def legacy_load(database: DatabaseManager, rows: List[Dict]) -> int:
+    """The original loader: read each file and insert it with its own connection and commit."""
+    loaded = 0
+    for row in rows:
+        article = read_article_row(row)
+        if article:
+            article.pop('content_hash')
+            database.insert_article(**article)
+            loaded += 1
+    return loaded
+
+
+def write_synthetic_summary(rows: List[Dict], scale: int, path: str) -> List[Dict]:
+    """Write a summary CSV that repeats every row ``scale`` times under new IDs and URLs."""
+    synthetic = []
+    for copy in range(scale):
+        for row in rows:
+            synthetic.append(dict(
+                row,
+                article_id=str(copy * 100000 + int(row['article_id'])),
+                url=f"{row['url']}#copy{copy}"
+            ))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(synthetic)
+    return synthetic
+
+
+def bulk_load(summary_csv: str, database: DatabaseManager) -> int:
+    """Run the bulk loader against an empty database and return the rows it inserted."""
+    report = load_articles_from_files(summary_csv=summary_csv, database=database)
+    return report['added'] + report['changed']
+
+
+def timed(label: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    loaded = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    print(f"  {label:8s} {loaded:7d} rows in {seconds:8.2f}s  {loaded / seconds:9.1f} rows/s")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs bulk article loading.")
+    parser.add_argument('--scale', type=int, default=50, help="Multiplier for the synthetic corpus")
+    parser.add_argument('--skip-legacy-synthetic', action='store_true',
+                        help="Only run the bulk loader on the synthetic corpus")
+    args = parser.parse_args()
+
+    with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = [('current corpus', rows, SUMMARY_CSV)]
+        if args.scale > 1:
+            synthetic_csv = os.path.join(tmp, 'synthetic_summary.csv')
+            synthetic = write_synthetic_summary(rows, args.scale, synthetic_csv)
+            corpora.append((f"{args.scale}x synthetic corpus", synthetic, synthetic_csv))
+
+        for name, corpus_rows, summary_csv in corpora:
+            print(f"{name}: {len(corpus_rows)} rows")
+            legacy_seconds = None
+            if corpus_rows is rows or not args.skip_legacy_synthetic:
+                database = DatabaseManager(os.path.join(tmp, f"legacy_{len(corpus_rows)}.db"))
+                legacy_seconds = timed('per-row', legacy_load, database, corpus_rows)
+
+            database = DatabaseManager(os.path.join(tmp, f"bulk_{len(corpus_rows)}.db"))
+            bulk_seconds = timed('bulk', bulk_load, summary_csv, database)
+            if legacy_seconds:
+                print(f"  speedup  {legacy_seconds / bulk_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
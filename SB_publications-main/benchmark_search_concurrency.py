@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark for concurrent search while an ingest is writing.
+
+Serves the Flask app on a local port, hammers /api/search from --clients
+threads for --seconds, and meanwhile re-ingests articles in batches the way
+the scraper's database sink does. Reports p50/p99 latency and throughput for
+the original connect-per-call database access and for the pooled WAL
+connections in DatabaseManager.
+
+Usage: python benchmark_search_concurrency.py [--clients 8] [--seconds 10] [--scale 5]
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import requests
+from werkzeug.serving import make_server
+
+import app as search_app
+from app import load_articles_from_files, SUMMARY_CSV
+from benchmark_loader import write_synthetic_summary
+from database import DatabaseManager, register_functions
+
+QUERIES = ['cell', 'protein', 'gene expression', 'microgravity', 'bone loss',
+           'radiation', 'plant growth', 'mice', 'spaceflight', 'immune']
+
+
+class ConnectPerCallDatabaseManager(DatabaseManager):
+    """The original access pattern: a rollback-journal database and a new connection for every call."""
+
+    def init_database(self):
+        super().init_database()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.close()
+
+    @contextmanager
+    def _fresh_connection(self):
+        conn = register_functions(sqlite3.connect(self.db_path, timeout=30.0))
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def reader(self):
+        return self._fresh_connection()
+
+    def writer(self):
+        return self._fresh_connection()
+
+
+def copy_database(source_path: str, target_path: str):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_clients(base_url: str, clients: int, seconds: float) -> List[float]:
+    """Issue searches from ``clients`` threads until the deadline; return latencies in ms."""
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(offset: int):
+        session = requests.Session()
+        local = []
+        for query in itertools.islice(itertools.cycle(QUERIES), offset, None):
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            response = session.get(f"{base_url}/api/search", params={'q': query, 'limit': 20})
+            response.raise_for_status()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def run_ingest(database: DatabaseManager, articles: List[Dict], stop: threading.Event,
+               batch_size: int = 25) -> int:
+    """Re-ingest changed copies of articles in small batches until stopped; return the rows written."""
+    written = 0
+    for generation in itertools.count():
+        for start in range(0, len(articles), batch_size):
+            if stop.is_set():
+                return written
+            batch = [dict(article, content=f"{article['content']} revision{generation}")
+                     for article in articles[start:start + batch_size]]
+            written += database.insert_articles(batch)
+    return written
+
+
+def measure(name: str, database: DatabaseManager, clients: int, seconds: float) -> Dict:
+    with database.reader() as conn:
+        conn.row_factory = sqlite3.Row
+        articles = [dict(row) for row in conn.execute(
+            'SELECT article_id, url, title, IFNULL(content, inflate(content_z)) AS content, '
+            'word_count, content_type, file_path FROM articles ORDER BY article_id LIMIT 500')]
+        conn.row_factory = None
+
+    search_app.db = database
+    server = make_server('127.0.0.1', 0, search_app.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop = threading.Event()
+    ingest_result = {}
+    ingest_thread = threading.Thread(
+        target=lambda: ingest_result.update(rows=run_ingest(database, articles, stop)))
+    try:
+        ingest_thread.start()
+        start = time.perf_counter()
+        latencies = run_clients(base_url, clients, seconds)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        ingest_thread.join()
+        server.shutdown()
+
+    result = {
+        'requests': len(latencies),
+        'req_per_s': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': statistics.mean(latencies) if latencies else 0.0,
+        'ingest_rows_per_s': ingest_result.get('rows', 0) / elapsed,
+    }
+    print(f"  {name:18s} {result['requests']:6d} req  {result['req_per_s']:7.1f} req/s  "
+          f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  "
+          f"ingest {result['ingest_rows_per_s']:7.1f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/search latency under concurrent ingest.")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent search client threads")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Duration of each run")
+    parser.add_argument('--scale', type=int, default=1, help="Multiplier for the synthetic corpus")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_csv = SUMMARY_CSV
+        if args.scale > 1:
+            with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            summary_csv = os.path.join(tmp, 'synthetic_summary.csv')
+            write_synthetic_summary(rows, args.scale, summary_csv)
+
+        db_path = os.path.join(tmp, 'search.db')
+        loader = DatabaseManager(db_path)
+        loaded = load_articles_from_files(summary_csv=summary_csv, database=loader)
+        loader.close()
+        print(f"Corpus: {loaded['added']} articles, {args.clients} clients, {args.seconds:.0f}s per run")
+
+        # Each run starts from the same corpus
+        baseline_path = os.path.join(tmp, 'baseline.db')
+        copy_database(db_path, baseline_path)
+
+        measure('connect per call', ConnectPerCallDatabaseManager(db_path), args.clients, args.seconds)
+        copy_database(baseline_path, db_path)
+        pooled = DatabaseManager(db_path, read_pool_size=args.clients)
+        measure('pooled WAL', pooled, args.clients, args.seconds)
+        pooled.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Load test for the multi-worker server.
+
+Loads the scraped corpus into a temporary database, then starts serve.py
+with 1, 2, 4, ... workers up to the core count and drives it from
+--clients client processes for --seconds each. Clients cycle through a mix
+of /api/search, /article/<id> and /api/stats requests. Reports requests/s,
+the speedup over one worker and p50/p99 latency per worker count. The
+search cache is off by default, so every search reaches SQLite.
+
+Clients run on the same machine and take CPU from the workers; on a
+machine with few cores requests/s stops scaling before the worker count
+reaches the core count.
+
+Usage: python benchmark_serving.py [--workers 1,2,4] [--clients 16] [--seconds 10]
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import requests
+
+from benchmark_search_concurrency import QUERIES, percentile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request_mix(db_path: str) -> List[str]:
+    """URLs of the request mix: two searches per article page, and the statistics now and then."""
+    import sqlite3
+
+    with sqlite3.connect(db_path) as conn:
+        article_ids = [row[0] for row in conn.execute('SELECT article_id FROM articles WHERE canonical_id IS NULL')]
+    sample = random.Random(0).sample(article_ids, min(len(QUERIES), len(article_ids)))
+    urls = []
+    for query, article_id in zip(QUERIES, sample):
+        urls += [f"/api/search?q={query}&limit=20", f"/api/search?q={query}&offset=20&limit=20",
+                 f"/article/{article_id}"]
+    return urls + ['/api/stats']
+
+
+def client(base_url: str, urls: List[str], offset: int, deadline: float) -> Dict:
+    latencies, errors = [], 0
+    with requests.Session() as session:
+        for url in itertools.islice(itertools.cycle(urls), offset, None):
+            if time.time() >= deadline:
+                break
+            start = time.perf_counter()
+            try:
+                session.get(base_url + url).raise_for_status()
+            except requests.RequestException:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {'latencies': latencies, 'errors': errors}
+
+
+def start_server(db_path: str, workers: int, args) -> Dict:
+    port = free_port()
+    env = dict(os.environ, SEARCH_CACHE_SIZE=os.environ.get('SEARCH_CACHE_SIZE', '0'))
+    process = subprocess.Popen(
+        [sys.executable, 'serve.py', '--db', db_path, '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--threads', str(args.threads), '--server', args.server, '--ingest', 'off'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            if requests.get(f"{base_url}/readyz", timeout=1).ok:
+                return {'process': process, 'base_url': base_url}
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"serve.py with {workers} workers did not become ready")
+
+
+def run_load(base_url: str, urls: List[str], clients: int, seconds: float) -> Dict:
+    # Warm every worker's connections and page cache first
+    client(base_url, urls, 0, time.time() + min(2.0, seconds))
+    deadline = time.time() + seconds
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.starmap(client, [(base_url, urls, i * 7, deadline) for i in range(clients)])
+    latencies = [latency for result in results for latency in result['latencies']]
+    return {
+        'requests': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'req_per_s': len(latencies) / seconds,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = [1 << n for n in range(cores.bit_length()) if 1 << n <= cores]
+    if default_workers[-1] != cores:
+        default_workers.append(cores)
+
+    parser = argparse.ArgumentParser(description="Measure requests/s of serve.py against its worker count.")
+    parser.add_argument('--workers', default=','.join(map(str, default_workers)),
+                        help="Comma-separated worker counts to run")
+    parser.add_argument('--clients', type=int, default=max(8, 2 * cores), help="Concurrent client processes")
+    parser.add_argument('--seconds', type=float, default=10, help="Measured seconds per worker count")
+    parser.add_argument('--threads', type=int, default=1, help="Threads per worker")
+    parser.add_argument('--server', default='prefork', help="serve.py --server")
+    parser.add_argument('--db', help="Serve this database instead of loading the corpus into a temporary one")
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(tmp, 'serving.db')
+            subprocess.run([sys.executable, 'serve.py', '--db', db_path, '--ingest', 'only'],
+                           check=True, stdout=subprocess.DEVNULL)
+        urls = request_mix(db_path)
+        print(f"{cores} cores, {args.clients} clients, {args.server} server, "
+              f"{args.threads} thread(s) per worker, {len(urls)} URLs in the mix")
+
+        baseline = None
+        for workers in (int(count) for count in args.workers.split(',')):
+            server = start_server(db_path, workers, args)
+            try:
+                result = run_load(server['base_url'], urls, args.clients, args.seconds)
+            finally:
+                server['process'].terminate()
+                server['process'].wait()
+            baseline = baseline or result
+            print(f"{workers:3d} workers  {result['req_per_s']:8.1f} req/s "
+                  f"({result['req_per_s'] / baseline['req_per_s']:4.2f}x)  p50 {result['p50_ms']:7.2f} ms  "
+                  f"p99 {result['p99_ms']:7.2f} ms  {result['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the related-articles index.
+
+Loads the scraped corpus (optionally scaled up with synthetic copies), then
+reports the time and model size of a full TF-IDF build and of an LSA build,
+p50/p95 latency of reading a precomputed list against scoring one article
+against the whole corpus on request, and the time of an incremental update
+after adding 1% new articles.
+
+Usage: python benchmark_similarity.py [--scale 1] [--lsa 100] [--lookups 1000]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from app import load_articles_from_files, SUMMARY_CSV
+from benchmark_compression import time_calls
+from benchmark_loader import write_synthetic_summary
+from database import DatabaseManager
+from similarity import MODEL_NAME, SimilarityModel, build_similarity_index, update_similarity_index
+
+
+def print_build(name: str, report: dict):
+    print(f"{name:12s} {report['seconds']:7.2f}s  {report['articles']} articles, {report['terms']} terms, "
+          f"{report['model_bytes'] / (1024 * 1024):.1f} MB model")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark building and reading related-article lists.")
+    parser.add_argument('--scale', type=int, default=1, help="Multiplier for the synthetic corpus")
+    parser.add_argument('--lsa', type=int, default=100, help="LSA components for the reduced build")
+    parser.add_argument('--lookups', type=int, default=1000, help="Articles looked up per method")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_csv = SUMMARY_CSV
+        if args.scale > 1:
+            with open(SUMMARY_CSV, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            summary_csv = os.path.join(tmp, 'synthetic_summary.csv')
+            write_synthetic_summary(rows, args.scale, summary_csv)
+
+        database = DatabaseManager(os.path.join(tmp, 'similarity.db'), search_cache_size=0)
+        loaded = load_articles_from_files(summary_csv=summary_csv, database=database)
+        print(f"Corpus: {loaded['added']} articles")
+
+        print_build(f"LSA {args.lsa}", build_similarity_index(database, components=args.lsa))
+        print_build('TF-IDF', build_similarity_index(database))
+
+        model = SimilarityModel.from_bytes(database.get_similarity_model(MODEL_NAME))
+        rows = random.Random(0).choices(range(len(model.article_ids)), k=args.lookups)
+        precomputed = time_calls(database.get_similar, [model.article_ids[row] for row in rows], 1)
+        on_request = time_calls(lambda row: model.nearest([row]), rows, 1)
+        for name, result in (('precomputed', precomputed), ('on request', on_request)):
+            print(f"{name:12s} p50 {result['p50_ms']:7.3f} ms  p95 {result['p95_ms']:7.3f} ms")
+
+        # Ingest 1% new articles, copies of existing ones under new ids
+        versions = database.get_article_versions()
+        sample = random.Random(1).sample(sorted(versions), max(len(versions) // 100, 1))
+        first_id = max(versions) + 1
+        database.insert_articles([
+            dict(database.get_article(article_id), article_id=first_id + n)
+            for n, article_id in enumerate(sample)
+        ])
+        start = time.perf_counter()
+        report = update_similarity_index(database)
+        print(f"{'incremental':12s} {time.perf_counter() - start:7.2f}s  {report['vectorized']} articles "
+              f"vectorized, {report['lists']} of {report['articles']} lists rewritten")
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the scraper's text processing and the search database.
+
+Runs without network access, from the scraped corpus on disk:
+
+- clean_text over the raw text extracted from the HTML fixtures, in MB/s
+- ArticleScraper.extract_html_content over saved HTML pages (generated
+  PMC-like fixtures, or --html-dir)
+- extract_title_from_content over every article
+- load_articles_from_files into an empty database, then
+  DatabaseManager.search_articles and get_statistics, at every --scales
+  multiple of the corpus
+
+Corpora above 1x are synthetic: every extra copy of an article keeps its
+length and word distribution, but a fraction of its passages is swapped
+for passages of other articles. Copies therefore stay below the
+near-duplicate threshold and the index grows as it would with new
+articles. Generation is seeded, and a corpus kept with --corpus-dir is
+reused by later runs with the same parameters.
+
+Results are written as JSON. --compare reports the change of every
+whole-pass timing against an earlier results file and exits with status 1
+when any is more than --threshold slower.
+
+Usage:
+    python benchmark_suite.py --scales 1,10,100 --output results.json
+    python benchmark_suite.py --scales 1,10 --compare results.json
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import html
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import requests
+
+from app import COMPRESS_ARTICLES, DEDUPLICATE_ARTICLES, SUMMARY_CSV, load_articles_from_files, resolve_article_path
+from benchmark_search_concurrency import QUERIES, percentile
+from database import DatabaseManager, extract_title_from_content
+from scrape_articles import ArticleScraper, clean_text
+
+# Synthetic copies are cut into passages of MIX_WORDS words, and MIX of them,
+# at least one, are swapped for passages of other articles; copies then score
+# ~0.4 estimated Jaccard against their original
+MIX_WORDS = 20
+MIX = 0.4
+# Sentences per paragraph and paragraphs per section of the HTML fixtures
+FIXTURE_PARAGRAPH = 5
+FIXTURE_SECTION = 6
+# Whole-pass timings below this are too short to compare between runs
+COMPARE_FLOOR_MS = 5.0
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+def read_corpus(summary_csv: str) -> List[Dict]:
+    """Summary rows of the articles whose text file exists, with the text under ``content``."""
+    rows = []
+    with open(summary_csv, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            path = resolve_article_path(row['saved_file_path'])
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as article:
+                    rows.append(dict(row, content=article.read()))
+    return rows
+
+
+def corpus_digest(rows: List[Dict]) -> str:
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(row['article_id'].encode('utf-8'))
+        digest.update(row['content'].encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def write_synthetic_corpus(rows: List[Dict], scale: int, out_dir: str, seed: int = 0) -> str:
+    """Write ``scale`` times the corpus (the originals plus recombined copies); return its summary CSV path.
+
+    Reuses the files already in ``out_dir`` if they were generated from the
+    same corpus, scale and seed.
+    """
+    manifest = {'scale': scale, 'seed': seed, 'mix': MIX, 'mix_words': MIX_WORDS, 'corpus': corpus_digest(rows)}
+    summary_csv = os.path.join(out_dir, 'summary.csv')
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == manifest:
+                return summary_csv
+
+    os.makedirs(out_dir, exist_ok=True)
+    passages = []
+    for row in rows:
+        words = row['content'].split()
+        passages.append([' '.join(words[i:i + MIX_WORDS]) for i in range(0, len(words), MIX_WORDS)] or [''])
+    pool = [passage for article in passages for passage in article]
+    fieldnames = [name for name in rows[0] if name != 'content']
+    synthetic = [{name: row[name] for name in fieldnames} for row in rows]
+    for row in synthetic:
+        row['saved_file_path'] = os.path.abspath(resolve_article_path(row['saved_file_path']))
+
+    for copy in range(1, scale):
+        copy_dir = os.path.join(out_dir, f"copy{copy}")
+        os.makedirs(copy_dir, exist_ok=True)
+        for row, article in zip(rows, passages):
+            rng = random.Random(f"{seed}-{copy}-{row['article_id']}")
+            mixed = list(article)
+            for index in rng.sample(range(len(mixed)), max(1, round(len(mixed) * MIX))):
+                mixed[index] = rng.choice(pool)
+            text = ' '.join(mixed)
+            article_id = copy * 100000 + int(row['article_id'])
+            path = os.path.join(copy_dir, f"article_{article_id}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            synthetic.append(dict({name: row[name] for name in fieldnames}, article_id=str(article_id),
+                                  url=f"{row['url']}#copy{copy}", word_count=str(len(text.split())),
+                                  saved_file_path=path))
+
+    with open(summary_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(synthetic)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return summary_csv
+
+
+def fixture_page(row: Dict) -> str:
+    """A PMC-like article page around the article text: navigation, sidebar, sections and references."""
+    sentences = [html.escape(sentence) for sentence in SENTENCE_PATTERN.split(row['content'])]
+    title = html.escape(extract_title_from_content(row['content'], row['url']))
+    paragraphs = [' '.join(sentences[i:i + FIXTURE_PARAGRAPH]) for i in range(0, len(sentences), FIXTURE_PARAGRAPH)]
+    sections = []
+    for number, start in enumerate(range(0, len(paragraphs), FIXTURE_SECTION), 1):
+        body = ''.join(f"<p>{paragraph}</p>\n" for paragraph in paragraphs[start:start + FIXTURE_SECTION])
+        sections.append(f'<section id="sec{number}"><h2>Section {number}</h2>\n{body}</section>\n')
+    references = ''.join(f'<li class="citation">Author {i}. Reference title {i}. J Biol. 2020;{i}:1-10.</li>'
+                         for i in range(40))
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><title>{title}</title>'
+        '<script>window.dataLayer = [];</script><style>body { font-family: serif; }</style></head><body>'
+        '<header class="header"><nav class="navigation"><a href="/">Home</a><a href="/search">Search</a></nav></header>'
+        '<aside class="sidebar"><div class="share">Share</div><div class="related-articles">Related</div></aside>'
+        f'<main><article><h1>{title}</h1><div class="abstract"><p>{paragraphs[0] if paragraphs else ""}</p></div>\n'
+        f'{"".join(sections)}<div class="references"><ol class="ref-list">{references}</ol></div>'
+        '</article></main><footer class="footer">Footer links</footer></body></html>'
+    )
+
+
+def write_html_fixtures(rows: List[Dict], count: int, out_dir: str) -> List[str]:
+    """Save fixture pages for the first ``count`` articles; return their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for row in rows[:count]:
+        path = os.path.join(out_dir, f"article_{row['article_id']}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(fixture_page(row))
+        paths.append(path)
+    return paths
+
+
+def time_each(func: Callable, items: List, repeat: int) -> Dict:
+    """Call ``func`` on every item ``repeat`` times; p50/p95 per call and the best full pass, in ms."""
+    latencies, passes = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            call_start = time.perf_counter()
+            func(item)
+            latencies.append((time.perf_counter() - call_start) * 1000)
+        passes.append((time.perf_counter() - start) * 1000)
+    return {'calls': len(items), 'p50_ms': percentile(latencies, 50), 'p95_ms': percentile(latencies, 95),
+            'best_pass_ms': min(passes)}
+
+
+def throughput(result: Dict, megabytes: float) -> Dict:
+    return dict(result, mb=megabytes, mb_per_s=megabytes / (result['best_pass_ms'] / 1000))
+
+
+def bench_text_processing(rows: List[Dict], html_paths: List[str], repeat: int, tmp: str) -> Dict:
+    """clean_text, extract_html_content and extract_title_from_content on the base corpus."""
+    scraper = ArticleScraper(input_file=os.path.join(tmp, 'none.csv'), output_dir=os.path.join(tmp, 'scraped'),
+                             journal_file=os.path.join(tmp, 'journal.jsonl'),
+                             summary_file=os.path.join(tmp, 'summary.csv'), cache_dir=None,
+                             progress_file=os.path.join(tmp, 'progress.json'))
+    responses = []
+    for path in html_paths:
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        with open(path, 'rb') as f:
+            response._content = f.read()
+        responses.append(response)
+    html_mb = sum(len(response.content) for response in responses) / (1024 * 1024)
+    extracted = [scraper.extract_html_content(response.url, response) for response in responses]
+    raw_mb = sum(len(text.encode('utf-8')) for text in extracted) / (1024 * 1024)
+    corpus_mb = sum(len(row['content'].encode('utf-8')) for row in rows) / (1024 * 1024)
+
+    return {
+        'extract_html_content': throughput(
+            time_each(lambda response: scraper.extract_html_content(response.url, response), responses, repeat),
+            html_mb),
+        'clean_text': throughput(time_each(clean_text, extracted, repeat), raw_mb),
+        'clean_text_keep_paragraphs': throughput(
+            time_each(lambda text: clean_text(text, keep_paragraphs=True), extracted, repeat), raw_mb),
+        'extract_title_from_content': throughput(
+            time_each(lambda row: extract_title_from_content(row['content'], row['url']), rows, repeat), corpus_mb),
+    }
+
+
+def bench_database(summary_csv: str, db_path: str, repeat: int) -> Dict:
+    """Load a corpus into an empty database, then time searches and statistics against it."""
+    database = DatabaseManager(db_path, search_cache_size=0, compress=COMPRESS_ARTICLES,
+                               deduplicate=DEDUPLICATE_ARTICLES)
+    try:
+        start = time.perf_counter()
+        report = load_articles_from_files(summary_csv=summary_csv, database=database)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        database.get_statistics()
+        statistics_first_ms = (time.perf_counter() - start) * 1000
+        info = database.get_index_info()
+        return {
+            'articles': report['added'],
+            'duplicates': info['duplicates'],
+            'load_articles_from_files': {'seconds': load_seconds, 'articles_per_s': report['added'] / load_seconds},
+            'search_articles': time_each(lambda query: database.search_articles(query, limit=20), QUERIES, repeat),
+            'search_articles_deep': time_each(lambda query: database.search_articles(query, limit=20, offset=200),
+                                              QUERIES, repeat),
+            'get_statistics': dict(time_each(lambda _: database.get_statistics(), range(10), repeat),
+                                   first_ms=statistics_first_ms),
+            'database_mb': info['database_bytes'] / (1024 * 1024),
+        }
+    finally:
+        database.close()
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'compress': COMPRESS_ARTICLES,
+        'deduplicate': DEDUPLICATE_ARTICLES,
+    }
+
+
+def run_suite(summary_csv: str, scales: List[int], repeat: int, corpus_dir: str, html_dir: str = None,
+              fixtures: int = 100, seed: int = 0) -> Dict:
+    rows = read_corpus(summary_csv)
+    if not rows:
+        raise ValueError(f"No article files found for {summary_csv}")
+    results = {'environment': environment(),
+               'corpus': {'articles': len(rows), 'digest': corpus_digest(rows), 'seed': seed,
+                          'mix': MIX, 'mix_words': MIX_WORDS}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        html_paths = (sorted(glob.glob(os.path.join(html_dir, '*.html'))) if html_dir
+                      else write_html_fixtures(rows, fixtures, os.path.join(tmp, 'html')))
+        results['text'] = bench_text_processing(rows, html_paths, repeat, tmp)
+        results['text']['html_pages'] = len(html_paths)
+        log_result('text', results['text'])
+
+        results['scales'] = {}
+        for scale in scales:
+            scaled_csv = summary_csv if scale == 1 else write_synthetic_corpus(
+                rows, scale, os.path.join(corpus_dir, f"scale{scale}"), seed)
+            results['scales'][str(scale)] = bench_database(scaled_csv, os.path.join(tmp, f"scale{scale}.db"), repeat)
+            log_result(f"{scale}x", results['scales'][str(scale)])
+    return results
+
+
+def log_result(name: str, result: Dict):
+    for key, value in result.items():
+        if not isinstance(value, dict):
+            continue
+        timing = (f"{value['seconds']:8.2f}s" if 'seconds' in value
+                  else f"p50 {value['p50_ms']:8.3f} ms  p95 {value['p95_ms']:8.3f} ms")
+        rate = f"  {value['mb_per_s']:7.1f} MB/s" if 'mb_per_s' in value else ''
+        print(f"{name:5s} {key:28s} {timing}{rate}")
+
+
+def flatten(results: Dict, prefix: str = '') -> Dict[str, float]:
+    """The whole-pass timings of a results file in ms, keyed by their dotted path.
+
+    Per-call percentiles are left out: over a few dozen calls they move by
+    more than the regressions worth catching.
+    """
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+        elif key == 'best_pass_ms':
+            flat[path] = value
+        elif key == 'seconds':
+            flat[path] = value * 1000
+    return flat
+
+
+def compare(current: Dict, previous: Dict, threshold: float) -> List[str]:
+    """Print the change of every timing present in both results; return the ones slower than ``threshold``.
+
+    Timings under COMPARE_FLOOR_MS on both sides are printed but never counted.
+    """
+    before, after = flatten(previous), flatten(current)
+    print(f"Against {previous['environment'].get('commit')} ({previous['environment'].get('timestamp')}):")
+    regressions = []
+    for path in sorted(before.keys() & after.keys()):
+        if not before[path]:
+            continue
+        change = after[path] / before[path] - 1
+        flag = ''
+        if change > threshold and max(before[path], after[path]) >= COMPARE_FLOOR_MS:
+            regressions.append(path)
+            flag = '  REGRESSION'
+        print(f"  {path:55s} {before[path]:11.2f} -> {after[path]:11.2f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline scraper and search benchmarks.")
+    parser.add_argument('--summary', default=SUMMARY_CSV, help="Summary CSV of the base corpus")
+    parser.add_argument('--scales', default='1,10,100', help="Comma-separated corpus multiples to load and search")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes per measurement")
+    parser.add_argument('--corpus-dir', help="Keep synthetic corpora here and reuse them (default: a temp dir)")
+    parser.add_argument('--html-dir', help="Saved HTML pages to extract instead of the generated fixtures")
+    parser.add_argument('--fixtures', type=int, default=100, help="Generated HTML fixture pages")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic corpus")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--compare', help="Earlier JSON results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Slowdown counted as a regression by --compare (0.1 = 10%%)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_suite(args.summary, scales, args.repeat, args.corpus_dir or tmp, args.html_dir,
+                            args.fixtures, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if compare(results, previous, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1719 @@
+#!/usr/bin/env python3
+"""
+Database layer for the Biology Research Search Engine.
+
+Holds the SQLite schema, full-text search index and article storage shared by
+the Flask app and the scraper's direct ingestion sink.
+"""
+
+import base64
+import functools
+import json
+import logging
+import os
+import sqlite3
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple
+from urllib.request import pathname2url
+
+try:
+    from duplicates import (DUPLICATE_THRESHOLD, band_buckets, minhash, similarity,
+                            signature_from_bytes, signature_to_bytes)
+except ImportError:  # numpy missing; near-duplicate detection is unavailable
+    minhash = None
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Per-connection settings for pooled connections
+STATEMENT_CACHE_SIZE = 256
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_READ_POOL_SIZE = 8
+BUSY_TIMEOUT = 30.0
+
+# Search result cache defaults
+DEFAULT_SEARCH_CACHE_SIZE = 1024
+DEFAULT_SEARCH_CACHE_TTL = 300.0
+
+# BM25 column weights; a title match counts this many times a body match
+DEFAULT_TITLE_WEIGHT = 10.0
+DEFAULT_CONTENT_WEIGHT = 1.0
+
+# Autocomplete only looks up prefixes of at least this many characters
+MIN_SUGGEST_PREFIX = 2
+
+# Statements slower than this many milliseconds are logged with their query plan
+DEFAULT_SLOW_QUERY_MS = 100.0
+# Characters of normalized SQL kept in a statement's metric label
+SQL_LABEL_LENGTH = 120
+
+SQL_SECONDS = REGISTRY.histogram('sqlite_statement_seconds',
+                                 'SQLite statement latency, from execute to the last row fetched', ['statement'])
+SLOW_QUERIES = REGISTRY.counter('sqlite_slow_queries_total', 'Statements slower than the slow-query threshold',
+                                ['statement'])
+
+# Article and passage text is stored either as plain text in ``content`` or
+# zlib-compressed in ``content_z`` with ``content`` NULL; rows of both kinds
+# can live in one table. SQL reads the text through inflate(), a function
+# registered on every connection DatabaseManager opens, so the database needs
+# it for writes and snippets (the sqlite3 shell can still search it).
+COMPRESSION_LEVEL = 6
+
+
+def compress_text(text: str) -> bytes:
+    """Compress article or passage text for the content_z column."""
+    return None if text is None else zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    """Inverse of compress_text; NULL stays NULL."""
+    return None if data is None else zlib.decompress(data).decode('utf-8')
+
+
+def register_functions(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Register the SQL functions the schema's views and triggers rely on."""
+    conn.create_function('inflate', 1, decompress_text, deterministic=True)
+    return conn
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_label(sql: str) -> str:
+    """Metric label for a statement: whitespace collapsed, placeholder and VALUES lists shortened."""
+    label = ' '.join(sql.split())
+    label = re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', label)
+    label = re.sub(r'\([^()]*\)(?:\s*,\s*\([^()]*\))+', '(...), ...', label)
+    return label[:SQL_LABEL_LENGTH]
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times its statement from execute until the last row is fetched or it is dropped.
+
+    The total, including the steps SQLite runs while rows are fetched, is
+    reported once to the connection's ``observer``.
+    """
+    
+    _sql = None
+    
+    def execute(self, sql: str, parameters=()):
+        self._finish()
+        self._sql, self._parameters, self._elapsed = sql, parameters, 0.0
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+    
+    def executemany(self, sql: str, seq_of_parameters):
+        self._finish()
+        self._sql, self._parameters, self._elapsed = sql, (), 0.0
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._finish()
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._finish()
+        return row
+    
+    def fetchmany(self, size: int = None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        if not rows:
+            self._finish()
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._finish()
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._elapsed += time.perf_counter() - start
+            self._finish()
+            raise
+        self._elapsed += time.perf_counter() - start
+        return row
+    
+    def close(self):
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+    
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        observer = getattr(self.connection, 'observer', None)
+        if observer:
+            observer(self.connection, sql, self._parameters, self._elapsed)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose ``execute`` and ``executemany`` run on TimedCursors."""
+    
+    observer = None
+    
+    def execute(self, sql: str, parameters=()):
+        return self.cursor(TimedCursor).execute(sql, parameters)
+    
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor(TimedCursor).executemany(sql, seq_of_parameters)
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, parameters=()) -> List[str]:
+    """EXPLAIN QUERY PLAN of a statement, one line per plan step, indented by depth."""
+    rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    depth = {0: 0}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        lines.append('  ' * (depth[node_id] - 1) + detail)
+    return lines
+
+
+# SQL expression for the text of an article or passage row
+STORED_TEXT = "IFNULL({row}.content, inflate({row}.content_z))"
+
+# The text of every article and passage, whichever way it is stored. The FTS
+# indexes use these views as their external content, so FTS5 decompresses a
+# row only when it needs the text: for snippets, 'rebuild' and integrity checks.
+# Near-duplicates of another article are left out of the index.
+CONTENT_VIEWS = {
+    'articles_text': '''
+        CREATE VIEW IF NOT EXISTS articles_text AS
+        SELECT id, article_id, title, IFNULL(content, inflate(content_z)) AS content FROM articles
+        WHERE canonical_id IS NULL
+    ''',
+    'passages_text': '''
+        CREATE VIEW IF NOT EXISTS passages_text AS
+        SELECT id, IFNULL(content, inflate(content_z)) AS content FROM passages
+    ''',
+}
+
+# Full-text index over the articles table. The prefix indexes make prefix
+# queries such as grav* as cheap as whole-term ones.
+FTS_TABLE_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        article_id UNINDEXED,
+        title,
+        content,
+        content='articles_text',
+        content_rowid='id',
+        prefix='2 3 4'
+    )
+'''
+
+# Triggers that keep the external-content FTS index in step with the articles
+# table. The index stores no text of its own, so removing a row means handing
+# FTS5 the old values through a 'delete' command on the same rowid. Like the
+# articles_text view they skip near-duplicates (canonical_id set).
+FTS_TRIGGERS = {
+    'articles_ai': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles WHEN new.canonical_id IS NULL BEGIN
+            INSERT INTO articles_fts(rowid, article_id, title, content) 
+            VALUES (new.id, new.article_id, new.title, {STORED_TEXT.format(row='new')});
+        END
+    ''',
+    'articles_ad': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles WHEN old.canonical_id IS NULL BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, article_id, title, content)
+            VALUES ('delete', old.id, old.article_id, old.title, {STORED_TEXT.format(row='old')});
+        END
+    ''',
+    'articles_au': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_au
+        AFTER UPDATE OF article_id, title, content, content_z, canonical_id ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, article_id, title, content)
+            SELECT 'delete', old.id, old.article_id, old.title, {STORED_TEXT.format(row='old')}
+            WHERE old.canonical_id IS NULL;
+            INSERT INTO articles_fts(rowid, article_id, title, content) 
+            SELECT new.id, new.article_id, new.title, {STORED_TEXT.format(row='new')}
+            WHERE new.canonical_id IS NULL;
+        END
+    ''',
+}
+
+# Bumped whenever the FTS tables, triggers or content views change; older
+# databases get their article and passage indexes recreated and rebuilt on open
+FTS_SYNC_VERSION = 5
+
+# Triggers from earlier schema versions, dropped on open
+OBSOLETE_TRIGGERS = ['articles_stats_bi']
+
+# Insert or update by article_id. Unlike INSERT OR REPLACE this keeps the
+# row's id, which is the FTS rowid, and rows whose values did not change are
+# left alone instead of being re-indexed; only written rows are returned.
+# updated_at (UTC, millisecond precision) only moves when a row is written.
+UPSERT_ARTICLE_SQL = '''
+    INSERT INTO articles 
+    (article_id, url, title, content, content_z, word_count, content_type, file_path, updated_at,
+     canonical_id, duplicate_score)
+    VALUES (:article_id, :url, :title, :content, :content_z, :word_count, :content_type, :file_path,
+            strftime('%Y-%m-%d %H:%M:%f', 'now'), :canonical_id, :duplicate_score)
+    ON CONFLICT(article_id) DO UPDATE SET
+        url = excluded.url, title = excluded.title, content = excluded.content,
+        content_z = excluded.content_z, word_count = excluded.word_count,
+        content_type = excluded.content_type, file_path = excluded.file_path,
+        updated_at = excluded.updated_at, canonical_id = excluded.canonical_id,
+        duplicate_score = excluded.duplicate_score
+    WHERE url IS NOT excluded.url OR title IS NOT excluded.title
+        OR content IS NOT excluded.content OR content_z IS NOT excluded.content_z
+        OR word_count IS NOT excluded.word_count
+        OR content_type IS NOT excluded.content_type OR file_path IS NOT excluded.file_path
+        OR canonical_id IS NOT excluded.canonical_id
+    RETURNING id, article_id
+'''
+
+# Articles are also indexed as fixed-size passages so snippets and passage
+# ranking only tokenize a few hundred words instead of a whole article.
+# Passage ids are the article's row id shifted left by PASSAGE_ID_BITS plus
+# the passage number, so one article's passages are a single rowid range.
+PASSAGE_WORDS = 150
+PASSAGE_ID_BITS = 16
+MAX_PASSAGES = 1 << PASSAGE_ID_BITS
+PASSAGES_PER_RESULT = 3
+
+PASSAGE_TABLES = {
+    'passages': '''
+        CREATE TABLE IF NOT EXISTS passages (
+            id INTEGER PRIMARY KEY,
+            article_id INTEGER,
+            passage_no INTEGER,
+            content TEXT,
+            content_z BLOB
+        )
+    ''',
+    'passages_fts': '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+            content,
+            content='passages_text',
+            content_rowid='id'
+        )
+    ''',
+}
+
+# External-content sync for passages_fts, same protocol as articles_fts
+PASSAGE_FTS_TRIGGERS = {
+    'passages_ai': f'''
+        CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+            INSERT INTO passages_fts(rowid, content) VALUES (new.id, {STORED_TEXT.format(row='new')});
+        END
+    ''',
+    'passages_ad': f'''
+        CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+            INSERT INTO passages_fts(passages_fts, rowid, content)
+            VALUES ('delete', old.id, {STORED_TEXT.format(row='old')});
+        END
+    ''',
+}
+
+# Removing an article removes its passages
+PASSAGE_TRIGGERS = {
+    'articles_passages_ad': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_passages_ad AFTER DELETE ON articles BEGIN
+            DELETE FROM passages
+            WHERE id BETWEEN old.id << {PASSAGE_ID_BITS} AND (old.id << {PASSAGE_ID_BITS}) + {MAX_PASSAGES - 1};
+        END
+    ''',
+}
+
+
+def split_passages(text: str, words: int = PASSAGE_WORDS) -> List[str]:
+    """Split article text into passages of ``words`` words; the last one may be shorter."""
+    tokens = (text or '').split()
+    limit = words * MAX_PASSAGES
+    return [' '.join(tokens[i:i + words]) for i in range(0, min(len(tokens), limit), words)]
+
+
+def passage_range(row_id: int) -> Tuple[int, int]:
+    """The first and last passage id of the article stored at ``row_id``."""
+    first = row_id << PASSAGE_ID_BITS
+    return first, first + MAX_PASSAGES - 1
+
+
+# Width of the word-count histogram buckets in corpus_word_histogram
+WORD_COUNT_BUCKET = 1000
+
+# Bumped whenever the statistics triggers change what they count; older
+# databases get them recreated and the statistics rebuilt on open
+STATS_SYNC_VERSION = 1
+
+STATS_TABLES = {
+    'corpus_stats': '''
+        CREATE TABLE IF NOT EXISTS corpus_stats (
+            content_type TEXT PRIMARY KEY,
+            articles INTEGER NOT NULL,
+            words INTEGER NOT NULL
+        )
+    ''',
+    'corpus_word_histogram': '''
+        CREATE TABLE IF NOT EXISTS corpus_word_histogram (
+            bucket INTEGER PRIMARY KEY,
+            articles INTEGER NOT NULL
+        )
+    ''',
+    'corpus_daily': '''
+        CREATE TABLE IF NOT EXISTS corpus_daily (
+            day TEXT,
+            content_type TEXT,
+            articles INTEGER NOT NULL,
+            PRIMARY KEY (day, content_type)
+        )
+    ''',
+}
+
+
+def _stats_delta_sql(row: str, sign: str, source: str = 'WHERE true') -> str:
+    """Statements that add (sign '+') or remove (sign '-') article rows from the statistics tables.
+
+    ``row`` names the article row in ``source``, which is a FROM/WHERE tail
+    for the SELECT that feeds each upsert.
+    """
+    content_type = f"IFNULL({row}.content_type, 'unknown')"
+    words = f"IFNULL({row}.word_count, 0)"
+    return f'''
+            INSERT INTO corpus_stats (content_type, articles, words)
+            SELECT {content_type}, {sign}1, {sign}{words} {source}
+            ON CONFLICT(content_type) DO UPDATE SET
+                articles = articles + excluded.articles, words = words + excluded.words;
+            INSERT INTO corpus_word_histogram (bucket, articles)
+            SELECT {words} / {WORD_COUNT_BUCKET} * {WORD_COUNT_BUCKET}, {sign}1 {source}
+            ON CONFLICT(bucket) DO UPDATE SET articles = articles + excluded.articles;
+            INSERT INTO corpus_daily (day, content_type, articles)
+            SELECT date({row}.created_at), {content_type}, {sign}1 {source}
+            ON CONFLICT(day, content_type) DO UPDATE SET articles = articles + excluded.articles;
+    '''
+
+
+# Triggers that keep the statistics tables in step with the articles table.
+# Like search they count canonical articles only, so a row that becomes or
+# stops being a near-duplicate leaves or joins the statistics.
+STATS_TRIGGERS = {
+    'articles_stats_ai': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_ai AFTER INSERT ON articles WHEN new.canonical_id IS NULL BEGIN
+            {_stats_delta_sql('new', '+')}
+        END
+    ''',
+    'articles_stats_ad': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_ad AFTER DELETE ON articles WHEN old.canonical_id IS NULL BEGIN
+            {_stats_delta_sql('old', '-')}
+        END
+    ''',
+    'articles_stats_au': f'''
+        CREATE TRIGGER IF NOT EXISTS articles_stats_au AFTER UPDATE ON articles BEGIN
+            {_stats_delta_sql('old', '-', 'WHERE old.canonical_id IS NULL')}
+            {_stats_delta_sql('new', '+', 'WHERE new.canonical_id IS NULL')}
+        END
+    ''',
+}
+
+
+# Near-duplicate detection: every article's MinHash signature, and the LSH
+# band buckets of articles that are not duplicates themselves
+DUPLICATE_TABLES = {
+    'article_minhash': '''
+        CREATE TABLE IF NOT EXISTS article_minhash (
+            article_id INTEGER PRIMARY KEY,
+            signature BLOB
+        )
+    ''',
+    'minhash_buckets': '''
+        CREATE TABLE IF NOT EXISTS minhash_buckets (
+            article_id INTEGER,
+            band INTEGER,
+            bucket INTEGER,
+            PRIMARY KEY (article_id, band)
+        ) WITHOUT ROWID
+    ''',
+    'minhash_buckets_lookup': 'CREATE INDEX IF NOT EXISTS minhash_buckets_lookup ON minhash_buckets (band, bucket)',
+    'articles_canonical': '''
+        CREATE INDEX IF NOT EXISTS articles_canonical ON articles (canonical_id) WHERE canonical_id IS NOT NULL
+    ''',
+}
+
+# Related articles: each article's top-k most similar articles, precomputed by
+# similarity.py, and the serialized models it updates them incrementally from
+SIMILARITY_TABLES = {
+    'article_neighbors': '''
+        CREATE TABLE IF NOT EXISTS article_neighbors (
+            article_id INTEGER,
+            rank INTEGER,
+            neighbor_id INTEGER,
+            score REAL,
+            PRIMARY KEY (article_id, rank)
+        ) WITHOUT ROWID
+    ''',
+    'similarity_model': '''
+        CREATE TABLE IF NOT EXISTS similarity_model (
+            name TEXT PRIMARY KEY,
+            data BLOB
+        )
+    ''',
+}
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections.
+
+    Connections are created lazily and handed out most-recently-used first, so
+    the busiest ones keep warm page and prepared-statement caches. At most
+    ``size`` connections exist; callers beyond that wait for one to come back.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], size: int):
+        self.factory = factory
+        self.size = max(1, size)
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._condition:
+            while not self._idle and self._created >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return self.factory()
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._condition:
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def close(self):
+        """Close every idle connection; connections in use are closed when returned and reopened later."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+
+class ResultCache:
+    """Bounded LRU cache with a TTL whose entries are tagged with a corpus generation.
+
+    An entry is only returned while the corpus generation it was computed at
+    is still current, so any committed ingest invalidates every cached result
+    at once without having to track which results it affected.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SEARCH_CACHE_SIZE, ttl: float = DEFAULT_SEARCH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, generation: int):
+        """Return the cached value for ``key`` at ``generation``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_generation, expires_at, value = entry
+            if entry_generation != generation or expires_at <= time.monotonic():
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, generation: int, value):
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class DatabaseManager:
+    """Manages database operations for articles and search functionality.
+
+    Reads go through a pool of read-only connections and writes through a
+    single pooled writer connection, so request handlers reuse open
+    connections (and their cached prepared statements) instead of opening the
+    database file on every call. The database runs in WAL mode, so readers
+    are not blocked while an ingest is writing.
+
+    With ``compress`` set, articles and passages written through this manager
+    are stored zlib-compressed; reads handle either storage.
+    
+    With ``deduplicate`` set, every article written gets a MinHash signature
+    and is looked up in the LSH buckets of the articles already stored. A
+    near-duplicate of one of them is stored with ``canonical_id`` pointing at
+    it and left out of the full-text and passage indexes, so search shows the
+    canonical article once. This needs numpy; without it ImportError is raised.
+    
+    With ``read_only`` set the manager never writes: the schema is not
+    created or migrated, so the database must already exist, and the writer
+    is a read-only connection on which writes fail. Nothing is opened until
+    the first query, so a manager created before a fork is safe to use in the
+    child processes.
+    
+    With ``metrics`` set, every statement is timed into the
+    sqlite_statement_seconds histogram, and statements taking
+    ``slow_query_ms`` or longer are logged with their EXPLAIN QUERY PLAN.
+    Without it connections are plain sqlite3 connections.
+    """
+    
+    def __init__(self, db_path: str, read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+                 mmap_size: int = DEFAULT_MMAP_SIZE, search_cache_size: int = DEFAULT_SEARCH_CACHE_SIZE,
+                 search_cache_ttl: float = DEFAULT_SEARCH_CACHE_TTL,
+                 title_weight: float = DEFAULT_TITLE_WEIGHT, content_weight: float = DEFAULT_CONTENT_WEIGHT,
+                 compress: bool = False, deduplicate: bool = False, read_only: bool = False,
+                 metrics: bool = False, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.metrics = metrics
+        self.slow_query_ms = slow_query_ms
+        self.compress = compress
+        if deduplicate and minhash is None:
+            raise ImportError("near-duplicate detection needs numpy")
+        self.deduplicate = deduplicate
+        self.title_weight = title_weight
+        self.content_weight = content_weight
+        self.mmap_size = mmap_size
+        # Search results are cached per corpus generation; size 0 disables the cache
+        self.search_cache = ResultCache(search_cache_size, search_cache_ttl) if search_cache_size > 0 else None
+        # Last statistics read and the corpus generation it was read at
+        self._statistics = None
+        if read_only:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"Database not found: {db_path}")
+        else:
+            self.init_database()
+        self.write_pool = ConnectionPool(self._connect_reader if read_only else self._connect_writer, 1)
+        self.read_pool = ConnectionPool(self._connect_reader, read_pool_size)
+    
+    def _configure(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        if self.metrics:
+            conn.observer = self._observe_statement
+        return register_functions(conn)
+    
+    def _connect_writer(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE,
+                               factory=TimedConnection if self.metrics else sqlite3.Connection)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return self._configure(conn)
+    
+    def _connect_reader(self) -> sqlite3.Connection:
+        uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE,
+                               factory=TimedConnection if self.metrics else sqlite3.Connection)
+        conn.execute('PRAGMA query_only=1')
+        return self._configure(conn)
+    
+    def _observe_statement(self, conn: sqlite3.Connection, sql: str, parameters, seconds: float):
+        """Record a timed statement; log it with its query plan if it was slow."""
+        label = statement_label(sql)
+        SQL_SECONDS.observe(seconds, label)
+        if self.slow_query_ms is None or seconds * 1000 < self.slow_query_ms:
+            return
+        SLOW_QUERIES.inc(label)
+        try:
+            plan = '\n    '.join(query_plan(conn, sql, parameters)) or '(no plan)'
+        except sqlite3.Error as e:
+            plan = f"(unavailable: {e})"
+        logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {' '.join(sql.split())} "
+                       f"params={parameters!r:.200}\n    {plan}")
+    
+    def reader(self):
+        """Borrow a read-only connection from the pool."""
+        return self.read_pool.connection()
+    
+    def writer(self):
+        """Borrow the writer connection; writes are serialized through it."""
+        return self.write_pool.connection()
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.read_pool.close()
+        self.write_pool.close()
+    
+    def _bump_generation(self, conn: sqlite3.Connection):
+        conn.execute('''
+            UPDATE corpus_meta
+            SET value = CASE key WHEN 'generation' THEN value + 1 ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+            WHERE key IN ('generation', 'modified_at')
+        ''')
+    
+    def _read_generation(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM corpus_meta WHERE key = 'generation'").fetchone()[0]
+    
+    def get_generation(self) -> int:
+        """Get the corpus generation, which changes whenever articles are written or removed."""
+        with self.reader() as conn:
+            return self._read_generation(conn)
+    
+    def get_corpus_version(self) -> Dict:
+        """Get the corpus generation, the Unix time it last changed, the database's instance id
+        and the version of the related-article lists."""
+        with self.reader() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM corpus_meta WHERE key IN ('generation', 'modified_at', 'instance', 'similarity')"
+            ).fetchall()
+        return dict(rows)
+    
+    def set_ingest_state(self, state: str):
+        """Record the state of an ingest run by another process ('loading', 'ready', 'failed' or 'skipped')."""
+        with self.writer() as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO corpus_meta (key, value) VALUES ('ingest_state', ?)", (state,))
+    
+    def get_ingest_state(self) -> str:
+        """Get the state recorded by set_ingest_state, or None if no ingest has recorded one."""
+        with self.reader() as conn:
+            row = conn.execute("SELECT value FROM corpus_meta WHERE key = 'ingest_state'").fetchone()
+        return row[0] if row else None
+    
+    def init_database(self):
+        """Initialize the database with required tables."""
+        conn = register_functions(sqlite3.connect(self.db_path))
+        conn.execute('PRAGMA journal_mode=WAL')
+        cursor = conn.cursor()
+        
+        # Create articles table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                article_id INTEGER,
+                url TEXT,
+                title TEXT,
+                content TEXT,
+                word_count INTEGER,
+                content_type TEXT,
+                file_path TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_z BLOB,
+                updated_at TIMESTAMP,
+                canonical_id INTEGER,
+                duplicate_score REAL,
+                UNIQUE(article_id)
+            )
+        ''')
+        
+        # Columns added since, for databases created before they existed
+        for table, column, column_type in (('articles', 'content_z', 'BLOB'), ('passages', 'content_z', 'BLOB'),
+                                           ('articles', 'updated_at', 'TIMESTAMP'),
+                                           ('articles', 'canonical_id', 'INTEGER'),
+                                           ('articles', 'duplicate_score', 'REAL')):
+            columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+            if columns and column not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+        cursor.execute(CONTENT_VIEWS['articles_text'])
+        
+        # Create search index for full-text search
+        cursor.execute(FTS_TABLE_SQL)
+        
+        # Track the source file behind each article for incremental re-ingest
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS article_sources (
+                article_id INTEGER PRIMARY KEY,
+                file_path TEXT,
+                mtime_ns INTEGER,
+                size INTEGER,
+                content_hash TEXT,
+                row_hash TEXT
+            )
+        ''')
+        
+        # Corpus generation, bumped by every write so cached search results can
+        # be invalidated, the Unix time of the last bump, and a random id that
+        # tells this database apart from a recreated one with the same generation
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO corpus_meta (key, value) VALUES ('generation', 0)")
+        cursor.execute('''
+            INSERT OR IGNORE INTO corpus_meta (key, value)
+            VALUES ('modified_at', CAST(strftime('%s', 'now') AS INTEGER)), ('instance', abs(random()))
+        ''')
+        
+        # Create triggers to maintain FTS index. Indexes from an older
+        # version are recreated with the current table options and triggers
+        # and rebuilt from the articles table; the passage index is recreated
+        # and rebuilt below. The statistics triggers are recreated after the
+        # FTS ones, as in _create_index_triggers.
+        cursor.execute("SELECT value FROM corpus_meta WHERE key = 'fts_sync'")
+        row = cursor.fetchone()
+        rebuild_passages = False
+        if not row or row[0] < FTS_SYNC_VERSION:
+            for name in list(FTS_TRIGGERS) + list(PASSAGE_FTS_TRIGGERS) + list(STATS_TRIGGERS) + OBSOLETE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP VIEW articles_text')
+            cursor.execute(CONTENT_VIEWS['articles_text'])
+            cursor.execute('DROP TABLE articles_fts')
+            cursor.execute(FTS_TABLE_SQL)
+            cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES('rebuild')")
+            cursor.execute('DROP TABLE IF EXISTS passages_fts')
+            rebuild_passages = True
+            cursor.execute("INSERT OR REPLACE INTO corpus_meta (key, value) VALUES ('fts_sync', ?)",
+                           (FTS_SYNC_VERSION,))
+        for trigger_sql in FTS_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+        
+        # Term list of the index, used for autocomplete
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_vocab USING fts5vocab(articles_fts, 'row')")
+        
+        # Passage index; split existing articles the first time it is created
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'passages'")
+        split_existing = cursor.fetchone()[0] == 0
+        for table_sql in PASSAGE_TABLES.values():
+            cursor.execute(table_sql)
+        cursor.execute(CONTENT_VIEWS['passages_text'])
+        if rebuild_passages and not split_existing:
+            cursor.execute("INSERT INTO passages_fts(passages_fts) VALUES('rebuild')")
+        for trigger_sql in list(PASSAGE_FTS_TRIGGERS.values()) + list(PASSAGE_TRIGGERS.values()):
+            cursor.execute(trigger_sql)
+        if split_existing:
+            for row_id, article_id, content in conn.execute(
+                    'SELECT id, article_id, content FROM articles_text').fetchall():
+                self._write_passages(conn, row_id, article_id, content)
+        
+        # Materialized corpus statistics, maintained by triggers; backfilled
+        # from the articles table the first time they are created, and when
+        # the triggers are from an older version
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'corpus_stats'")
+        backfill = cursor.fetchone()[0] == 0
+        cursor.execute("SELECT value FROM corpus_meta WHERE key = 'stats_sync'")
+        row = cursor.fetchone()
+        if not row or row[0] < STATS_SYNC_VERSION:
+            for name in STATS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            backfill = True
+            cursor.execute("INSERT OR REPLACE INTO corpus_meta (key, value) VALUES ('stats_sync', ?)",
+                           (STATS_SYNC_VERSION,))
+        for table_sql in STATS_TABLES.values():
+            cursor.execute(table_sql)
+        for trigger_sql in STATS_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+        if backfill:
+            self._rebuild_statistics(conn)
+        
+        # MinHash signatures and LSH buckets for near-duplicate detection
+        for table_sql in DUPLICATE_TABLES.values():
+            cursor.execute(table_sql)
+        
+        # Precomputed related articles, versioned separately from the corpus
+        # generation so rewriting them does not invalidate cached searches
+        for table_sql in SIMILARITY_TABLES.values():
+            cursor.execute(table_sql)
+        cursor.execute("INSERT OR IGNORE INTO corpus_meta (key, value) VALUES ('similarity', 0)")
+        
+        conn.commit()
+        conn.close()
+    
+    def _create_index_triggers(self, conn: sqlite3.Connection):
+        """Recreate the FTS triggers dropped for a bulk operation.
+
+        The statistics triggers are recreated after them: with the FTS
+        triggers defined last, SQLite 3.40 fails to re-prepare writes to
+        articles on other connections once they see the schema change
+        ("no such table: articles").
+        """
+        for name in STATS_TRIGGERS:
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        for trigger_sql in (list(FTS_TRIGGERS.values()) + list(PASSAGE_FTS_TRIGGERS.values())
+                            + list(STATS_TRIGGERS.values())):
+            conn.execute(trigger_sql)
+    
+    def _rebuild_statistics(self, conn: sqlite3.Connection):
+        for table in STATS_TABLES:
+            conn.execute(f'DELETE FROM {table}')
+        conn.execute('''
+            INSERT INTO corpus_stats (content_type, articles, words)
+            SELECT IFNULL(content_type, 'unknown'), COUNT(*), IFNULL(SUM(word_count), 0)
+            FROM articles WHERE canonical_id IS NULL GROUP BY 1
+        ''')
+        conn.execute(f'''
+            INSERT INTO corpus_word_histogram (bucket, articles)
+            SELECT IFNULL(word_count, 0) / {WORD_COUNT_BUCKET} * {WORD_COUNT_BUCKET}, COUNT(*)
+            FROM articles WHERE canonical_id IS NULL GROUP BY 1
+        ''')
+        conn.execute('''
+            INSERT INTO corpus_daily (day, content_type, articles)
+            SELECT date(created_at), IFNULL(content_type, 'unknown'), COUNT(*)
+            FROM articles WHERE canonical_id IS NULL GROUP BY 1, 2
+        ''')
+    
+    def rebuild_statistics(self):
+        """Recompute the materialized statistics tables from the articles table."""
+        with self.writer() as conn, conn:
+            self._rebuild_statistics(conn)
+            self._bump_generation(conn)
+    
+    def insert_article(self, article_id: int, url: str, title: str, content: str, 
+                      word_count: int, content_type: str, file_path: str):
+        """Insert or update an article in the database."""
+        self.insert_articles([{
+            'article_id': article_id, 'url': url, 'title': title, 'content': content,
+            'word_count': word_count, 'content_type': content_type, 'file_path': file_path
+        }])
+    
+    def get_sources(self) -> Dict[int, Dict]:
+        """Get the recorded source file state for every file-loaded article."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            rows = cursor.execute('SELECT * FROM article_sources').fetchall()
+        return {row['article_id']: dict(row) for row in rows}
+    
+    def record_sources(self, sources: List[Dict], removed: List[int]):
+        """Save source file state and delete articles whose files disappeared, in one transaction."""
+        with self.writer() as conn, conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO article_sources
+                (article_id, file_path, mtime_ns, size, content_hash, row_hash)
+                VALUES (:article_id, :file_path, :mtime_ns, :size, :content_hash, :row_hash)
+            ''', sources)
+            self._delete_articles(conn, removed)
+            conn.executemany('DELETE FROM article_sources WHERE article_id = ?', [(i,) for i in removed])
+            if removed:
+                self._bump_generation(conn)
+    
+    def search_articles(self, query: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Search articles using full-text search."""
+        return self.search_page(query, limit=limit, offset=offset, count=False)['results']
+    
+    def search_page(self, query: str, limit: int = 20, offset: int = 0,
+                    cursor: str = None, count: bool = True) -> Dict:
+        """Get one page of search results, the total hit count and a cursor for the next page.
+
+        Hits are ranked inside the index and only the rows on the page are
+        joined to the articles table and given a snippet. A ``cursor`` from a
+        previous page continues after its last row (keyset pagination), so
+        deep pages cost about the same as the first; without one, ``offset``
+        rows are skipped. Pages are served from the result cache while the
+        corpus generation they were computed at is current; the returned dict
+        may be shared and must not be modified.
+        """
+        after_rank, after_id = decode_cursor(cursor) if cursor else (None, None)
+        if cursor:
+            offset = 0
+        query = ' '.join(query.split())
+        key = (query, limit, offset, cursor, count)
+        
+        with self.reader() as conn:
+            generation = None
+            if self.search_cache:
+                generation = self._read_generation(conn)
+                cached = self.search_cache.get(key, generation)
+                if cached is not None:
+                    return cached
+            
+            if query:
+                # Full-text search: rank articles, then find the best passages
+                # of the articles on this page only
+                rows = conn.execute('''
+                    SELECT a.article_id, a.url, a.title, a.word_count, a.content_type,
+                           NULL as snippet, page.score, page.rowid
+                    FROM (
+                        SELECT rowid, score FROM (
+                            SELECT rowid, bm25(articles_fts, 0.0, :title_weight, :content_weight) AS score
+                            FROM articles_fts
+                            WHERE articles_fts MATCH :query
+                        )
+                        WHERE :after_id IS NULL OR score > :after_rank
+                              OR (score = :after_rank AND rowid > :after_id)
+                        ORDER BY score, rowid
+                        LIMIT :limit OFFSET :offset
+                    ) AS page
+                    JOIN articles a ON a.id = page.rowid
+                    ORDER BY page.score, page.rowid
+                ''', {'query': query, 'after_rank': after_rank, 'after_id': after_id,
+                      'limit': limit + 1, 'offset': offset, 'title_weight': self.title_weight,
+                      'content_weight': self.content_weight}).fetchall()
+                passages = {row[7]: self._best_passages(conn, query, row[7]) for row in rows[:limit]}
+                total = conn.execute(
+                    'SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH ?', (query,)
+                ).fetchone()[0] if count else None
+            else:
+                # Return all articles if no query, snippeted from their
+                # first passage so compressed articles are not inflated whole
+                rows = conn.execute(f'''
+                    SELECT a.article_id, a.url, a.title, a.word_count, a.content_type,
+                           substr(IFNULL(p.content, IFNULL(inflate(p.content_z), '')), 1, 200) || '...' as snippet,
+                           NULL, a.article_id
+                    FROM articles a
+                    LEFT JOIN passages p ON p.id = a.id << {PASSAGE_ID_BITS}
+                    WHERE a.canonical_id IS NULL AND (:after_id IS NULL OR a.article_id > :after_id)
+                    ORDER BY a.article_id
+                    LIMIT :limit OFFSET :offset
+                ''', {'after_id': after_id, 'limit': limit + 1, 'offset': offset}).fetchall()
+                total = conn.execute(
+                    'SELECT COUNT(*) FROM articles WHERE canonical_id IS NULL'
+                ).fetchone()[0] if count else None
+                passages = {}
+        
+        # The row past the page tells whether another page follows, also for
+        # cursor pages, whose position in the full result list is unknown
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = []
+        for row in rows:
+            best = passages.get(row[7], [])
+            results.append({
+                'article_id': row[0],
+                'url': row[1],
+                'title': row[2],
+                'word_count': row[3],
+                'content_type': row[4],
+                'snippet': best[0]['snippet'] if best else row[5],
+                'passage_no': best[0]['passage_no'] if best else None,
+                'passages': best
+            })
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1][6], rows[-1][7])
+        
+        page = {
+            'results': results,
+            'total': total,
+            'offset': offset,
+            'next_cursor': next_cursor
+        }
+        if self.search_cache:
+            self.search_cache.put(key, generation, page)
+        return page
+    
+    def _best_passages(self, conn: sqlite3.Connection, query: str, row_id: int,
+                       limit: int = PASSAGES_PER_RESULT) -> List[Dict]:
+        """Rank one article's passages against the query and snippet the best ones.
+
+        Falls back to a snippet of the whole article when no single passage
+        matches, e.g. for an AND query whose terms are far apart or a query
+        on the title column.
+        """
+        first, last = passage_range(row_id)
+        try:
+            rows = conn.execute('''
+                SELECT best.rowid - :first, snippet(passages_fts, 0, '<mark>', '</mark>', '...', 30)
+                FROM (
+                    SELECT rowid, bm25(passages_fts) AS score FROM passages_fts
+                    WHERE passages_fts MATCH :query AND rowid BETWEEN :first AND :last
+                    ORDER BY score
+                    LIMIT :limit
+                ) AS best
+                CROSS JOIN passages_fts ON passages_fts.rowid = best.rowid
+                WHERE passages_fts MATCH :query
+                ORDER BY best.score
+            ''', {'query': query, 'first': first, 'last': last, 'limit': limit}).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        if rows:
+            return [{'passage_no': passage_no, 'snippet': snippet} for passage_no, snippet in rows]
+        
+        row = conn.execute('''
+            SELECT snippet(articles_fts, 2, '<mark>', '</mark>', '...', 30)
+            FROM articles_fts WHERE articles_fts MATCH ? AND rowid = ?
+        ''', (query, row_id)).fetchone()
+        return [{'passage_no': None, 'snippet': row[0]}] if row else []
+    
+    def get_passages(self, article_id: int) -> List[Dict]:
+        """Get an article's passages in order."""
+        with self.reader() as conn:
+            rows = conn.execute(
+                'SELECT passage_no, IFNULL(content, inflate(content_z)) FROM passages '
+                'WHERE article_id = ? ORDER BY id', (article_id,)
+            ).fetchall()
+        return [{'passage_no': passage_no, 'content': content} for passage_no, content in rows]
+    
+    def suggest_terms(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Complete a term prefix from the index vocabulary, terms found in the most articles first."""
+        prefix = prefix.lower()
+        if len(prefix) < MIN_SUGGEST_PREFIX:
+            return []
+        key = ('suggest', prefix, limit)
+        
+        with self.reader() as conn:
+            generation = None
+            if self.search_cache:
+                generation = self._read_generation(conn)
+                cached = self.search_cache.get(key, generation)
+                if cached is not None:
+                    return cached
+            
+            rows = conn.execute('''
+                SELECT term, doc FROM articles_vocab
+                WHERE term >= ? AND term < ?
+                ORDER BY doc DESC, term
+                LIMIT ?
+            ''', (prefix, prefix + '\uffff', limit)).fetchall()
+        
+        suggestions = [{'term': term, 'documents': documents} for term, documents in rows]
+        if self.search_cache:
+            self.search_cache.put(key, generation, suggestions)
+        return suggestions
+    
+    def get_article(self, article_id: int) -> Dict:
+        """Get a specific article by ID."""
+        with self.reader() as conn:
+            row = conn.execute('''
+                SELECT article_id, url, title, IFNULL(content, inflate(content_z)),
+                       word_count, content_type, file_path, IFNULL(updated_at, created_at), canonical_id
+                FROM articles
+                WHERE article_id = ?
+            ''', (article_id,)).fetchone()
+        
+        if row:
+            return {
+                'article_id': row[0],
+                'url': row[1],
+                'title': row[2],
+                'content': row[3],
+                'word_count': row[4],
+                'content_type': row[5],
+                'file_path': row[6],
+                'updated_at': row[7],
+                'canonical_id': row[8]
+            }
+        return None
+    
+    def get_similar(self, article_id: int, limit: int = 10) -> List[Dict]:
+        """Get the precomputed most similar articles to an article, most similar first."""
+        with self.reader() as conn:
+            rows = conn.execute('''
+                SELECT n.neighbor_id, n.score, a.title, a.url, a.word_count, a.content_type
+                FROM article_neighbors n JOIN articles a ON a.article_id = n.neighbor_id
+                WHERE n.article_id = ?
+                ORDER BY n.rank
+                LIMIT ?
+            ''', (article_id, limit)).fetchall()
+        
+        return [{
+            'article_id': row[0],
+            'score': row[1],
+            'title': row[2],
+            'url': row[3],
+            'word_count': row[4],
+            'content_type': row[5]
+        } for row in rows]
+    
+    def get_article_versions(self) -> Dict[int, str]:
+        """Map the article_id of every article that is not a near-duplicate to the time it was last written."""
+        with self.reader() as conn:
+            return dict(conn.execute(
+                'SELECT article_id, IFNULL(updated_at, created_at) FROM articles WHERE canonical_id IS NULL'))
+    
+    def iter_article_texts(self, article_ids: Iterable[int], batch_size: int = 500) -> Iterator[Tuple[int, str, str]]:
+        """Yield (article_id, title, text) for the given articles in batches; missing ones are skipped."""
+        article_ids = list(article_ids)
+        for start in range(0, len(article_ids), batch_size):
+            batch = article_ids[start:start + batch_size]
+            with self.reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT article_id, title, IFNULL(content, inflate(content_z)) FROM articles
+                    WHERE article_id IN ({', '.join('?' * len(batch))})
+                    ORDER BY article_id
+                ''', batch).fetchall()
+            yield from rows
+    
+    def get_neighbor_lists(self) -> Dict[int, List[Tuple[int, float]]]:
+        """Get every stored related-article list as (neighbor_id, score) pairs, most similar first."""
+        neighbors = {}
+        with self.reader() as conn:
+            for article_id, neighbor_id, score in conn.execute(
+                    'SELECT article_id, neighbor_id, score FROM article_neighbors ORDER BY article_id, rank'):
+                neighbors.setdefault(article_id, []).append((neighbor_id, score))
+        return neighbors
+    
+    def get_similarity_model(self, name: str) -> bytes:
+        """Get a serialized similarity model, or None if it was never built."""
+        with self.reader() as conn:
+            row = conn.execute('SELECT data FROM similarity_model WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+    
+    def save_similarity(self, name: str, model: bytes, neighbors: Dict[int, List[Tuple[int, float]]],
+                        removed: Iterable[int] = (), replace: bool = False):
+        """Store a similarity model with new related-article lists, in one transaction.
+
+        The given lists replace the stored lists of those articles, lists of
+        ``removed`` articles are deleted, and ``replace`` deletes all others.
+        """
+        with self.writer() as conn, conn:
+            if replace:
+                conn.execute('DELETE FROM article_neighbors')
+            else:
+                conn.executemany('DELETE FROM article_neighbors WHERE article_id = ?',
+                                 [(article_id,) for article_id in list(neighbors) + list(removed)])
+            conn.executemany(
+                'INSERT INTO article_neighbors (article_id, rank, neighbor_id, score) VALUES (?, ?, ?, ?)',
+                [(article_id, rank, neighbor_id, score)
+                 for article_id, pairs in neighbors.items()
+                 for rank, (neighbor_id, score) in enumerate(pairs)]
+            )
+            conn.execute('INSERT OR REPLACE INTO similarity_model (name, data) VALUES (?, ?)', (name, model))
+            conn.execute("UPDATE corpus_meta SET value = value + 1 WHERE key = 'similarity'")
+    
+    def get_duplicate_clusters(self, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Get clusters of near-duplicate articles, largest first: the canonical article and its duplicates."""
+        with self.reader() as conn:
+            rows = conn.execute('''
+                SELECT c.article_id, c.title, c.url, c.content_type,
+                       d.article_id, d.title, d.url, d.content_type, d.duplicate_score
+                FROM (
+                    SELECT canonical_id, COUNT(*) AS size FROM articles
+                    WHERE canonical_id IS NOT NULL
+                    GROUP BY canonical_id
+                    ORDER BY size DESC, canonical_id
+                    LIMIT ? OFFSET ?
+                ) AS cluster
+                JOIN articles c ON c.article_id = cluster.canonical_id
+                JOIN articles d ON d.canonical_id = cluster.canonical_id
+                ORDER BY cluster.size DESC, cluster.canonical_id, d.article_id
+            ''', (limit, offset)).fetchall()
+        
+        clusters = {}
+        for row in rows:
+            cluster = clusters.setdefault(row[0], {
+                'canonical': {'article_id': row[0], 'title': row[1], 'url': row[2], 'content_type': row[3]},
+                'duplicates': []
+            })
+            cluster['duplicates'].append({'article_id': row[4], 'title': row[5], 'url': row[6],
+                                          'content_type': row[7], 'similarity': row[8]})
+        return list(clusters.values())
+    
+    def deduplicate_articles(self, batch_size: int = 500) -> Dict:
+        """Sign the articles stored without a MinHash signature and collapse the near-duplicates among them.
+
+        Articles are taken in article_id order, so the lowest-numbered copy
+        stays canonical; the duplicates leave both full-text indexes.
+        """
+        if minhash is None:
+            raise ImportError("near-duplicate detection needs numpy")
+        start = time.perf_counter()
+        report = {'signed': 0, 'duplicates': 0}
+        last_id = None
+        while True:
+            with self.writer() as conn, conn:
+                rows = conn.execute('''
+                    SELECT a.id, a.article_id, IFNULL(a.content, inflate(a.content_z)) FROM articles a
+                    LEFT JOIN article_minhash m ON m.article_id = a.article_id
+                    WHERE m.article_id IS NULL AND a.canonical_id IS NULL AND (? IS NULL OR a.article_id > ?)
+                    ORDER BY a.article_id
+                    LIMIT ?
+                ''', (last_id, last_id, batch_size)).fetchall()
+                for row_id, article_id, text in rows:
+                    signature = minhash(text or '')
+                    if signature is None:
+                        continue
+                    canonical_id, score = self._find_canonical(conn, article_id, signature)
+                    if canonical_id is not None:
+                        conn.execute('UPDATE articles SET canonical_id = ?, duplicate_score = ? WHERE id = ?',
+                                     (canonical_id, score, row_id))
+                        conn.execute('DELETE FROM passages WHERE id BETWEEN ? AND ?', passage_range(row_id))
+                        report['duplicates'] += 1
+                    self._record_signature(conn, article_id, signature, canonical_id)
+                    report['signed'] += 1
+                if report['duplicates']:
+                    self._bump_generation(conn)
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][1]
+        
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        return report
+    
+    def get_statistics(self) -> Dict:
+        """Get database statistics.
+
+        Read from the trigger-maintained statistics tables and kept in memory
+        until the corpus generation changes, so repeated calls cost one
+        generation lookup.
+        """
+        with self.reader() as conn:
+            generation = self._read_generation(conn)
+            cached = self._statistics
+            if cached and cached[0] == generation:
+                return cached[1]
+            
+            content_rows = conn.execute(
+                'SELECT content_type, articles, words FROM corpus_stats WHERE articles > 0 ORDER BY content_type'
+            ).fetchall()
+            histogram_rows = conn.execute(
+                'SELECT bucket, articles FROM corpus_word_histogram WHERE articles > 0 ORDER BY bucket'
+            ).fetchall()
+            daily_rows = conn.execute(
+                'SELECT day, content_type, articles FROM corpus_daily WHERE articles > 0 ORDER BY day, content_type'
+            ).fetchall()
+        
+        total_articles = sum(row[1] for row in content_rows)
+        total_words = sum(row[2] for row in content_rows)
+        
+        articles_by_day = {}
+        for day, content_type, articles in daily_rows:
+            entry = articles_by_day.setdefault(day, {'day': day, 'articles': 0, 'content_types': {}})
+            entry['articles'] += articles
+            entry['content_types'][content_type] = articles
+        
+        statistics = {
+            'total_articles': total_articles,
+            'total_words': total_words,
+            'average_words': round(total_words / total_articles, 0) if total_articles else 0,
+            'content_types': {row[0]: row[1] for row in content_rows},
+            'words_by_content_type': {row[0]: row[2] for row in content_rows},
+            'word_count_histogram': [
+                {'min_words': bucket, 'max_words': bucket + WORD_COUNT_BUCKET - 1, 'articles': articles}
+                for bucket, articles in histogram_rows
+            ],
+            'articles_by_day': list(articles_by_day.values())
+        }
+        self._statistics = (generation, statistics)
+        return statistics
+
+    def insert_articles(self, articles: List[Dict]) -> int:
+        """Insert or update a batch of articles in a single transaction."""
+        if not articles:
+            return 0
+        
+        with self.writer() as conn, conn:
+            self._upsert_articles(conn, articles)
+            self._bump_generation(conn)
+        
+        return len(articles)
+    
+    def _stored_text(self, text: str) -> Tuple[str, bytes]:
+        """The (content, content_z) pair to store for ``text``."""
+        return (None, compress_text(text)) if self.compress else (text, None)
+    
+    def _upsert_articles(self, conn: sqlite3.Connection, articles: List[Dict]) -> int:
+        """Upsert articles and re-split the ones that were written into passages.
+
+        Near-duplicates get no passages; see _find_canonical. The duplicates
+        of an article whose text changed are matched again, since they may
+        no longer resemble it.
+        """
+        written = 0
+        for article in articles:
+            content, content_z = self._stored_text(article['content'])
+            row = dict(article, content=content, content_z=content_z, canonical_id=None, duplicate_score=None)
+            signature = minhash(article['content']) if self.deduplicate else None
+            if signature is not None:
+                row['canonical_id'], row['duplicate_score'] = self._find_canonical(
+                    conn, article['article_id'], signature)
+            duplicates = []
+            for row_id, article_id in conn.execute(UPSERT_ARTICLE_SQL, row).fetchall():
+                conn.execute('DELETE FROM passages WHERE id BETWEEN ? AND ?', passage_range(row_id))
+                if row['canonical_id'] is None:
+                    self._write_passages(conn, row_id, article_id, article['content'])
+                duplicates = [dup_id for dup_id, in conn.execute(
+                    'SELECT article_id FROM articles WHERE canonical_id = ? ORDER BY article_id', (article_id,))]
+                written += 1
+            if signature is not None:
+                self._record_signature(conn, article['article_id'], signature, row['canonical_id'])
+                self._recheck_duplicates(conn, duplicates)
+        return written
+    
+    def _find_canonical(self, conn: sqlite3.Connection, article_id: int, signature) -> Tuple[int, float]:
+        """The (article_id, estimated similarity) of the stored article this one duplicates, or (None, None).
+
+        Candidates are the articles sharing an LSH band bucket with the
+        signature; the most similar one at or above DUPLICATE_THRESHOLD wins,
+        the lowest article_id on ties.
+        """
+        buckets = band_buckets(signature)
+        # Joined from the probe rows so each band is one seek in minhash_buckets_lookup
+        candidates = conn.execute(f'''
+            SELECT DISTINCT m.article_id, m.signature
+            FROM (VALUES {', '.join(['(?, ?)'] * len(buckets))}) AS probe
+            JOIN minhash_buckets b ON b.band = probe.column1 AND b.bucket = probe.column2
+            JOIN article_minhash m ON m.article_id = b.article_id
+            WHERE m.article_id != ?
+            ORDER BY m.article_id
+        ''', [value for pair in buckets for value in pair] + [article_id]).fetchall()
+        best, best_score = None, DUPLICATE_THRESHOLD
+        for candidate_id, data in candidates:
+            score = similarity(signature, signature_from_bytes(data))
+            if score > best_score or (score == best_score and best is None):
+                best, best_score = candidate_id, score
+        return (best, round(best_score, 4)) if best is not None else (None, None)
+    
+    def _record_signature(self, conn: sqlite3.Connection, article_id: int, signature, canonical_id: int):
+        """Store an article's signature; only articles that are not duplicates get LSH buckets.
+
+        Duplicates of an article that has itself become a duplicate are
+        moved to its canonical article.
+        """
+        conn.execute('INSERT OR REPLACE INTO article_minhash (article_id, signature) VALUES (?, ?)',
+                     (article_id, signature_to_bytes(signature)))
+        conn.execute('DELETE FROM minhash_buckets WHERE article_id = ?', (article_id,))
+        if canonical_id is None:
+            conn.executemany('INSERT INTO minhash_buckets (article_id, band, bucket) VALUES (?, ?, ?)',
+                             [(article_id, band, bucket) for band, bucket in band_buckets(signature)])
+        else:
+            conn.execute('UPDATE articles SET canonical_id = ? WHERE canonical_id = ?', (canonical_id, article_id))
+    
+    def _recheck_duplicates(self, conn: sqlite3.Connection, article_ids: List[int]):
+        """Match the former duplicates of an article whose text changed against the stored articles again.
+
+        Taken in article_id order, so when several no longer match anything
+        the lowest-numbered one is promoted first and the rest can collapse
+        onto it.
+        """
+        for article_id in article_ids:
+            data = conn.execute('SELECT signature FROM article_minhash WHERE article_id = ?',
+                                (article_id,)).fetchone()
+            canonical_id, score = (self._find_canonical(conn, article_id, signature_from_bytes(data[0]))
+                                   if data else (None, None))
+            if canonical_id is None:
+                self._promote_article(conn, article_id)
+            else:
+                conn.execute('UPDATE articles SET canonical_id = ?, duplicate_score = ? WHERE article_id = ?',
+                             (canonical_id, score, article_id))
+    
+    def _promote_article(self, conn: sqlite3.Connection, article_id: int):
+        """Make a duplicate canonical: index it, write its passages and give it LSH buckets."""
+        row_id, text = conn.execute('''
+            UPDATE articles SET canonical_id = NULL, duplicate_score = NULL WHERE article_id = ?
+            RETURNING id, IFNULL(content, inflate(content_z))
+        ''', (article_id,)).fetchone()
+        self._write_passages(conn, row_id, article_id, text)
+        data = conn.execute('SELECT signature FROM article_minhash WHERE article_id = ?', (article_id,)).fetchone()
+        if data:
+            self._record_signature(conn, article_id, signature_from_bytes(data[0]), None)
+    
+    def _delete_articles(self, conn: sqlite3.Connection, article_ids: Iterable[int]):
+        """Delete articles with their signatures. The lowest-numbered duplicate of a
+        deleted canonical article becomes canonical in its place and is indexed."""
+        for article_id in article_ids:
+            conn.execute('DELETE FROM articles WHERE article_id = ?', (article_id,))
+            conn.execute('DELETE FROM article_minhash WHERE article_id = ?', (article_id,))
+            conn.execute('DELETE FROM minhash_buckets WHERE article_id = ?', (article_id,))
+            promoted = conn.execute('SELECT MIN(article_id) FROM articles WHERE canonical_id = ?',
+                                    (article_id,)).fetchone()[0]
+            if promoted is None:
+                continue
+            conn.execute('UPDATE articles SET canonical_id = ? WHERE canonical_id = ?', (promoted, article_id))
+            self._promote_article(conn, promoted)
+    
+    def _write_passages(self, conn: sqlite3.Connection, row_id: int, article_id: int, content: str):
+        first, _ = passage_range(row_id)
+        conn.executemany(
+            'INSERT INTO passages (id, article_id, passage_no, content, content_z) VALUES (?, ?, ?, ?, ?)',
+            [(first + n, article_id, n) + self._stored_text(passage)
+             for n, passage in enumerate(split_passages(content))]
+        )
+
+    def bulk_insert_articles(self, batches: Iterable[List[Dict]]) -> int:
+        """Load many articles on one connection in a single transaction.
+
+        The per-row FTS triggers are dropped for the duration of the load and
+        the article and passage indexes are rebuilt once at the end, so each
+        row costs plain inserts instead of inserts plus index updates. synchronous=NORMAL
+        on the WAL database avoids an fsync per statement.
+        """
+        loaded = 0
+        # Hold the writer slot so pooled writes wait instead of hitting a locked database
+        with self.writer():
+            conn = register_functions(sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT))
+            try:
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute('PRAGMA temp_store=MEMORY')
+                conn.execute('PRAGMA cache_size=-65536')
+            
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    for name in list(FTS_TRIGGERS) + list(PASSAGE_FTS_TRIGGERS):
+                        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+                
+                    for batch in batches:
+                        self._upsert_articles(conn, batch)
+                        loaded += len(batch)
+                
+                    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('rebuild')")
+                    conn.execute("INSERT INTO passages_fts(passages_fts) VALUES('rebuild')")
+                    self._create_index_triggers(conn)
+                    self._bump_generation(conn)
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            finally:
+                conn.close()
+        
+        return loaded
+    
+    def get_index_info(self, conn: sqlite3.Connection = None) -> Dict:
+        """Report the FTS index's size, segment layout and row counts."""
+        if conn is None:
+            with self.reader() as conn:
+                return self.get_index_info(conn)
+        
+        index_bytes, blocks = conn.execute(
+            'SELECT IFNULL(SUM(length(block)), 0), COUNT(*) FROM articles_fts_data').fetchone()
+        structure = conn.execute('SELECT block FROM articles_fts_data WHERE id = 10').fetchone()
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        info = {
+            'index_bytes': index_bytes,
+            'index_blocks': blocks,
+            'indexed_rows': conn.execute('SELECT COUNT(*) FROM articles_fts_docsize').fetchone()[0],
+            'articles': conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0],
+            'passage_index_bytes': conn.execute(
+                'SELECT IFNULL(SUM(length(block)), 0) FROM passages_fts_data').fetchone()[0],
+            'passages': conn.execute('SELECT COUNT(*) FROM passages').fetchone()[0],
+            'text_bytes': sum(conn.execute(f'''
+                SELECT IFNULL(SUM(IFNULL(length(CAST(content AS BLOB)), 0) + IFNULL(length(content_z), 0)), 0)
+                FROM {table}''').fetchone()[0] for table in ('articles', 'passages')),
+            'compressed_articles': conn.execute(
+                'SELECT COUNT(*) FROM articles WHERE content_z IS NOT NULL').fetchone()[0],
+            'database_bytes': page_count * page_size
+        }
+        # Near-duplicates and an estimate of the index they would take: both
+        # indexes grow about linearly with the words indexed
+        duplicates, duplicate_words, indexed_words = conn.execute('''
+            SELECT COUNT(canonical_id), IFNULL(SUM(CASE WHEN canonical_id IS NOT NULL THEN word_count END), 0),
+                   IFNULL(SUM(CASE WHEN canonical_id IS NULL THEN word_count END), 0)
+            FROM articles
+        ''').fetchone()
+        info['duplicates'] = duplicates
+        info['duplicate_index_bytes_saved'] = round(
+            (index_bytes + info['passage_index_bytes']) * duplicate_words / indexed_words) if indexed_words else 0
+        info.update(parse_fts_structure(structure[0] if structure else b''))
+        return info
+    
+    def maintain_index(self, rebuild: bool = False, optimize: bool = True, automerge: int = None,
+                       crisismerge: int = None, usermerge: int = None) -> Dict:
+        """Check and compact the FTS indexes, returning index info before and after.
+
+        Runs FTS5 'integrity-check' on the article and passage indexes against
+        their content tables, applies any merge settings given to the article
+        index (they persist in the index), rebuilds both if asked to or if a
+        check failed, then runs 'optimize' to merge each into one segment.
+        """
+        start = time.perf_counter()
+        report = {'steps': []}
+        
+        with self.writer():
+            conn = register_functions(sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT))
+            try:
+                report['before'] = self.get_index_info(conn)
+                
+                try:
+                    for index in ('articles_fts', 'passages_fts'):
+                        conn.execute(f"INSERT INTO {index}({index}, rank) VALUES('integrity-check', 1)")
+                    report['integrity'] = 'ok'
+                except sqlite3.DatabaseError as e:
+                    report['integrity'] = f"failed: {e}"
+                    rebuild = True
+                report['steps'].append('integrity-check')
+                
+                for command, value in (('automerge', automerge), ('crisismerge', crisismerge),
+                                       ('usermerge', usermerge)):
+                    if value is not None:
+                        conn.execute("INSERT INTO articles_fts(articles_fts, rank) VALUES(?, ?)", (command, value))
+                        report['steps'].append(f"{command}={value}")
+                
+                if rebuild:
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('rebuild')")
+                        conn.execute("INSERT INTO passages_fts(passages_fts) VALUES('rebuild')")
+                        self._bump_generation(conn)
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        conn.execute('ROLLBACK')
+                        raise
+                    report['steps'].append('rebuild')
+                
+                if optimize:
+                    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('optimize')")
+                    conn.execute("INSERT INTO passages_fts(passages_fts) VALUES('optimize')")
+                    report['steps'].append('optimize')
+                
+                report['after'] = self.get_index_info(conn)
+            finally:
+                conn.close()
+        
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        return report
+    
+    def convert_storage(self, vacuum: bool = True, batch_size: int = 500) -> Dict:
+        """Rewrite stored article and passage text into this manager's storage, compressed or plain.
+
+        The text itself does not change, so the FTS triggers are dropped while
+        rows are rewritten and both indexes stay as they are. VACUUM then
+        gives the freed pages back to the filesystem.
+        """
+        start = time.perf_counter()
+        stale = 'content IS NOT NULL' if self.compress else 'content_z IS NOT NULL'
+        report = {'converted': {}}
+        
+        with self.writer():
+            conn = register_functions(sqlite3.connect(self.db_path, isolation_level=None, timeout=BUSY_TIMEOUT))
+            try:
+                report['before_bytes'] = self.get_index_info(conn)['database_bytes']
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    for name in list(FTS_TRIGGERS) + list(PASSAGE_FTS_TRIGGERS):
+                        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+                    for table in ('articles', 'passages'):
+                        converted, last_id = 0, -1
+                        while True:
+                            rows = conn.execute(f'''
+                                SELECT id, IFNULL(content, inflate(content_z)) FROM {table}
+                                WHERE id > ? AND {stale} ORDER BY id LIMIT ?
+                            ''', (last_id, batch_size)).fetchall()
+                            if not rows:
+                                break
+                            conn.executemany(f'UPDATE {table} SET content = ?, content_z = ? WHERE id = ?',
+                                             [self._stored_text(text) + (row_id,) for row_id, text in rows])
+                            converted += len(rows)
+                            last_id = rows[-1][0]
+                        report['converted'][table] = converted
+                    self._create_index_triggers(conn)
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                if vacuum:
+                    conn.execute('VACUUM')
+                report['after_bytes'] = self.get_index_info(conn)['database_bytes']
+            finally:
+                conn.close()
+        
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        return report
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read an SQLite varint at ``pos``; return the value and the position after it."""
+    value = 0
+    for i in range(8):
+        byte = data[pos + i]
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos + i + 1
+    return (value << 8) | data[pos + 8], pos + 9
+
+
+def parse_fts_structure(data: bytes) -> Dict:
+    """Decode the level and segment counts from an FTS5 structure record."""
+    if not data:
+        return {'levels': 0, 'segments': 0, 'segments_per_level': []}
+    pos = 4  # configuration cookie
+    v2 = data[pos:pos + 4] == b'\xff\x00\x00\x01'
+    if v2:
+        pos += 4
+    levels, pos = _read_varint(data, pos)
+    segments, pos = _read_varint(data, pos)
+    _, pos = _read_varint(data, pos)  # write counter
+    
+    per_level = []
+    for _ in range(levels):
+        _, pos = _read_varint(data, pos)  # segments being merged
+        count, pos = _read_varint(data, pos)
+        per_level.append(count)
+        for _ in range(count * (8 if v2 else 3)):
+            _, pos = _read_varint(data, pos)
+    return {'levels': levels, 'segments': segments, 'segments_per_level': per_level}
+
+
+def encode_cursor(rank: float, row_id: int) -> str:
+    """Encode the position of the last row on a page as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps([rank, row_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed."""
+    try:
+        rank, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(row_id, int) or not (rank is None or isinstance(rank, (int, float))):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return rank, row_id
+
+
+def extract_title_from_content(content: str, url: str) -> str:
+    """Extract a title from the article content or URL."""
+    lines = content.split('\n')
+    
+    # Look for the first substantial line as title
+    for line in lines:
+        line = line.strip()
+        if len(line) > 20 and len(line) < 200:
+            # Clean up common artifacts
+            line = re.sub(r'^[^\w]*', '', line)  # Remove leading non-word chars
+            line = re.sub(r'[^\w]*$', '', line)  # Remove trailing non-word chars
+            if line:
+                return line
+    
+    # Fallback: extract from URL
+    if 'PMC' in url:
+        pmc_match = re.search(r'PMC\d+', url)
+        if pmc_match:
+            return f"Biology Research Article - {pmc_match.group()}"
+    
+    return "Biology Research Article"
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for the Biology Research Search Engine.
+
+Articles are reduced to MinHash signatures over word shingles of their
+cleaned text. Two signatures agree in each position with probability equal
+to the Jaccard similarity of the two shingle sets, so the fraction of equal
+positions estimates it. For lookups the signature is cut into LSH bands:
+articles sharing any band bucket are candidates, which finds articles above
+about DUPLICATE_THRESHOLD similarity with a few index lookups instead of a
+comparison against the whole corpus.
+
+The database layer stores the signatures and band buckets and uses them
+during ingest; see DatabaseManager(deduplicate=True).
+"""
+
+import hashlib
+import re
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+# Consecutive words per shingle
+SHINGLE_WORDS = 3
+# Signature length, split into LSH_BANDS bands of NUM_PERMUTATIONS // LSH_BANDS rows.
+# 32 bands of 4 rows make a candidate of nearly every pair at 0.7 similarity
+# and of ~5% of pairs at 0.2.
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+# Estimated Jaccard similarity from which an article is a duplicate. Distinct
+# scraped articles stay below 0.4; a copy missing 3% of its words scores ~0.85.
+DUPLICATE_THRESHOLD = 0.7
+# Shingles hashed per block, bounding memory on very long articles
+SHINGLE_BLOCK = 8192
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _constants(label: str) -> np.ndarray:
+    """Fixed 64-bit constants derived from ``label``; stored signatures depend on them never changing."""
+    return np.array([int.from_bytes(hashlib.blake2b(f"{label}-{i}".encode(), digest_size=8).digest(), 'little')
+                     for i in range(NUM_PERMUTATIONS)], dtype=np.uint64)
+
+
+# Each permutation is x -> (x ^ seed) * multiplier mod 2**64, a bijection for odd multipliers
+SEEDS = _constants('minhash-seed')
+MULTIPLIERS = _constants('minhash-multiplier') | np.uint64(1)
+SHINGLE_PRIME = np.uint64(1099511628211)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """64-bit hashes of the distinct SHINGLE_WORDS-word shingles of ``text``."""
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words),
+                              dtype=np.uint64, count=len(words))
+    width = min(SHINGLE_WORDS, len(words))
+    shingles = np.zeros(len(words) - width + 1, dtype=np.uint64)
+    for offset in range(width):
+        shingles = shingles * SHINGLE_PRIME + word_hashes[offset:offset + len(shingles)]
+    return np.unique(shingles)
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of ``text``: the minimum of each permutation over its shingle hashes.
+
+    None for text without words, which is never anyone's duplicate.
+    """
+    shingles = shingle_hashes(text)
+    if not len(shingles):
+        return None
+    signature = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(shingles), SHINGLE_BLOCK):
+        block = shingles[start:start + SHINGLE_BLOCK]
+        permuted = (block[None, :] ^ SEEDS[:, None]) * MULTIPLIERS[:, None]
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+
+def band_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs of a signature; bucket is a signed 64-bit hash of the band's rows."""
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [(band, int.from_bytes(hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(),
+                                                  digest_size=8).digest(), 'little', signed=True))
+            for band in range(LSH_BANDS)]
+
+
+def similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(left == right))
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u8').tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<u8').astype(np.uint64)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Maintenance for the search database's full-text index.
+
+Runs FTS5 integrity checks on the article and passage indexes, optionally tunes
+the merge settings and rebuilds the index, then optimizes it into a single
+segment. Prints index size, segment counts and indexed rows before and after.
+--compress and --decompress first convert the stored article text and vacuum.
+--dedupe first collapses near-duplicates among articles stored without a
+MinHash signature.
+
+Usage: python maintain_index.py [--db biology_articles.db] [--rebuild] [--automerge N] [--compress]
+"""
+
+import argparse
+import json
+import os
+
+from database import DatabaseManager
+
+
+def format_info(info: dict) -> str:
+    return (f"{info['index_bytes'] / (1024 * 1024):8.1f} MB index, "
+            f"{info['segments']:3d} segments in {info['levels']} levels, "
+            f"{info['indexed_rows']} indexed rows for {info['articles']} articles, "
+            f"{info['passage_index_bytes'] / (1024 * 1024):.1f} MB passage index for {info['passages']} passages, "
+            f"{info['text_bytes'] / (1024 * 1024):.1f} MB stored text "
+            f"({info['compressed_articles']} articles compressed), "
+            f"{info['duplicates']} near-duplicates not indexed "
+            f"(~{info['duplicate_index_bytes_saved'] / (1024 * 1024):.1f} MB saved), "
+            f"{info['database_bytes'] / (1024 * 1024):.1f} MB database")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check, rebuild and optimize the FTS5 search index.")
+    parser.add_argument('--db', default='biology_articles.db', help="SQLite database file")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index from the articles table")
+    parser.add_argument('--no-optimize', action='store_true', help="Skip merging the index into one segment")
+    parser.add_argument('--automerge', type=int, help="FTS5 automerge setting (0 disables, 2-16)")
+    parser.add_argument('--crisismerge', type=int, help="FTS5 crisismerge setting")
+    parser.add_argument('--usermerge', type=int, help="FTS5 usermerge setting (2-16)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Collapse near-duplicates among articles not yet checked for them")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument('--compress', action='store_true', help="Store article and passage text compressed")
+    storage.add_argument('--decompress', action='store_true', help="Store article and passage text as plain text")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+
+    db = DatabaseManager(args.db, search_cache_size=0, compress=args.compress)
+    conversion = db.convert_storage() if args.compress or args.decompress else None
+    deduplication = db.deduplicate_articles() if args.dedupe else None
+    report = db.maintain_index(rebuild=args.rebuild, optimize=not args.no_optimize,
+                               automerge=args.automerge, crisismerge=args.crisismerge,
+                               usermerge=args.usermerge)
+    db.close()
+    if conversion:
+        report['conversion'] = conversion
+    if deduplication:
+        report['deduplication'] = deduplication
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        if conversion:
+            print(f"Storage:   converted {conversion['converted']['articles']} articles and "
+                  f"{conversion['converted']['passages']} passages, "
+                  f"{conversion['before_bytes'] / (1024 * 1024):.1f} MB -> "
+                  f"{conversion['after_bytes'] / (1024 * 1024):.1f} MB ({conversion['seconds']:.2f}s)")
+        if deduplication:
+            print(f"Dedupe:    signed {deduplication['signed']} articles, "
+                  f"{deduplication['duplicates']} near-duplicates collapsed ({deduplication['seconds']:.2f}s)")
+        print(f"Integrity: {report['integrity']}")
+        print(f"Steps:     {', '.join(report['steps'])} ({report['seconds']:.2f}s)")
+        print(f"Before:    {format_info(report['before'])}")
+        print(f"After:     {format_info(report['after'])}")
+
+    return 0 if report['integrity'] == 'ok' or 'rebuild' in report['steps'] else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for the scraper and the web app.
+
+Histograms and counters live in a registry and are rendered in the
+Prometheus text exposition format, which the web app serves at /metrics and
+the scraper can write to a file for node_exporter's textfile collector.
+Every metric is per process: each worker of a prefork server reports its
+own series.
+
+A disabled registry makes ``observe`` and ``inc`` return at once, and
+callers that would pay for more than that (timing every SQL statement,
+reading the clock per request) check ``REGISTRY.enabled`` before doing so.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds in seconds; spans a page-cache hit up to a slow download
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Label combinations per metric before new ones are folded into 'other'
+MAX_SERIES = 500
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Tuple) -> Tuple:
+        """The series key for ``labels``; called with the lock held."""
+        if labels in self._series or len(self._series) < MAX_SERIES:
+            return labels
+        return ('other',) * len(self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonic total per label combination."""
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        with self._lock:
+            return self._series.get(labels, 0)
+
+    def series(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._series)
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                                for labels, value in sorted(self.series().items())]
+
+
+class Histogram(Metric):
+    """Observation counts in cumulative ``le`` buckets, with their sum and count, per label combination."""
+    kind = 'histogram'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (the last one past every bound), then sum and count
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the seconds spent in the ``with`` block."""
+        if not self.registry.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def summary(self, *labels) -> Dict:
+        """Count, sum, mean and bucket-interpolated p50/p95 of one series."""
+        with self._lock:
+            series = list(self._series.get(labels, ()))
+        if not series or not series[-1]:
+            return {'count': 0, 'sum': 0.0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0}
+        counts, total, count = series[:-2], series[-2], series[-1]
+        return {'count': count, 'sum': total, 'mean': total / count,
+                'p50': self._quantile(counts, count, 0.5), 'p95': self._quantile(counts, count, 0.95)}
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def series(self) -> Dict[Tuple, List]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in sorted(self.series().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', _format_value(bound)))}"
+                             f" {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of one process, rendered together."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Metric:
+        return self._metrics.get(name)
+
+    def clear(self):
+        """Drop every recorded series, keeping the metrics registered."""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            lines += self._metrics[name].render()
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write the rendered metrics to ``path`` atomically."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get('METRICS', '1') != '0')
@@ -5,21 +5,37 @@ Biology Research Articles Scraper
 This script reads a CSV file containing URLs of biology research articles
 and scrapes their content, saving cleaned text to individual files.
 
-Usage: python scrape_articles.py
+Usage: python scrape_articles.py [--workers N] [--per-host N] [--rate R]
 """
 
 import requests
 from bs4 import BeautifulSoup
 import fitz  # PyMuPDF
+import argparse
 import csv
+import gzip
+import hashlib
+import io
 import os
+import shutil
 import re
 import logging
+import queue
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from urllib.parse import urlparse, urljoin
 import tempfile
-from typing import Tuple, Optional, List, Dict
+from itertools import repeat
+from typing import Tuple, Optional, List, Dict, Union
 import json
+import multiprocessing
+from requests.structures import CaseInsensitiveDict
+
+from database import DatabaseManager, extract_title_from_content
+from metrics import REGISTRY
 
 # Configure logging
 logging.basicConfig(
@@ -32,156 +48,864 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Per-article stage timers. 'wait' is time spent waiting for a host slot and
+# rate-limit token, 'headers' the GET up to its response headers (the probe the
+# old HEAD request used to make), 'download' reading the body.
+SCRAPE_STAGES = ('wait', 'headers', 'download', 'parse', 'clean', 'save')
+STAGE_SECONDS = REGISTRY.histogram('scraper_stage_seconds', 'Seconds spent per article in each scraper stage',
+                                   ['stage'])
+HOST_SECONDS = REGISTRY.histogram('scraper_host_request_seconds', 'GET latency per host, headers and body',
+                                  ['host'])
+HOST_BYTES = REGISTRY.counter('scraper_downloaded_bytes_total', 'Response body bytes downloaded per host', ['host'])
+
+# How often a pipeline stage blocked on a full queue checks whether the run was interrupted
+QUEUE_POLL_SECONDS = 0.5
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+# Tags and selectors stripped from HTML pages before text extraction
+UNWANTED_TAGS = ['script', 'style', 'nav', 'header', 'footer', 
+                 'aside', 'menu', 'iframe', 'form']
+
+UNWANTED_SELECTORS = [
+    '.navigation', '.nav', '.menu', '.sidebar', '.footer', 
+    '.header', '.advertisement', '.ad', '.social', '.share',
+    '.references', '.ref-list', '.citation', '.related-articles',
+    '#navigation', '#nav', '#menu', '#sidebar', '#footer',
+    '#header', '#advertisement', '#social', '#references'
+]
+
+# Common selectors for main content, in order of preference
+CONTENT_SELECTORS = [
+    'main', 'article', '.main-content', '.content', '.article-content',
+    '.abstract', '.full-text', '.article-body', '.content-area',
+    '#main-content', '#content', '#article-content'
+]
+
+# Cleaned articles shorter than this are treated as failed extractions
+MIN_ARTICLE_LENGTH = 100
+
+# PDFs with at least this many pages may be split across processes
+PDF_PARALLEL_MIN_PAGES = 200
+
+# Bodies larger than this are spooled to disk instead of held in memory
+DEFAULT_MAX_BODY_MEMORY = 32 * 1024 * 1024
+
+
+# Extraction helpers are module-level so they can run in worker processes.
+
+def is_pdf_content(url: str, content_type: str, content: bytes) -> bool:
+    """Check if a body is a PDF by its URL, Content-Type or magic bytes."""
+    if url.lower().endswith('.pdf'):
+        return True
+    
+    if 'application/pdf' in content_type.lower():
+        return True
+    
+    # Servers often label PDFs as octet-stream; the header must appear in the first 1KB
+    return b'%PDF-' in content[:1024]
+
+
+def parse_html(content: bytes) -> str:
+    """Extract main content text from raw HTML using BeautifulSoup."""
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Remove unwanted elements
+    for element in soup(UNWANTED_TAGS):
+        element.decompose()
+    
+    # Remove elements with common navigation/ad classes and IDs
+    for selector in UNWANTED_SELECTORS:
+        for element in soup.select(selector):
+            element.decompose()
+    
+    # Try to find main content area
+    main_content = None
+    
+    for selector in CONTENT_SELECTORS:
+        content_area = soup.select_one(selector)
+        if content_area:
+            main_content = content_area
+            break
+    
+    # If no specific content area found, use body
+    if not main_content:
+        main_content = soup.find('body')
+    
+    if not main_content:
+        main_content = soup
+    
+    # Extract text
+    return main_content.get_text(separator='\n', strip=True)
+
+
+def _open_pdf(source: Union[bytes, str]) -> fitz.Document:
+    """Open a PDF from in-memory bytes or from a file path."""
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype='pdf')
+
+
+def _pdf_page_range_text(source: Union[bytes, str], start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) of a PDF."""
+    doc = _open_pdf(source)
+    try:
+        return ''.join(doc.load_page(page_num).get_text() for page_num in range(start, stop))
+    finally:
+        doc.close()
+
+
+def parse_pdf(source: Union[bytes, str], page_workers: int = 1) -> str:
+    """Extract text from PDF bytes (or a spooled file path) using PyMuPDF.
+
+    Page texts are collected and joined once. Documents with at least
+    PDF_PARALLEL_MIN_PAGES pages are split into page ranges across
+    ``page_workers`` processes when more than one is requested.
+    """
+    doc = _open_pdf(source)
+    try:
+        page_count = doc.page_count
+        if page_workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            return ''.join(page.get_text() for page in doc)
+    finally:
+        doc.close()
+    
+    step = -(-page_count // page_workers)
+    starts = list(range(0, page_count, step))
+    stops = [min(start + step, page_count) for start in starts]
+    with ProcessPoolExecutor(max_workers=page_workers,
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        return ''.join(pool.map(_pdf_page_range_text, repeat(source), starts, stops))
+
+
+# Characters kept by clean_text; every run of anything else (whitespace included)
+# becomes a single space
+_ALLOWED_CHARS = r'\w\.\,\;\:\!\?\-\(\)\[\]\{\}\"\'\/\\'
+_NOISE_RE = re.compile(rf'[^{_ALLOWED_CHARS}]+')
+_INLINE_NOISE_RE = re.compile(rf'[^{_ALLOWED_CHARS}\n]+')
+_LINE_BREAK_RE = re.compile(r' ?\n(?: ?\n)* ?')
+
+
+def _paragraph_break(match: re.Match) -> str:
+    return '\n\n' if match.group().count('\n') > 1 else '\n'
+
+
+def clean_text(text: str, keep_paragraphs: bool = False) -> str:
+    """Clean extracted text by removing excessive whitespace and unwanted characters.
+
+    By default all whitespace and disallowed characters collapse to single
+    spaces in one regex pass. With ``keep_paragraphs`` line breaks survive:
+    single newlines are kept and blank-line runs become one paragraph break.
+    """
+    if not text:
+        return ""
+    
+    if not keep_paragraphs:
+        return _NOISE_RE.sub(' ', text).strip()
+    
+    text = _INLINE_NOISE_RE.sub(' ', text)
+    return _LINE_BREAK_RE.sub(_paragraph_break, text).strip()
+
+
+def count_words(text: str) -> int:
+    """Count words in the text."""
+    return len(text.split())
+
+
+def extract_article_text(url: str, content: Union[bytes, str], content_type: str,
+                         keep_paragraphs: bool = False) -> Dict:
+    """Parse, clean and count one raw article body.
+
+    This is the CPU-bound stage of the pipeline; it touches no shared state
+    so it can run in a ProcessPoolExecutor worker. A str ``content`` is the
+    path of a PDF that was spooled to disk.
+    """
+    start = time.perf_counter()
+    if isinstance(content, str):
+        is_pdf = True
+    else:
+        is_pdf = is_pdf_content(url, content_type, content)
+    raw_text = parse_pdf(content) if is_pdf else parse_html(content)
+    
+    if not raw_text:
+        raise Exception("No content extracted")
+    
+    parsed = time.perf_counter()
+    cleaned_text = clean_text(raw_text, keep_paragraphs)
+    
+    if not cleaned_text or len(cleaned_text.strip()) < MIN_ARTICLE_LENGTH:
+        raise Exception("Extracted text is too short or empty")
+    
+    end = time.perf_counter()
+    return {
+        'text': cleaned_text,
+        'word_count': count_words(cleaned_text),
+        'content_type': 'PDF' if is_pdf else 'HTML',
+        'seconds': end - start,
+        'parse_seconds': parsed - start,
+        'clean_seconds': end - parsed
+    }
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests to a single host."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """Limits concurrent fetches and request rate separately for each host."""
+
+    def __init__(self, per_host_workers: int = 1, rate: float = 1.0, burst: float = 1.0):
+        self.per_host_workers = max(per_host_workers, 1)
+        self.rate = rate
+        self.burst = burst
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host: str) -> Tuple[threading.BoundedSemaphore, TokenBucket]:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.BoundedSemaphore(self.per_host_workers),
+                                     TokenBucket(self.rate, self.burst))
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold one of the host's worker slots, waiting for a rate-limit token first."""
+        semaphore, bucket = self._host_state(urlparse(url).netloc)
+        start = time.perf_counter()
+        with semaphore:
+            bucket.acquire()
+            STAGE_SECONDS.observe(time.perf_counter() - start, 'wait')
+            yield
+
+
+class StageStats:
+    """Busy-time accounting for one pipeline stage, to spot the bottleneck."""
+
+    def __init__(self, name: str, slots: int):
+        self.name = name
+        self.slots = max(slots, 1)
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float, blocked: float = 0.0):
+        """Record one item that kept a slot busy for ``seconds``.
+
+        ``blocked`` is time spent waiting to hand the item downstream.
+        """
+        with self.lock:
+            self.items += 1
+            self.busy += seconds
+            self.blocked += blocked
+
+    def add_blocked(self, seconds: float):
+        """Record time spent waiting on a full downstream queue."""
+        with self.lock:
+            self.blocked += seconds
+
+    def report(self, elapsed: float) -> str:
+        utilization = self.busy / (self.slots * elapsed) if elapsed > 0 else 0.0
+        return (f"{self.name}: {self.items} items, {utilization:.0%} utilization "
+                f"across {self.slots} slot(s), {self.blocked:.1f}s blocked on full queue")
+
+
+class SpooledResponse(requests.Response):
+    """Response whose body exceeded the memory cap and was spooled to a temp file.
+
+    ``head`` keeps the first bytes for type sniffing; ``content`` reads the
+    file only if something actually needs the whole body in memory.
+    Closing the response deletes the file.
+    """
+
+    def __init__(self, response: requests.Response, body_path: str, head: bytes, size: int):
+        super().__init__()
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = response.url
+        self.encoding = response.encoding
+        self.reason = response.reason
+        self.body_path = body_path
+        self.head = head
+        self.size = size
+        self._content_consumed = True
+
+    @property
+    def content(self) -> bytes:
+        if not self._content:
+            with open(self.body_path, 'rb') as f:
+                self._content = f.read()
+        return self._content
+
+    def close(self):
+        try:
+            os.unlink(self.body_path)
+        except FileNotFoundError:
+            pass
+
+
+def read_body(response: requests.Response, max_memory: int = DEFAULT_MAX_BODY_MEMORY) -> requests.Response:
+    """Stream a response body into memory, spooling it to disk past ``max_memory`` bytes.
+
+    Returns the original response with its content loaded, or a
+    SpooledResponse when the body was too large.
+    """
+    buffer = io.BytesIO()
+    spool = None
+    head = b''
+    size = 0
+    
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        if spool is None and size + len(chunk) > max_memory:
+            head = (buffer.getvalue() + chunk)[:1024]
+            spool = tempfile.NamedTemporaryFile(suffix='.body', delete=False)
+            spool.write(buffer.getvalue())
+            buffer = None
+        (spool or buffer).write(chunk)
+        size += len(chunk)
+    response.close()
+    
+    if spool is None:
+        response._content = buffer.getvalue()
+        response._content_consumed = True
+        return response
+    
+    spool.close()
+    return SpooledResponse(response, spool.name, head, size)
+
+
+class ResponseCache:
+    """On-disk cache of raw HTML/PDF responses for offline re-extraction.
+
+    Bodies are gzip-compressed and stored by SHA-256 under ``objects/``, so
+    identical responses share one blob. Each URL has a small JSON entry under
+    ``entries/`` pointing at its current blob along with the ETag and
+    Last-Modified validators used for conditional revalidation.
+    """
+
+    def __init__(self, cache_dir: str = "raw_cache"):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.entries_dir = os.path.join(cache_dir, 'entries')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.entries_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + '.gz')
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        """Write via a temp file and rename so readers never see partial files."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cache entry for a URL, or None if it was never cached."""
+        try:
+            with open(self._entry_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def entries(self) -> Dict[str, Dict]:
+        """Return all cache entries keyed by URL."""
+        entries = {}
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.entries_dir, name), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                entries[entry['url']] = entry
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache entry {name}: {e}")
+        return entries
+
+    def load_body(self, entry: Dict) -> bytes:
+        """Read and decompress the raw body an entry points at."""
+        with gzip.open(self._object_path(entry['sha256']), 'rb') as f:
+            return f.read()
+
+    def _store_file(self, path: str) -> Tuple[str, int]:
+        """Hash and compress a spooled body in chunks without loading it into memory."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        object_path = self._object_path(sha256)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(object_path), suffix='.tmp')
+            try:
+                with open(path, 'rb') as src, os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(temp_path, object_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        return sha256, size
+
+    def store(self, url: str, response: requests.Response) -> Dict:
+        """Cache a successful response's body and validators."""
+        if isinstance(response, SpooledResponse):
+            sha256, size = self._store_file(response.body_path)
+        else:
+            body = response.content
+            sha256 = hashlib.sha256(body).hexdigest()
+            size = len(body)
+            object_path = self._object_path(sha256)
+
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                self._atomic_write(object_path, gzip.compress(body))
+
+        entry = {
+            'url': url,
+            'sha256': sha256,
+            'size': size,
+            'content_type': response.headers.get('content-type', ''),
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'fetched_at': datetime.now(timezone.utc).isoformat()
+        }
+        self._atomic_write(self._entry_path(url), json.dumps(entry, indent=2).encode('utf-8'))
+        return entry
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Build revalidation headers from a cached entry's validators."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def as_response(self, entry: Dict) -> requests.Response:
+        """Rebuild a requests.Response from a cache entry so extractors can consume it."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict({'content-type': entry.get('content_type', '')})
+        response._content = self.load_body(entry)
+        return response
+
+
+SUMMARY_FIELDS = ['article_id', 'url', 'word_count', 'saved_file_path', 'content_type']
+
+
+class ProgressJournal:
+    """Append-only JSONL log of article outcomes, the source of truth for resuming.
+
+    Each finished article is appended once as a JSON line and flushed; fsync
+    happens every ``fsync_every`` records and on ``sync``. A torn final line
+    left by a crash is skipped on load. The summary CSV is a compaction of the
+    journal, written to a temp file and renamed into place.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 10):
+        self.path = path
+        self.fsync_every = max(fsync_every, 1)
+        self.records = {}
+        self.load_seconds = 0.0
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def load(self) -> Dict[str, Dict]:
+        """Replay the journal; later records for a URL override earlier ones."""
+        start = time.perf_counter()
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash mid-append
+                        continue
+                    records[record['url']] = record
+        self.records = records
+        self.load_seconds = time.perf_counter() - start
+        return records
+
+    def _open(self):
+        if self._file is not None:
+            return
+        torn = False
+        if self.exists():
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        self._file = open(self.path, 'ab')
+        if torn:
+            # Terminate a partial line so the next record parses cleanly
+            self._file.write(b'\n')
+
+    def append(self, record: Dict):
+        """Durably record one article outcome."""
+        line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._lock:
+            self._open()
+            self._file.write(line)
+            self._file.flush()
+            self.records[record['url']] = record
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._sync()
+
+    def _sync(self):
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def sync(self):
+        """Force buffered records to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def completed_urls(self) -> set:
+        return {url for url, record in self.records.items() if record.get('status') == 'ok'}
+
+    def import_legacy(self, progress_file: str, summary_file: str) -> int:
+        """Seed an empty journal from the old progress JSON and summary CSV."""
+        imported = set()
+        if os.path.exists(summary_file):
+            with open(summary_file, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    record = {k: row[k] for k in SUMMARY_FIELDS}
+                    record['article_id'] = int(record['article_id'])
+                    record['word_count'] = int(record['word_count'])
+                    record['status'] = 'ok'
+                    self.append(record)
+                    imported.add(record['url'])
+        if os.path.exists(progress_file):
+            with open(progress_file, 'r') as f:
+                completed = json.load(f).get('completed_urls', [])
+            for url in completed:
+                if url not in imported:
+                    # Completed in an earlier session but its summary row was lost
+                    self.append({'url': url, 'status': 'ok'})
+                    imported.add(url)
+        self.sync()
+        return len(imported)
+
+    def compact_summary(self, summary_file: str) -> int:
+        """Atomically rewrite the summary CSV from the latest successful records."""
+        rows = {}
+        for record in self.records.values():
+            if record.get('status') == 'ok' and record.get('article_id') is not None:
+                rows[int(record['article_id'])] = record
+        
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(summary_file)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for article_id in sorted(rows):
+                    writer.writerow(rows[article_id])
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+            os.replace(temp_path, summary_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return len(rows)
+
+
+class DatabaseSink:
+    """Streams finished articles into the search database in batched transactions.
+
+    Articles are buffered and written with one executemany per batch, at
+    least every ``flush_interval`` seconds, so the search index fills in while
+    the scrape is still running.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 25, flush_interval: float = 5.0,
+                 compress: bool = False, deduplicate: bool = False):
+        self.db = DatabaseManager(db_path, compress=compress, deduplicate=deduplicate)
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.batch = []
+        self.written = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, result: Dict, text: str):
+        """Queue one successfully scraped article for insertion."""
+        self.batch.append({
+            'article_id': result['article_id'],
+            'url': result['url'],
+            'title': extract_title_from_content(text, result['url']),
+            'content': text,
+            'word_count': result['word_count'],
+            'content_type': result['content_type'],
+            'file_path': result['saved_file_path'] or None
+        })
+        if len(self.batch) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered batch; on failure it is kept and retried on the next flush."""
+        if self.batch:
+            try:
+                self.written += self.db.insert_articles(self.batch)
+                self.batch = []
+            except Exception as e:
+                logger.error(f"Could not write {len(self.batch)} articles to {self.db.db_path}: {e}")
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        """Write the last batch and update the related-article lists for the articles written."""
+        self.flush()
+        if self.written:
+            try:
+                # Imported here so numpy/scipy are only needed once related articles are updated
+                from similarity import update_similarity_index
+                report = update_similarity_index(self.db)
+                logger.info(f"Related articles: {report['mode']} update, {report['vectorized']} articles "
+                            f"vectorized, {report['lists']} lists written in {report['seconds']:.2f}s")
+            except Exception as e:
+                logger.error(f"Could not update related articles in {self.db.db_path}: {e}")
+
+
 class ArticleScraper:
-    def __init__(self, input_file: str = "SB_publication_PMC.csv", output_dir: str = "scraped_articles"):
-        """Initialize the article scraper with input file and output directory."""
+    def __init__(self, input_file: str = "SB_publication_PMC.csv", output_dir: str = "scraped_articles",
+                 workers: int = 1, per_host_workers: int = 1, rate: float = 1.0, burst: float = 1.0,
+                 journal_file: str = "scraping_journal.jsonl", summary_file: str = "scraped_summary.csv",
+                 cache_dir: Optional[str] = "raw_cache", parse_processes: int = 0, queue_size: int = 32,
+                 max_body_memory: int = DEFAULT_MAX_BODY_MEMORY, pdf_page_workers: int = 1,
+                 keep_paragraphs: bool = False, progress_file: str = "scraping_progress.json",
+                 db_path: Optional[str] = None, export_text: bool = True, compress_db: bool = False,
+                 dedupe_db: bool = False, metrics_file: Optional[str] = None):
+        """Initialize the article scraper with input file and output directory.
+
+        ``workers`` sets the size of the fetch thread pool, while ``per_host_workers``
+        and ``rate`` (requests per second, token bucket with ``burst`` capacity) cap
+        how hard any single host is hit. The defaults reproduce the original
+        one-article-per-second sequential behaviour. Raw responses are kept in
+        ``cache_dir`` (pass None to disable) so extraction can be re-run offline.
+        
+        With ``parse_processes`` > 0, fetching, parsing and writing run as a
+        pipeline: fetch threads feed a bounded queue of ``queue_size`` raw
+        bodies to a process pool, whose results a single writer saves.
+        
+        Response bodies above ``max_body_memory`` bytes are spooled to disk,
+        and inline PDF extraction of very long documents can be split over
+        ``pdf_page_workers`` processes. ``keep_paragraphs`` preserves line and
+        paragraph breaks in the cleaned text.
+        
+        Article outcomes are appended to ``journal_file``; the summary CSV is
+        compacted from it. An older ``progress_file`` is imported once when
+        no journal exists yet.
+        
+        With ``db_path`` set, cleaned articles are written straight into the
+        search database as they finish; ``export_text`` controls whether
+        article_N.txt files are still written, ``compress_db`` stores the
+        text compressed and ``dedupe_db`` collapses near-duplicates (mirrored
+        links, HTML and PDF copies of one paper) into one indexed article.
+        
+        Per-stage and per-host timings are logged at the end of a run and,
+        with ``metrics_file`` set, written there in Prometheus text format.
+        """
         self.input_file = input_file
         self.output_dir = output_dir
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.workers = max(workers, 1)
+        self.limiter = HostLimiter(per_host_workers, rate, burst)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.parse_processes = max(parse_processes, 0)
+        self.queue_size = max(queue_size, 1)
+        self.max_body_memory = max_body_memory
+        self.pdf_page_workers = max(pdf_page_workers, 1)
+        self.keep_paragraphs = keep_paragraphs
+        self.sink = DatabaseSink(db_path, compress=compress_db, deduplicate=dedupe_db) if db_path else None
+        self.export_text = export_text
+        self.metrics_file = metrics_file
+        self.stage_stats = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
         self.scraped_data = []
         self.success_count = 0
         self.error_count = 0
+        self.request_count = 0
+        self.requests_saved = 0
+        self.not_modified_count = 0
+        self.elapsed = 0.0
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
         
         # Load existing progress if available
-        self.progress_file = "scraping_progress.json"
+        self.progress_file = progress_file
+        self.summary_file = summary_file
+        self.journal = ProgressJournal(journal_file)
         self.completed_urls = self.load_progress()
+
+    @property
+    def session(self) -> requests.Session:
+        """Per-thread HTTP session, since requests.Session is not thread-safe."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            self._local.session = session
+        return session
         
     def load_progress(self) -> set:
-        """Load previously completed URLs from progress file."""
-        if os.path.exists(self.progress_file):
-            try:
-                with open(self.progress_file, 'r') as f:
-                    data = json.load(f)
-                    return set(data.get('completed_urls', []))
-            except Exception as e:
-                logger.warning(f"Could not load progress file: {e}")
+        """Rebuild completed URLs by replaying the progress journal."""
+        try:
+            if not self.journal.exists() and os.path.exists(self.progress_file):
+                imported = self.journal.import_legacy(self.progress_file, self.summary_file)
+                logger.info(f"Imported {imported} previously completed URLs into {self.journal.path}")
+            self.journal.load()
+            logger.info(f"Replayed {len(self.journal.records)} journal records "
+                        f"in {self.journal.load_seconds * 1000:.1f}ms")
+            return self.journal.completed_urls()
+        except Exception as e:
+            logger.warning(f"Could not load progress journal: {e}")
         return set()
     
     def save_progress(self):
-        """Save current progress to file."""
+        """Flush journaled progress to disk."""
         try:
-            progress_data = {
-                'completed_urls': list(self.completed_urls),
-                'success_count': self.success_count,
-                'error_count': self.error_count
-            }
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress_data, f, indent=2)
+            self.journal.sync()
         except Exception as e:
             logger.error(f"Could not save progress: {e}")
 
-    def is_pdf_url(self, url: str) -> bool:
-        """Check if URL leads to a PDF by examining the response headers."""
-        try:
-            # First check if URL ends with .pdf
-            if url.lower().endswith('.pdf'):
-                return True
-            
-            # Make a HEAD request to check content type
-            response = self.session.head(url, timeout=10, allow_redirects=True)
-            content_type = response.headers.get('content-type', '').lower()
-            
-            return 'application/pdf' in content_type
-            
-        except Exception as e:
-            logger.warning(f"Could not determine content type for {url}: {e}")
-            # Fallback: assume HTML if we can't determine
-            return False
+    def fetch(self, url: str, timeout: int = 60) -> requests.Response:
+        """Issue the single streamed GET used for both type detection and extraction.
+
+        When the URL is cached, the request is conditional and a 304 is served
+        from the cache without downloading the body again.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        
+        start = time.perf_counter()
+        response = self.session.get(url, timeout=timeout, stream=True, headers=headers)
+        headers_seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(headers_seconds, 'headers')
+        host = urlparse(url).netloc
+        with self._lock:
+            self.request_count += 1
+            if not url.lower().endswith('.pdf'):
+                # The old HEAD-then-GET flow spent an extra request on these URLs
+                self.requests_saved += 1
+        
+        if entry and response.status_code == 304:
+            response.close()
+            HOST_SECONDS.observe(headers_seconds, host)
+            with self._lock:
+                self.not_modified_count += 1
+            return self.cache.as_response(entry)
+        
+        response.raise_for_status()
+        body_start = time.perf_counter()
+        response = read_body(response, self.max_body_memory)
+        end = time.perf_counter()
+        STAGE_SECONDS.observe(end - body_start, 'download')
+        HOST_SECONDS.observe(end - start, host)
+        HOST_BYTES.inc(host, amount=response.size if isinstance(response, SpooledResponse) else len(response.content))
+        if self.cache:
+            try:
+                self.cache.store(url, response)
+            except Exception:
+                response.close()
+                raise
+        return response
+
+    def is_pdf_response(self, url: str, response: requests.Response) -> bool:
+        """Check if a fetched response is a PDF by its URL, Content-Type or magic bytes."""
+        head = response.head if isinstance(response, SpooledResponse) else response.content[:1024]
+        return is_pdf_content(url, response.headers.get('content-type', ''), head)
+
+    def extract_html_content(self, url: str, response: Optional[requests.Response] = None) -> Optional[str]:
+        """Extract main content from HTML page using BeautifulSoup.
 
-    def extract_html_content(self, url: str) -> Optional[str]:
-        """Extract main content from HTML page using BeautifulSoup."""
+        Pass the response from ``fetch`` to reuse it instead of downloading again.
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if response is None:
+                response = self.fetch(url, timeout=30)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 
-                                'aside', 'menu', 'iframe', 'form']):
-                element.decompose()
-            
-            # Remove elements with common navigation/ad classes and IDs
-            unwanted_selectors = [
-                '.navigation', '.nav', '.menu', '.sidebar', '.footer', 
-                '.header', '.advertisement', '.ad', '.social', '.share',
-                '.references', '.ref-list', '.citation', '.related-articles',
-                '#navigation', '#nav', '#menu', '#sidebar', '#footer',
-                '#header', '#advertisement', '#social', '#references'
-            ]
-            
-            for selector in unwanted_selectors:
-                for element in soup.select(selector):
-                    element.decompose()
-            
-            # Try to find main content area
-            main_content = None
-            
-            # Common selectors for main content
-            content_selectors = [
-                'main', 'article', '.main-content', '.content', '.article-content',
-                '.abstract', '.full-text', '.article-body', '.content-area',
-                '#main-content', '#content', '#article-content'
-            ]
-            
-            for selector in content_selectors:
-                content = soup.select_one(selector)
-                if content:
-                    main_content = content
-                    break
-            
-            # If no specific content area found, use body
-            if not main_content:
-                main_content = soup.find('body')
-            
-            if not main_content:
-                main_content = soup
-            
-            # Extract text
-            text = main_content.get_text(separator='\n', strip=True)
-            
-            return text
+            return parse_html(response.content)
             
         except Exception as e:
             logger.error(f"Error extracting HTML content from {url}: {e}")
             return None
 
-    def extract_pdf_content(self, url: str) -> Optional[str]:
-        """Download PDF temporarily and extract text using PyMuPDF."""
+    def extract_pdf_content(self, url: str, response: Optional[requests.Response] = None) -> Optional[str]:
+        """Extract text from a PDF with PyMuPDF, straight from the in-memory body.
+
+        Pass the response from ``fetch`` to reuse it instead of downloading again.
+        Large PDFs that were spooled to disk are opened from their spool file.
+        """
         try:
             # Download PDF
-            response = self.session.get(url, timeout=60)
-            response.raise_for_status()
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
+            if response is None:
+                response = self.fetch(url)
             
-            try:
-                # Extract text from PDF
-                doc = fitz.open(temp_path)
-                text = ""
-                
-                for page_num in range(doc.page_count):
-                    page = doc.load_page(page_num)
-                    text += page.get_text()
-                
-                doc.close()
-                return text
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except Exception as e:
-                    logger.warning(f"Could not delete temporary file {temp_path}: {e}")
+            if isinstance(response, SpooledResponse):
+                return parse_pdf(response.body_path, self.pdf_page_workers)
+            return parse_pdf(response.content, self.pdf_page_workers)
                     
         except Exception as e:
             logger.error(f"Error extracting PDF content from {url}: {e}")
@@ -189,25 +913,7 @@ class ArticleScraper:
 
     def clean_text(self, text: str) -> str:
         """Clean extracted text by removing excessive whitespace and unwanted characters."""
-        if not text:
-            return ""
-        
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove excessive newlines
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-        
-        # Remove special characters that might cause issues
-        text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)\[\]\{\}\"\'\/\\\n]', ' ', text)
-        
-        # Remove multiple spaces
-        text = re.sub(r' +', ' ', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        return text
+        return clean_text(text, self.keep_paragraphs)
 
     def save_article_text(self, text: str, article_id: int) -> str:
         """Save cleaned text to a numbered file."""
@@ -215,7 +921,7 @@ class ArticleScraper:
         filepath = os.path.join(self.output_dir, filename)
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
+            with STAGE_SECONDS.time('save'), open(filepath, 'w', encoding='utf-8') as f:
                 f.write(text)
             return filepath
         except Exception as e:
@@ -224,7 +930,7 @@ class ArticleScraper:
 
     def count_words(self, text: str) -> int:
         """Count words in the text."""
-        return len(text.split())
+        return count_words(text)
 
     def scrape_article(self, url: str, article_id: int) -> Dict:
         """Scrape a single article and return metadata."""
@@ -237,58 +943,88 @@ class ArticleScraper:
         logger.info(f"Processing article {article_id}: {url}")
         
         try:
-            # Determine content type
-            is_pdf = self.is_pdf_url(url)
+            with self.limiter.slot(url):
+                response = self.fetch(url)
+        except Exception as e:
+            return self._record_failure(url, article_id, e)
+        
+        try:
+            return self.process_response(url, article_id, response)
+        finally:
+            response.close()
+
+    def process_response(self, url: str, article_id: int, response: requests.Response) -> Dict:
+        """Extract, clean and save an article from an already fetched response."""
+        try:
+            # Determine content type from the same response
+            is_pdf = self.is_pdf_response(url, response)
             
             # Extract content based on type
-            if is_pdf:
-                logger.info(f"Extracting PDF content from article {article_id}")
-                raw_text = self.extract_pdf_content(url)
-            else:
-                logger.info(f"Extracting HTML content from article {article_id}")
-                raw_text = self.extract_html_content(url)
+            with STAGE_SECONDS.time('parse'):
+                if is_pdf:
+                    logger.info(f"Extracting PDF content from article {article_id}")
+                    raw_text = self.extract_pdf_content(url, response)
+                else:
+                    logger.info(f"Extracting HTML content from article {article_id}")
+                    raw_text = self.extract_html_content(url, response)
             
             if not raw_text:
                 raise Exception("No content extracted")
             
             # Clean the text
-            cleaned_text = self.clean_text(raw_text)
+            with STAGE_SECONDS.time('clean'):
+                cleaned_text = self.clean_text(raw_text)
             
-            if not cleaned_text or len(cleaned_text.strip()) < 100:
+            if not cleaned_text or len(cleaned_text.strip()) < MIN_ARTICLE_LENGTH:
                 raise Exception("Extracted text is too short or empty")
             
             # Save to file
-            filepath = self.save_article_text(cleaned_text, article_id)
+            filepath = self.save_article_text(cleaned_text, article_id) if self.export_text else ''
             
             # Count words
             word_count = self.count_words(cleaned_text)
             
             # Mark as completed
-            self.completed_urls.add(url)
-            self.success_count += 1
+            with self._lock:
+                self.completed_urls.add(url)
+                self.success_count += 1
             
             logger.info(f"Successfully scraped article {article_id} ({word_count} words)")
             
-            return {
-                'article_id': article_id,
-                'url': url,
-                'word_count': word_count,
-                'saved_file_path': filepath,
-                'content_type': 'PDF' if is_pdf else 'HTML'
-            }
+            return self._success_row(article_id, url, word_count, filepath,
+                                     'PDF' if is_pdf else 'HTML', cleaned_text)
             
         except Exception as e:
+            return self._record_failure(url, article_id, e)
+
+    def _success_row(self, article_id: int, url: str, word_count: int, filepath: str,
+                     content_type: str, text: str) -> Dict:
+        """Build a success row; the text rides along only when a database sink needs it."""
+        row = {
+            'article_id': article_id,
+            'url': url,
+            'word_count': word_count,
+            'saved_file_path': filepath,
+            'content_type': content_type
+        }
+        if self.sink:
+            row['text'] = text
+        return row
+
+    def _record_failure(self, url: str, article_id: int, error: Exception) -> Dict:
+        """Count a failed article and return its error row."""
+        with self._lock:
             self.error_count += 1
-            logger.error(f"Failed to scrape article {article_id} from {url}: {e}")
-            
-            return {
-                'article_id': article_id,
-                'url': url,
-                'word_count': 0,
-                'saved_file_path': 'ERROR',
-                'content_type': 'ERROR',
-                'error': str(e)
-            }
+        logger.error(f"Failed to scrape article {article_id} from {url}: {error}")
+        
+        return {
+            'article_id': article_id,
+            'url': url,
+            'word_count': 0,
+            'saved_file_path': 'ERROR',
+            'content_type': 'ERROR',
+            'error': str(error)
+        }
 
     def load_urls_from_csv(self) -> List[Tuple[int, str]]:
         """Load URLs from CSV file."""
@@ -319,25 +1055,240 @@ class ArticleScraper:
         return urls
 
     def save_summary_csv(self):
-        """Save scraping summary to CSV file."""
-        summary_file = 'scraped_summary.csv'
+        """Compact the journal into the summary CSV, covering all sessions."""
+        summary_file = self.summary_file
         
         try:
-            with open(summary_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['article_id', 'url', 'word_count', 'saved_file_path', 'content_type']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for row in self.scraped_data:
-                    # Only write successful scrapes to summary
-                    if row.get('saved_file_path') != 'ERROR':
-                        writer.writerow({k: v for k, v in row.items() if k in fieldnames})
-            
-            logger.info(f"Summary saved to {summary_file}")
+            rows = self.journal.compact_summary(summary_file)
+            logger.info(f"Summary saved to {summary_file} ({rows} articles)")
             
         except Exception as e:
             logger.error(f"Error saving summary CSV: {e}")
 
+    def _record_result(self, result: Optional[Dict], total_urls: int):
+        """Collect a finished article on the main thread and journal its outcome."""
+        if not result:
+            return
+
+        text = result.pop('text', None)
+        self.scraped_data.append(result)
+        
+        record = dict(result)
+        record['status'] = 'error' if result.get('saved_file_path') == 'ERROR' else 'ok'
+        if self.sink and record['status'] == 'ok':
+            self.sink.add(result, text)
+        try:
+            self.journal.append(record)
+        except Exception as e:
+            logger.error(f"Could not journal article {result['article_id']}: {e}")
+
+        # Log progress
+        with self._lock:
+            success_count, error_count = self.success_count, self.error_count
+        total_processed = success_count + error_count
+        logger.info(f"Progress: {total_processed}/{total_urls} processed "
+                  f"({success_count} successful, {error_count} errors)")
+
+    def _run_sequential(self, urls: List[Tuple[int, str]]):
+        """Scrape articles one at a time on the calling thread."""
+        for article_id, url in urls:
+            try:
+                self._record_result(self.scrape_article(url, article_id), len(urls))
+            except KeyboardInterrupt:
+                logger.info("Scraping interrupted by user")
+                break
+            except Exception as e:
+                logger.error(f"Unexpected error processing article {article_id}: {e}")
+                continue
+
+    def _run_concurrent(self, urls: List[Tuple[int, str]]):
+        """Scrape articles on a bounded thread pool, collecting results as they finish."""
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scraper')
+        try:
+            futures = {executor.submit(self.scrape_article, url, article_id): article_id
+                       for article_id, url in urls}
+            for future in as_completed(futures):
+                try:
+                    self._record_result(future.result(), len(urls))
+                except Exception as e:
+                    logger.error(f"Unexpected error processing article {futures[future]}: {e}")
+        except KeyboardInterrupt:
+            logger.info("Scraping interrupted by user, waiting for in-flight articles")
+            executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _put_unless_stopped(target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Put ``item`` on a bounded queue, giving up once ``stop`` is set. Returns whether it was queued."""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _discard_spool(path):
+        """Delete the spool file of a PDF body that will not be parsed, if there is one."""
+        if isinstance(path, str):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _drain_pipeline(self, raw_queue: queue.Queue, parsed_queue: queue.Queue):
+        """Empty the pipeline queues after an interrupt so no stage stays blocked on a full one."""
+        for pending, spool_path in ((raw_queue, lambda item: item[2]),
+                                    (parsed_queue, lambda item: getattr(item[2], 'spool_path', None))):
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                self._discard_spool(spool_path(item))
+
+    def _fetch_raw(self, url: str, article_id: int, raw_queue: queue.Queue, stats: StageStats,
+                   stop: threading.Event):
+        """Pipeline fetch stage: download one article and queue its raw body."""
+        if stop.is_set():
+            return
+        logger.info(f"Processing article {article_id}: {url}")
+        start = time.perf_counter()
+        try:
+            with self.limiter.slot(url):
+                response = self.fetch(url)
+            content_type = response.headers.get('content-type', '')
+            if isinstance(response, SpooledResponse) and self.is_pdf_response(url, response):
+                # Hand the parser the spool path; it deletes the file once parsed
+                content = response.body_path
+            else:
+                content = response.content
+                response.close()
+            item = (article_id, url, content, content_type, None)
+        except Exception as e:
+            item = (article_id, url, None, None, e)
+        fetched = time.perf_counter()
+        
+        # Blocks while the parse stage is behind, throttling the fetchers
+        if not self._put_unless_stopped(raw_queue, item, stop):
+            self._discard_spool(item[2])
+            return
+        stats.add(fetched - start, blocked=time.perf_counter() - fetched)
+
+    def _dispatch_parses(self, count: int, raw_queue: queue.Queue, parsed_queue: queue.Queue,
+                         pool: ProcessPoolExecutor, stats: StageStats, stop: threading.Event):
+        """Pipeline hand-off: submit queued raw bodies to the process pool in order of arrival."""
+        dispatched = 0
+        while dispatched < count and not stop.is_set():
+            try:
+                article_id, url, content, content_type, error = raw_queue.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            dispatched += 1
+            future = None
+            if error is None:
+                try:
+                    future = pool.submit(extract_article_text, url, content, content_type,
+                                         self.keep_paragraphs)
+                    future.spool_path = content if isinstance(content, str) else None
+                except Exception as e:
+                    # Broken or shut-down pool: nothing will parse the spooled body
+                    self._discard_spool(content)
+                    error = e
+            start = time.perf_counter()
+            # Blocks while the writer is behind, which in turn stops draining raw_queue
+            item = (article_id, url, future, error)
+            if not self._put_unless_stopped(parsed_queue, item, stop):
+                self._discard_spool(getattr(future, 'spool_path', None))
+                return
+            stats.add_blocked(time.perf_counter() - start)
+
+    def _write_parsed(self, article_id: int, url: str, parsed: Dict) -> Dict:
+        """Pipeline write stage: save a parsed article and mark it completed."""
+        filepath = self.save_article_text(parsed['text'], article_id) if self.export_text else ''
+        
+        with self._lock:
+            self.completed_urls.add(url)
+            self.success_count += 1
+        
+        logger.info(f"Successfully scraped article {article_id} ({parsed['word_count']} words)")
+        
+        return self._success_row(article_id, url, parsed['word_count'], filepath,
+                                 parsed['content_type'], parsed['text'])
+
+    def _run_pipeline(self, urls: List[Tuple[int, str]]):
+        """Scrape with fetch threads, a parse process pool and a writer on this thread."""
+        pending = []
+        for article_id, url in urls:
+            if url in self.completed_urls:
+                logger.info(f"Skipping already processed URL: {url}")
+            else:
+                pending.append((article_id, url))
+        
+        fetch_stats = StageStats('fetch', self.workers)
+        parse_stats = StageStats('parse', self.parse_processes)
+        write_stats = StageStats('write', 1)
+        self.stage_stats = [fetch_stats, parse_stats, write_stats]
+        
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        parsed_queue = queue.Queue(maxsize=self.queue_size)
+        
+        fetchers = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fetcher')
+        # Spawned workers avoid forking a process that already runs fetch threads
+        parsers = ProcessPoolExecutor(max_workers=self.parse_processes,
+                                      mp_context=multiprocessing.get_context('spawn'))
+        # Set on interrupt so fetchers and the dispatcher stop waiting on full queues
+        stop = threading.Event()
+        dispatcher = threading.Thread(
+            target=self._dispatch_parses,
+            args=(len(pending), raw_queue, parsed_queue, parsers, parse_stats, stop),
+            name='dispatcher',
+            daemon=True
+        )
+        
+        try:
+            dispatcher.start()
+            for article_id, url in pending:
+                fetchers.submit(self._fetch_raw, url, article_id, raw_queue, fetch_stats, stop)
+            
+            for _ in range(len(pending)):
+                article_id, url, future, error = parsed_queue.get()
+                try:
+                    if error is None:
+                        try:
+                            parsed = future.result()
+                        finally:
+                            if future.spool_path:
+                                os.unlink(future.spool_path)
+                        parse_stats.add(parsed['seconds'])
+                        STAGE_SECONDS.observe(parsed['parse_seconds'], 'parse')
+                        STAGE_SECONDS.observe(parsed['clean_seconds'], 'clean')
+                        start = time.perf_counter()
+                        result = self._write_parsed(article_id, url, parsed)
+                        write_stats.add(time.perf_counter() - start)
+                    else:
+                        result = self._record_failure(url, article_id, error)
+                except Exception as e:
+                    result = self._record_failure(url, article_id, e)
+                self._record_result(result, len(urls))
+                
+        except KeyboardInterrupt:
+            logger.info("Scraping interrupted by user")
+            stop.set()
+            fetchers.shutdown(wait=False, cancel_futures=True)
+            parsers.shutdown(wait=False, cancel_futures=True)
+            self._drain_pipeline(raw_queue, parsed_queue)
+        finally:
+            fetchers.shutdown(wait=True)
+            if stop.is_set():
+                if dispatcher.is_alive():
+                    dispatcher.join()
+                # Bodies queued by fetches that finished while the queues were drained
+                self._drain_pipeline(raw_queue, parsed_queue)
+            parsers.shutdown(wait=True)
+
     def run(self):
         """Main scraping process."""
         logger.info("Starting article scraping process...")
@@ -352,56 +1303,176 @@ class ArticleScraper:
         
         logger.info(f"Found {total_urls} URLs to process")
         logger.info(f"Previously completed: {len(self.completed_urls)} URLs")
+        logger.info(f"Using {self.workers} worker(s), {self.limiter.per_host_workers} per host, "
+                    f"{self.limiter.rate:g} requests/s per host")
         
-        # Process each URL
-        for article_id, url in urls:
-            try:
-                # Add delay to be respectful to servers
-                time.sleep(1)
-                
-                result = self.scrape_article(url, article_id)
-                
-                if result:
-                    self.scraped_data.append(result)
-                
-                # Log progress
-                total_processed = self.success_count + self.error_count
-                logger.info(f"Progress: {total_processed}/{total_urls} processed "
-                          f"({self.success_count} successful, {self.error_count} errors)")
-                
-                # Save progress periodically
-                if total_processed % 10 == 0:
-                    self.save_progress()
-                    self.save_summary_csv()
-                
-            except KeyboardInterrupt:
-                logger.info("Scraping interrupted by user")
-                break
-            except Exception as e:
-                logger.error(f"Unexpected error processing article {article_id}: {e}")
-                continue
+        start = time.monotonic()
+        if self.parse_processes:
+            logger.info(f"Parsing in {self.parse_processes} process(es), queue size {self.queue_size}")
+            self._run_pipeline(urls)
+        elif self.workers > 1:
+            self._run_concurrent(urls)
+        else:
+            self._run_sequential(urls)
+        self.elapsed = time.monotonic() - start
         
         # Final save
-        self.save_progress()
+        self.journal.close()
         self.save_summary_csv()
+        if self.sink:
+            self.sink.close()
         
         # Final statistics
+        total_processed = self.success_count + self.error_count
+        success_rate = (self.success_count / total_processed * 100) if total_processed else 0.0
+        throughput = len(self.scraped_data) / self.elapsed if self.elapsed > 0 else 0.0
         logger.info("="*50)
         logger.info("SCRAPING COMPLETE")
-        logger.info(f"Total URLs processed: {self.success_count + self.error_count}")
+        logger.info(f"Total URLs processed: {total_processed}")
         logger.info(f"Successfully scraped: {self.success_count}")
         logger.info(f"Errors: {self.error_count}")
-        logger.info(f"Success rate: {(self.success_count/(self.success_count + self.error_count)*100):.1f}%")
+        logger.info(f"Success rate: {success_rate:.1f}%")
+        logger.info(f"Elapsed: {self.elapsed:.1f}s ({throughput:.2f} articles/s)")
+        if total_processed:
+            logger.info(f"HTTP requests: {self.request_count} "
+                        f"({self.request_count / total_processed:.2f} per article, "
+                        f"{self.requests_saved} saved vs HEAD-then-GET, "
+                        f"{self.requests_saved / total_processed:.2f} per article)")
+        if self.not_modified_count:
+            logger.info(f"Served from cache after 304 Not Modified: {self.not_modified_count}")
+        for stats in self.stage_stats:
+            logger.info(f"Stage {stats.report(self.elapsed)}")
+        if self.sink:
+            logger.info(f"Database: {self.sink.written} articles written to {self.sink.db.db_path}")
+        self.report_timings()
         logger.info(f"Output directory: {self.output_dir}")
-        logger.info(f"Summary file: scraped_summary.csv")
+        logger.info(f"Summary file: {self.summary_file}")
+        logger.info("="*50)
+
+    def report_timings(self):
+        """Log per-stage and per-host timings and write the metrics file, if any."""
+        if not REGISTRY.enabled:
+            return
+        for stage in SCRAPE_STAGES:
+            summary = STAGE_SECONDS.summary(stage)
+            if summary['count']:
+                logger.info(f"Timing {stage:8s}: {summary['count']} articles, {summary['sum']:.1f}s total, "
+                            f"mean {summary['mean'] * 1000:.1f} ms, p50 {summary['p50'] * 1000:.1f} ms, "
+                            f"p95 {summary['p95'] * 1000:.1f} ms")
+        for (host,), downloaded in sorted(HOST_BYTES.series().items()):
+            summary = HOST_SECONDS.summary(host)
+            logger.info(f"Host {host}: {summary['count']} requests, mean {summary['mean'] * 1000:.1f} ms, "
+                        f"p95 {summary['p95'] * 1000:.1f} ms, {downloaded / (1024 * 1024):.1f} MB downloaded")
+        if self.metrics_file:
+            try:
+                REGISTRY.write(self.metrics_file)
+                logger.info(f"Metrics written to {self.metrics_file}")
+            except OSError as e:
+                logger.error(f"Could not write metrics to {self.metrics_file}: {e}")
+
+    def reextract(self):
+        """Rebuild article files and the summary CSV from the raw cache, without network access."""
+        if not self.cache:
+            logger.error("Re-extraction needs a response cache")
+            return
+        
+        logger.info("Re-extracting articles from cache...")
+        urls = self.load_urls_from_csv()
+        entries = self.cache.entries()
+        
+        start = time.monotonic()
+        missing = 0
+        for article_id, url in urls:
+            entry = entries.get(url)
+            if not entry:
+                missing += 1
+                continue
+            try:
+                response = self.cache.as_response(entry)
+            except Exception as e:
+                self._record_result(self._record_failure(url, article_id, e), len(urls))
+                continue
+            self._record_result(self.process_response(url, article_id, response), len(urls))
+        self.elapsed = time.monotonic() - start
+        
+        self.journal.close()
+        self.save_summary_csv()
+        if self.sink:
+            self.sink.close()
+        
         logger.info("="*50)
+        logger.info("RE-EXTRACTION COMPLETE")
+        logger.info(f"Re-extracted: {self.success_count}")
+        logger.info(f"Errors: {self.error_count}")
+        logger.info(f"Not in cache: {missing}")
+        logger.info(f"Elapsed: {self.elapsed:.1f}s")
+        self.report_timings()
+        logger.info("="*50)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Scrape biology research articles listed in a CSV file.")
+    parser.add_argument('--input', default="SB_publication_PMC.csv", help="CSV file with Title,Link rows")
+    parser.add_argument('--output', default="scraped_articles", help="Directory for article_N.txt files")
+    parser.add_argument('--workers', type=int, default=1, help="Number of concurrent fetch threads")
+    parser.add_argument('--per-host', type=int, default=1, help="Maximum concurrent fetches per host")
+    parser.add_argument('--rate', type=float, default=1.0, help="Requests per second per host (0 disables)")
+    parser.add_argument('--burst', type=float, default=1.0, help="Token bucket capacity per host")
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help="Parse/clean in this many processes, pipelined with fetching (0 = inline)")
+    parser.add_argument('--queue-size', type=int, default=32, help="Bounded queue size between pipeline stages")
+    parser.add_argument('--max-memory-mb', type=float, default=DEFAULT_MAX_BODY_MEMORY / (1024 * 1024),
+                        help="Spool response bodies larger than this to disk")
+    parser.add_argument('--pdf-page-workers', type=int, default=1,
+                        help=f"Processes for PDFs with at least {PDF_PARALLEL_MIN_PAGES} pages")
+    parser.add_argument('--keep-paragraphs', action='store_true',
+                        help="Preserve line and paragraph breaks in cleaned text")
+    parser.add_argument('--db', help="Also write cleaned articles straight into this search database")
+    parser.add_argument('--no-text-files', action='store_true',
+                        help="Skip writing article_N.txt files (use with --db)")
+    parser.add_argument('--compress-db', action='store_true',
+                        help="Store article text zlib-compressed in the database (use with --db)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Collapse near-duplicate articles into one indexed article; needs numpy (use with --db)")
+    parser.add_argument('--cache-dir', default="raw_cache", help="Directory for cached raw responses")
+    parser.add_argument('--no-cache', action='store_true', help="Do not cache raw responses")
+    parser.add_argument('--reextract', action='store_true',
+                        help="Rebuild articles and summary from the cache without network access")
+    parser.add_argument('--metrics-file', help="Write per-stage and per-host timings here in Prometheus text format")
+    parser.add_argument('--no-metrics', action='store_true', help="Do not collect per-stage timings")
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point."""
+    args = parse_args(argv)
+    if args.no_metrics:
+        REGISTRY.enabled = False
     try:
-        scraper = ArticleScraper()
-        scraper.run()
+        scraper = ArticleScraper(
+            input_file=args.input,
+            output_dir=args.output,
+            workers=args.workers,
+            per_host_workers=args.per_host,
+            rate=args.rate,
+            burst=args.burst,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            parse_processes=args.parse_processes,
+            queue_size=args.queue_size,
+            max_body_memory=int(args.max_memory_mb * 1024 * 1024),
+            pdf_page_workers=args.pdf_page_workers,
+            keep_paragraphs=args.keep_paragraphs,
+            db_path=args.db,
+            export_text=not args.no_text_files,
+            compress_db=args.compress_db,
+            dedupe_db=args.dedupe,
+            metrics_file=args.metrics_file
+        )
+        if args.reextract:
+            scraper.reextract()
+        else:
+            scraper.run()
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         return 1
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Production server for the Biology Research Search Engine.
+
+Runs the web app in a pool of prefork worker processes that each open the
+database read-only and share its memory map through the page cache. The
+startup load from scraped_articles/ runs in the master before any worker
+is forked, in a separate ingest process next to the workers, or not at all;
+workers never write.
+
+Servers:
+    gunicorn  - gunicorn's prefork arbiter (gthread workers when --threads > 1)
+    prefork   - built-in: forks --workers copies of a Werkzeug server accepting
+                on one shared socket (POSIX only, no extra dependency)
+    waitress  - a single process with --threads threads (Windows)
+    auto      - gunicorn if installed, else prefork, else waitress
+
+Every option falls back to an environment variable (in brackets).
+
+Usage:
+    python serve.py --workers 8 --port 5000
+    python serve.py --ingest only        # load scraped_articles/ into the database and exit
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from database import DatabaseManager
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between respawns of one worker slot, so a worker that
+# crashes on startup does not turn the master into a fork loop
+RESPAWN_DELAY = 1.0
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def available_server(name: str) -> str:
+    """Resolve ``auto`` to the first server usable here."""
+    if name != 'auto':
+        return name
+    try:
+        import gunicorn  # noqa: F401
+        return 'gunicorn'
+    except ImportError:
+        pass
+    return 'prefork' if hasattr(os, 'fork') else 'waitress'
+
+
+def run_ingest(db_path: str) -> dict:
+    """Sync the database with the scraped files and update related articles, in this process."""
+    import app as search_app
+
+    database = search_app.open_database(db_path, read_only=False)
+    try:
+        # The workers' /readyz reports this state
+        database.set_ingest_state('loading')
+        try:
+            report = search_app.load_articles_from_files(database=database)
+        except BaseException:
+            database.set_ingest_state('failed')
+            raise
+        database.set_ingest_state('ready')
+        print(f"Articles: {report['added']} added, {report['changed']} changed, "
+              f"{report['unchanged']} unchanged, {report['removed']} removed in {report.get('seconds', 0):.2f}s")
+        if search_app.SIMILAR_ARTICLES:
+            from similarity import update_similarity_index
+            similarity = update_similarity_index(database)
+            print(f"Related articles: {similarity['mode']} update, {similarity['lists']} lists written "
+                  f"in {similarity['seconds']:.2f}s")
+        return report
+    finally:
+        database.close()
+
+
+def start_ingest_process(db_path: str) -> subprocess.Popen:
+    """Run the ingest in a separate interpreter so no worker or master state is shared with it."""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), '--ingest', 'only', '--db', db_path])
+
+
+def serve_gunicorn(application, args):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread' if args.threads > 1 else 'sync')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('timeout', args.timeout)
+
+        def load(self):
+            return application
+
+    StandaloneApplication().run()
+
+
+def serve_waitress(application, args):
+    import waitress
+
+    if args.workers > 1:
+        logger.warning("waitress serves from one process; ignoring --workers %d", args.workers)
+    waitress.serve(application, host=args.host, port=args.port, threads=args.threads)
+
+
+def serve_prefork(application, args):
+    """Fork ``args.workers`` Werkzeug servers accepting on one listening socket; respawn any that exit."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class RequestHandler(WSGIRequestHandler):
+        def log_request(self, code='-', size='-'):
+            if args.access_log:
+                super().log_request(code, size)
+
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    listener.set_inheritable(True)
+    children = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 0
+            try:
+                server = make_server(args.host, args.port, application, threaded=args.threads > 1,
+                                     request_handler=RequestHandler, fd=listener.fileno())
+                server.serve_forever()
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = (slot, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} prefork workers")
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if pid not in children:
+            continue  # the ingest process
+        slot, started = children.pop(pid)
+        if not stopping:
+            time.sleep(max(0.0, RESPAWN_DELAY - (time.monotonic() - started)))
+            spawn(slot)
+    listener.close()
+
+
+SERVERS = {'gunicorn': serve_gunicorn, 'prefork': serve_prefork, 'waitress': serve_waitress}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the search engine with several read-only workers.")
+    parser.add_argument('--db', default=os.environ.get('DB_PATH', 'biology_articles.db'),
+                        help="SQLite database [DB_PATH]")
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'), help="Bind address [HOST]")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)), help="Port [PORT]")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', default_workers())),
+                        help="Worker processes, default one per core [WEB_WORKERS]")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 1)),
+                        help="Threads per worker; the prefork server spawns a thread per connection "
+                             "when above 1 [WEB_THREADS]")
+    parser.add_argument('--server', choices=['auto'] + sorted(SERVERS), default=os.environ.get('WEB_SERVER', 'auto'),
+                        help="WSGI server [WEB_SERVER]")
+    parser.add_argument('--ingest', choices=['startup', 'background', 'off', 'only'],
+                        default=os.environ.get('INGEST', 'startup'),
+                        help="Load scraped_articles/ before forking workers, in a separate process while "
+                             "serving, not at all, or load and exit without serving [INGEST]")
+    parser.add_argument('--backlog', type=int, default=2048, help="Listen backlog of the prefork server")
+    parser.add_argument('--timeout', type=int, default=30, help="Seconds before gunicorn restarts a stuck worker")
+    parser.add_argument('--access-log', action='store_true', help="Log every request of the prefork server")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Create or migrate the schema here: the workers' read-only connections cannot.
+    # With a background ingest the workers report 'loading' from the moment they
+    # start until the ingest process records that it has finished.
+    database = DatabaseManager(args.db, search_cache_size=0)
+    if args.ingest == 'background':
+        database.set_ingest_state('loading')
+    elif args.ingest == 'off' or os.environ.get('LOAD_ARTICLES_FROM_FILES', '1') == '0':
+        database.set_ingest_state('skipped')
+    database.close()
+    os.environ['DB_PATH'] = args.db
+    os.environ['DB_READ_ONLY'] = '1'
+
+    if args.ingest == 'only':
+        run_ingest(args.db)
+        return
+    if args.ingest == 'startup' and os.environ.get('LOAD_ARTICLES_FROM_FILES', '1') != '0':
+        run_ingest(args.db)
+        # The workers inherit the registry; keep the ingest's statements out of their series
+        REGISTRY.clear()
+
+    from wsgi import create_app
+    application = create_app(args.db, read_only=True)
+
+    ingest = start_ingest_process(args.db) if args.ingest == 'background' else None
+    server = available_server(args.server)
+    try:
+        SERVERS[server](application, args)
+    finally:
+        if ingest is not None and ingest.poll() is None:
+            ingest.terminate()
+            ingest.wait()
+            database = DatabaseManager(args.db, search_cache_size=0)
+            database.set_ingest_state('failed')
+            database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,11 @@ def verify_installation():
         'PyMuPDF': 'fitz',
         'lxml': 'lxml'
     }
+    # Only needed for related articles and near-duplicate detection
+    optional_packages = {
+        'numpy': 'numpy',
+        'scipy': 'scipy'
+    }
     
     all_good = True
     
@@ -41,6 +46,13 @@ def verify_installation():
             print(f"❌ {package_name} - FAILED")
             all_good = False
     
+    for package_name, import_name in optional_packages.items():
+        try:
+            __import__(import_name)
+            print(f"✅ {package_name} - OK")
+        except ImportError:
+            print(f"⚠️  {package_name} - not installed (optional, see requirements.txt)")
+    
     return all_good
 
 def check_input_file():
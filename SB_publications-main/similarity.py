@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Related articles for the Biology Research Search Engine.
+
+Builds an offline TF-IDF index of the articles table with NumPy/SciPy sparse
+matrices, optionally reduced with LSA (truncated SVD), precomputes every
+article's most similar articles by cosine similarity and stores them in the
+article_neighbors table, where /api/similar and the article page read them
+with one primary-key lookup.
+
+The fitted model (vocabulary, IDF weights, LSA components and document
+vectors) is stored in the database as well. When an ingest adds, changes or
+removes articles, only those are vectorized and only the lists they enter or
+leave are recomputed; the vocabulary is refitted by a full rebuild once the
+articles touched since the last fit exceed REBUILD_FRACTION of the corpus.
+
+Usage: python similarity.py [--db biology_articles.db] [--full] [--neighbors 10] [--lsa 100]
+"""
+
+import argparse
+import io
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from database import DatabaseManager
+
+MODEL_NAME = 'tfidf'
+DEFAULT_NEIGHBORS = 10
+# Highest-weighted terms kept per document vector; the tail barely moves cosine scores
+DEFAULT_MAX_TERMS = 200
+# Terms in fewer documents than MIN_DF or in more than MAX_DF of them are not indexed
+MIN_DF = 2
+MAX_DF = 0.5
+# Refit the vocabulary once this fraction of the corpus changed since the last fit
+REBUILD_FRACTION = 0.2
+# Upper bound on the similarity scores held in memory at once
+SCORE_BLOCK = 1 << 22
+
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9]{2,}')
+
+
+def term_counts(title: str, text: str) -> Counter:
+    """Count the index terms of one article; the title is counted like body text."""
+    return Counter(TOKEN_PATTERN.findall(f"{title or ''} {text or ''}".lower()))
+
+
+def normalize_rows(vectors):
+    """Scale each row of a sparse or dense matrix to unit length, leaving empty rows empty."""
+    if sparse.issparse(vectors):
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1
+    return (vectors / norms[:, None]).astype(np.float32)
+
+
+def dense_scores(left, right) -> np.ndarray:
+    """Cosine similarities between the rows of two normalized matrices, as a dense array."""
+    scores = left @ right.T
+    return scores.toarray() if sparse.issparse(scores) else np.asarray(scores)
+
+
+class SimilarityModel:
+    """Document vectors for the corpus and the vocabulary and weights they were computed with."""
+
+    def __init__(self, terms: List[str], idf: np.ndarray, components: np.ndarray, article_ids: List[int],
+                 versions: List[str], vectors, neighbors: int, max_terms: int, fitted: int, drift: int = 0):
+        self.terms = list(terms)
+        self.columns = {term: column for column, term in enumerate(self.terms)}
+        self.idf = idf
+        # LSA projection (components x terms); None for plain TF-IDF vectors
+        self.components = components if components is not None and len(components) else None
+        self.article_ids = list(article_ids)
+        self.versions = list(versions)
+        self.vectors = vectors
+        self.neighbors = neighbors
+        self.max_terms = max_terms
+        # Corpus size at the last fit and articles vectorized or removed since
+        self.fitted = fitted
+        self.drift = drift
+
+    @classmethod
+    def fit(cls, article_ids: List[int], versions: List[str], counts: List[Counter],
+            neighbors: int = DEFAULT_NEIGHBORS, components: int = 0,
+            max_terms: int = DEFAULT_MAX_TERMS) -> 'SimilarityModel':
+        """Choose the vocabulary and IDF weights from ``counts`` and vectorize every document."""
+        documents = len(counts)
+        frequencies = Counter()
+        for document in counts:
+            frequencies.update(document.keys())
+        max_df = max(MAX_DF * documents, MIN_DF)
+        terms = sorted(term for term, df in frequencies.items() if MIN_DF <= df <= max_df)
+        idf = np.array([math.log((1 + documents) / (1 + frequencies[term])) + 1 for term in terms],
+                       dtype=np.float32)
+        model = cls(terms, idf, None, article_ids, versions, None, neighbors, max_terms, documents)
+
+        tfidf = model.tfidf(counts)
+        rank = min(components, min(tfidf.shape) - 1)
+        if rank > 0:
+            # Deterministic start vector, so rebuilding the same corpus gives the same lists
+            _, _, model.components = svds(tfidf.astype(np.float64), k=rank,
+                                          v0=np.ones(min(tfidf.shape)) / math.sqrt(min(tfidf.shape)))
+            model.components = model.components.astype(np.float32)
+        model.vectors = model.project(tfidf)
+        return model
+
+    def tfidf(self, counts: List[Counter]) -> sparse.csr_matrix:
+        """Sublinear TF-IDF rows over the model's vocabulary, pruned to max_terms and normalized."""
+        columns = self.columns
+        indices, data, indptr = [], [], [0]
+        for document in counts:
+            for term, count in document.items():
+                column = columns.get(term)
+                if column is not None:
+                    indices.append(column)
+                    data.append(count)
+            indptr.append(len(indices))
+        indices = np.array(indices, dtype=np.int32)
+        indptr = np.array(indptr, dtype=np.int64)
+        weights = (1 + np.log(np.array(data, dtype=np.float32))) * self.idf[indices]
+
+        lengths = np.diff(indptr)
+        if self.max_terms and lengths.max(initial=0) > self.max_terms:
+            keep = np.ones(len(weights), dtype=bool)
+            for row in np.flatnonzero(lengths > self.max_terms):
+                start, end = indptr[row], indptr[row + 1]
+                dropped = end - start - self.max_terms
+                keep[start + np.argpartition(weights[start:end], dropped)[:dropped]] = False
+            rows = np.repeat(np.arange(len(counts)), lengths)[keep]
+            indices, weights = indices[keep], weights[keep]
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(counts)))])
+        matrix = sparse.csr_matrix((weights, indices, indptr), shape=(len(counts), len(self.terms)))
+        matrix.sort_indices()
+        return normalize_rows(matrix)
+
+    def project(self, tfidf: sparse.csr_matrix):
+        """Map TF-IDF rows into the space neighbors are compared in."""
+        if self.components is None:
+            return tfidf
+        return normalize_rows(np.asarray(tfidf @ self.components.T))
+
+    def nearest(self, rows: Iterable[int]) -> Dict[int, List[Tuple[int, float]]]:
+        """Top-k (article_id, score) neighbors of the documents at the given row positions."""
+        rows = np.asarray(sorted(rows), dtype=np.int64)
+        total = self.vectors.shape[0]
+        k = min(self.neighbors, total - 1)
+        lists = {}
+        block = max(SCORE_BLOCK // max(total, 1), 1)
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            scores = dense_scores(self.vectors, self.vectors[chunk])
+            # An article is never its own neighbor
+            scores[chunk, np.arange(len(chunk))] = -1
+            top = np.argpartition(-scores, k - 1, axis=0)[:k] if k > 0 else np.empty((0, len(chunk)), int)
+            for column, row in enumerate(chunk):
+                candidates = sorted(((-scores[i, column], self.article_ids[i]) for i in top[:, column]))
+                lists[self.article_ids[row]] = [(article_id, round(float(-score), 4))
+                                                for score, article_id in candidates if -score > 0]
+        return lists
+
+    def to_bytes(self) -> bytes:
+        arrays = {
+            'terms': np.array(self.terms, dtype=str),
+            'idf': self.idf,
+            'components': self.components if self.components is not None else np.zeros((0, len(self.terms)),
+                                                                                          np.float32),
+            'article_ids': np.array(self.article_ids, dtype=np.int64),
+            'versions': np.array(self.versions, dtype=str),
+            'settings': np.array([self.neighbors, self.max_terms, self.fitted, self.drift], dtype=np.int64),
+        }
+        if sparse.issparse(self.vectors):
+            arrays.update(data=self.vectors.data, indices=self.vectors.indices, indptr=self.vectors.indptr)
+        else:
+            arrays['vectors'] = self.vectors
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SimilarityModel':
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        terms = arrays['terms'].tolist()
+        if 'vectors' in arrays:
+            vectors = arrays['vectors']
+        else:
+            vectors = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                        shape=(len(arrays['article_ids']), len(terms)))
+        neighbors, max_terms, fitted, drift = arrays['settings'].tolist()
+        return cls(terms, arrays['idf'], arrays['components'], arrays['article_ids'].tolist(),
+                   arrays['versions'].tolist(), vectors, neighbors, max_terms, fitted, drift)
+
+
+def read_counts(database: DatabaseManager, article_ids: Iterable[int]) -> Tuple[List[int], List[Counter]]:
+    """Term counts of the given articles, with the ids of those that still exist."""
+    ids, counts = [], []
+    for article_id, title, text in database.iter_article_texts(article_ids):
+        ids.append(article_id)
+        counts.append(term_counts(title, text))
+    return ids, counts
+
+
+def build_similarity_index(database: DatabaseManager, neighbors: int = DEFAULT_NEIGHBORS, components: int = 0,
+                           max_terms: int = DEFAULT_MAX_TERMS) -> Dict:
+    """Fit the model on the whole corpus and replace every related-article list."""
+    start = time.perf_counter()
+    versions = database.get_article_versions()
+    article_ids, counts = read_counts(database, sorted(versions))
+    model = SimilarityModel.fit(article_ids, [versions[i] for i in article_ids], counts,
+                                neighbors=neighbors, components=components, max_terms=max_terms)
+    lists = model.nearest(range(len(article_ids)))
+    data = model.to_bytes()
+    database.save_similarity(MODEL_NAME, data, lists, replace=True)
+    return similarity_report(model, 'full', len(article_ids), len(lists), data, start)
+
+
+def update_similarity_index(database: DatabaseManager, **options) -> Dict:
+    """Bring the related-article lists up to date after an ingest.
+
+    Added and changed articles are vectorized with the stored model and get
+    new lists. Other articles get a new list only if one of its neighbors was
+    changed or removed, or if a vectorized article scores above its current
+    last neighbor. Without a stored model, or once the corpus has drifted too
+    far from the one the model was fitted on, this is a full rebuild with
+    ``options``.
+    """
+    start = time.perf_counter()
+    data = database.get_similarity_model(MODEL_NAME)
+    if data is None:
+        return build_similarity_index(database, **options)
+    model = SimilarityModel.from_bytes(data)
+
+    versions = database.get_article_versions()
+    known = dict(zip(model.article_ids, model.versions))
+    removed = [article_id for article_id in known if article_id not in versions]
+    changed = sorted(article_id for article_id, version in versions.items() if known.get(article_id) != version)
+    if not removed and not changed:
+        return similarity_report(model, 'unchanged', 0, 0, data, start)
+    model.drift += len(removed) + len(changed)
+    if model.drift > REBUILD_FRACTION * max(model.fitted, 1):
+        options = dict({'neighbors': model.neighbors, 'max_terms': model.max_terms,
+                        'components': 0 if model.components is None else len(model.components)}, **options)
+        return build_similarity_index(database, **options)
+
+    gone = set(removed) | set(changed)
+    keep = [row for row, article_id in enumerate(model.article_ids) if article_id not in gone]
+    changed, counts = read_counts(database, changed)
+    new_vectors = model.project(model.tfidf(counts))
+    if sparse.issparse(new_vectors):
+        model.vectors = sparse.vstack([model.vectors[keep], new_vectors], format='csr')
+    else:
+        model.vectors = np.vstack([model.vectors[keep], new_vectors])
+    model.article_ids = [model.article_ids[row] for row in keep] + changed
+    model.versions = [versions[article_id] for article_id in model.article_ids]
+
+    # Existing lists that lost a neighbor or that a vectorized article now enters
+    current = database.get_neighbor_lists()
+    dirty = set(range(len(keep), len(model.article_ids)))
+    best = np.zeros(len(keep), dtype=np.float32)
+    if changed:
+        block = max(SCORE_BLOCK // len(changed), 1)
+        for row in range(0, len(keep), block):
+            end = min(row + block, len(keep))
+            best[row:end] = dense_scores(model.vectors[row:end], new_vectors).max(axis=1)
+    for row in range(len(keep)):
+        pairs = current.get(model.article_ids[row], [])
+        threshold = pairs[-1][1] if len(pairs) >= model.neighbors else 0
+        if best[row] > threshold or any(neighbor_id in gone for neighbor_id, _ in pairs):
+            dirty.add(row)
+
+    lists = model.nearest(dirty)
+    data = model.to_bytes()
+    database.save_similarity(MODEL_NAME, data, lists, removed=removed)
+    return similarity_report(model, 'incremental', len(changed), len(lists), data, start)
+
+
+def similarity_report(model: SimilarityModel, mode: str, vectorized: int, lists: int, data: bytes,
+                      start: float) -> Dict:
+    return {
+        'mode': mode,
+        'articles': len(model.article_ids),
+        'vectorized': vectorized,
+        'lists': lists,
+        'terms': len(model.terms),
+        'components': 0 if model.components is None else len(model.components),
+        'model_bytes': len(data),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the related-articles index.")
+    parser.add_argument('--db', default='biology_articles.db', help="SQLite database file")
+    parser.add_argument('--full', action='store_true', help="Refit the model instead of updating it")
+    parser.add_argument('--neighbors', type=int, default=DEFAULT_NEIGHBORS, help="Related articles per article")
+    parser.add_argument('--lsa', type=int, default=0, help="Reduce the vectors to this many LSA components")
+    parser.add_argument('--max-terms', type=int, default=DEFAULT_MAX_TERMS,
+                        help="Highest-weighted terms kept per article (0 keeps all)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+
+    db = DatabaseManager(args.db, search_cache_size=0)
+    options = {'neighbors': args.neighbors, 'components': args.lsa, 'max_terms': args.max_terms}
+    report = build_similarity_index(db, **options) if args.full else update_similarity_index(db, **options)
+    db.close()
+
+    print(f"{report['mode'].capitalize()}: {report['articles']} articles, {report['vectorized']} vectorized, "
+          f"{report['lists']} lists written, {report['terms']} terms, "
+          f"{report['components'] or 'no'} LSA components, "
+          f"{report['model_bytes'] / 1024:.0f} KB model ({report['seconds']:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -2,11 +2,21 @@
 """
 Test script for the article scraper.
 Tests with a few URLs to verify everything is working correctly.
+
+Run with --offline to exercise the concurrent fetch engine against a local
+stand-in HTTP server instead of PubMed Central.
 """
 
 import os
+import sys
 import csv
-from scrape_articles import ArticleScraper
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from database import DatabaseManager
+from scrape_articles import ArticleScraper, ProgressJournal, PDF_PARALLEL_MIN_PAGES, parse_pdf
 
 def create_test_csv():
     """Create a small test CSV with a few URLs for testing."""
@@ -64,5 +74,1055 @@ def test_scraper():
     
     print("\nTest completed! Check test_scraped_articles/ folder and logs.")
 
+def make_pdf(title: str, pages: int = 1) -> bytes:
+    """Build a small synthetic PDF in memory."""
+    import fitz
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Synthetic PDF study {title} page {page_num}")
+        page.insert_text((72, 100), "Bone loss and muscle atrophy were measured in spaceflight mice. " * 2)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class LocalArticleHandler(BaseHTTPRequestHandler):
+    """Serves synthetic article pages, simulating network latency."""
+
+    latency = 0.05
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.path.startswith('/pdf/'):
+            # Mislabelled PDF: only the magic bytes identify it
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.end_headers()
+            self.wfile.write(make_pdf(self.path))
+            return
+        etag = f'"{self.path}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = (
+            "<html><body><nav>Skip me</nav><article>"
+            f"<h1>Synthetic microgravity study {self.path}</h1>"
+            + "<p>Bone loss and muscle atrophy were measured in spaceflight mice.</p>" * 20
+            + "</article></body></html>"
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server() -> ThreadingHTTPServer:
+    """Start the stand-in article server on a free localhost port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LocalArticleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_local_csv(tmp: str, base_url: str, count: int = 40) -> str:
+    """Write an input CSV pointing at the local server; every 10th link is a PDF."""
+    input_file = os.path.join(tmp, 'articles.csv')
+    with open(input_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Title', 'Link'])
+        for i in range(count):
+            path = 'pdf' if i % 10 == 0 else 'article'
+            writer.writerow([f"Article {i}", f"{base_url}/{path}/{i}"])
+    return input_file
+
+
+def make_local_scraper(tmp: str, input_file: str, journal_name: str = 'journal.jsonl', **kwargs) -> ArticleScraper:
+    """Create a scraper whose outputs all live under tmp."""
+    options = dict(
+        input_file=input_file,
+        output_dir=os.path.join(tmp, 'articles'),
+        workers=8,
+        per_host_workers=8,
+        rate=0,
+        journal_file=os.path.join(tmp, journal_name),
+        progress_file=os.path.join(tmp, 'progress.json'),
+        summary_file=os.path.join(tmp, 'summary.csv'),
+        cache_dir=os.path.join(tmp, 'raw_cache')
+    )
+    options.update(kwargs)
+    return ArticleScraper(**options)
+
+
+def test_concurrent_scraper_offline():
+    """Scrape 40 local articles concurrently and check counts and summary output."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper = make_local_scraper(tmp, write_local_csv(tmp, base_url))
+            scraper.run()
+
+            assert scraper.success_count == 40
+            assert scraper.error_count == 0
+            assert scraper.request_count == 40
+            assert scraper.requests_saved == 40
+            assert len(os.listdir(os.path.join(tmp, 'articles'))) == 40
+
+            with open(os.path.join(tmp, 'summary.csv'), 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            assert sorted(int(row['article_id']) for row in rows) == list(range(1, 41))
+            assert sum(row['content_type'] == 'PDF' for row in rows) == 4
+
+            print(f"Offline run: {len(rows)} articles in {scraper.elapsed:.2f}s "
+                  f"({len(rows) / scraper.elapsed:.1f} articles/s)")
+    finally:
+        server.shutdown()
+
+
+def test_cache_revalidation_and_reextract_offline():
+    """Unchanged articles cost a 304, and --reextract rebuilds output with no server."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = write_local_csv(tmp, base_url)
+            make_local_scraper(tmp, input_file).run()
+
+            # Fresh journal forces every URL to be fetched again
+            scraper = make_local_scraper(tmp, input_file, journal_name='journal2.jsonl')
+            scraper.run()
+            assert scraper.success_count == 40
+            assert scraper.not_modified_count == 36  # the PDFs carry no ETag
+
+            server.shutdown()
+            articles_dir = os.path.join(tmp, 'articles')
+            for name in os.listdir(articles_dir):
+                os.unlink(os.path.join(articles_dir, name))
+            os.unlink(os.path.join(tmp, 'summary.csv'))
+
+            scraper = make_local_scraper(tmp, input_file)
+            scraper.reextract()
+            assert scraper.success_count == 40
+            assert len(os.listdir(articles_dir)) == 40
+            with open(os.path.join(tmp, 'summary.csv'), 'r', encoding='utf-8') as f:
+                assert len(list(csv.DictReader(f))) == 40
+    finally:
+        server.shutdown()
+
+
+def test_process_pool_pipeline_offline():
+    """The fetch/parse/write pipeline produces the same output as the inline path."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper = make_local_scraper(tmp, write_local_csv(tmp, base_url), parse_processes=2, queue_size=4)
+            scraper.run()
+
+            assert scraper.success_count == 40
+            assert scraper.error_count == 0
+            assert [stats.items for stats in scraper.stage_stats] == [40, 40, 40]
+
+            with open(os.path.join(tmp, 'summary.csv'), 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            assert sorted(int(row['article_id']) for row in rows) == list(range(1, 41))
+            assert sum(row['content_type'] == 'PDF' for row in rows) == 4
+
+            for stats in scraper.stage_stats:
+                print(stats.report(scraper.elapsed))
+    finally:
+        server.shutdown()
+
+
+def test_pipeline_interrupt_does_not_hang():
+    """Ctrl-C with both pipeline queues full stops the fetchers and dispatcher instead of deadlocking."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper = make_local_scraper(tmp, write_local_csv(tmp, base_url), parse_processes=1, queue_size=1)
+            write_parsed = scraper._write_parsed
+
+            def interrupt_once_queues_fill(*args):
+                # Let the fetchers fill raw_queue and the dispatcher parsed_queue
+                time.sleep(1)
+                scraper._write_parsed = write_parsed
+                raise KeyboardInterrupt
+
+            scraper._write_parsed = interrupt_once_queues_fill
+            runner = threading.Thread(target=scraper.run, daemon=True)
+            runner.start()
+            runner.join(timeout=30)
+
+            assert not runner.is_alive()
+            assert scraper.success_count < 40
+    finally:
+        server.shutdown()
+
+
+def test_failed_parse_submit_discards_spool_file():
+    """A body spooled to disk is deleted when the parse pool refuses it, and the article is recorded as failed."""
+    import queue
+    from concurrent.futures import ProcessPoolExecutor
+    from scrape_articles import StageStats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = make_local_scraper(tmp, os.path.join(tmp, 'articles.csv'), parse_processes=1)
+        spool_path = os.path.join(tmp, 'body.pdf')
+        with open(spool_path, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        pool = ProcessPoolExecutor(max_workers=1)
+        pool.shutdown()
+
+        raw_queue, parsed_queue = queue.Queue(), queue.Queue()
+        raw_queue.put((1, 'http://x/pdf/1', spool_path, 'application/pdf', None))
+        scraper._dispatch_parses(1, raw_queue, parsed_queue, pool, StageStats('parse', 1), threading.Event())
+
+        article_id, _, future, error = parsed_queue.get_nowait()
+        assert article_id == 1 and future is None and isinstance(error, RuntimeError)
+        assert not os.path.exists(spool_path)
+
+
+def test_spooled_pdf_extraction_offline():
+    """Bodies over the memory cap are spooled to disk and still extracted, inline and pipelined."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        for parse_processes in (0, 2):
+            with tempfile.TemporaryDirectory() as tmp:
+                scraper = make_local_scraper(tmp, write_local_csv(tmp, base_url), max_body_memory=1024,
+                                             parse_processes=parse_processes, cache_dir=None)
+                scraper.run()
+                assert scraper.success_count == 40
+                assert scraper.error_count == 0
+                assert not [name for name in os.listdir(tempfile.gettempdir()) if name.endswith('.body')]
+    finally:
+        server.shutdown()
+
+
+def test_parallel_pdf_pages_match_serial():
+    """Page-parallel extraction of a long PDF gives the same text as a serial pass."""
+    data = make_pdf('long supplement', pages=PDF_PARALLEL_MIN_PAGES)
+    assert parse_pdf(data, page_workers=2) == parse_pdf(data)
+
+
+def test_clean_text_matches_legacy_cleaner():
+    """The single-pass cleaner matches the original multi-pass one on raw text, and keeps paragraphs on request."""
+    import random
+    import re
+    from benchmark_clean_text import legacy_clean_text
+    from scrape_articles import clean_text
+
+    samples = [
+        '', '   ', '\n\n', '  Leading and trailing  \t\n',
+        'Abstract\nBone loss in microgravity.\n\n\nMethods:  mice (n=12) were flown.',
+        'Results \u2022 muscle \u00a9 2021 \u2192 atrophy \u00b5m; p < 0.05 & 50% [fig. 2]',
+        'caf\u00e9 na\u00efve_text \u00a0 non-breaking\u00a0space \r\n windows line',
+        '**** ### ~~~ \u2022\u2022\u2022 runs of noise ~~~ ***',
+        'path/to\\file "quoted" \'single\' {braces} (parens)',
+    ]
+    alphabet = list('ab Z9_\u00e9.,;:!?-()[]{}"\'/\\') + ['\n', '\n\n', '\t', '\r', '  ', '\u2022', '\u00a9',
+                                                          '\u00a0', '\u2192', '\x0c', '%', '&', '*', '~']
+    rng = random.Random(7)
+    samples += [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))) for _ in range(500)]
+
+    for text in samples:
+        assert clean_text(text) == legacy_clean_text(text), repr(text)
+        # Keeping paragraphs only changes which separator the line breaks become
+        kept = clean_text(text, keep_paragraphs=True)
+        assert not kept.startswith((' ', '\n')) and not kept.endswith((' ', '\n'))
+        assert '\n\n\n' not in kept and ' \n' not in kept and '\n ' not in kept
+        assert re.sub(r'\n+', ' ', kept) == legacy_clean_text(text), repr(text)
+
+    assert clean_text(' Intro\n\n\n  Methods \u2022  used\nline two  \n \n Results \u00a9 ',
+                      keep_paragraphs=True) == 'Intro\n\nMethods used\nline two\n\nResults'
+    assert clean_text(' Intro\n\n\n  Methods \u2022  used\nline two ') == 'Intro Methods used line two'
+
+
+def test_database_sink_offline():
+    """With a database sink and no text export, articles land straight in the search index."""
+    server = start_local_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        for parse_processes in (0, 2):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, 'articles.db')
+                # The stand-in pages are near-identical, so index every one of them
+                scraper = make_local_scraper(tmp, write_local_csv(tmp, base_url), db_path=db_path,
+                                             export_text=False, parse_processes=parse_processes, dedupe_db=False)
+                scraper.run()
+
+                assert scraper.sink.written == 40
+                assert not os.listdir(os.path.join(tmp, 'articles'))
+                db = DatabaseManager(db_path)
+                assert db.get_statistics()['total_articles'] == 40
+                assert len(db.search_articles('spaceflight', limit=100)) == 40
+                with open(os.path.join(tmp, 'summary.csv'), 'r', encoding='utf-8') as f:
+                    assert len(list(csv.DictReader(f))) == 40
+    finally:
+        server.shutdown()
+
+
+def test_journal_resume_and_compaction():
+    """A torn final line is ignored, resumed runs keep earlier sessions' summary rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'journal.jsonl')
+        journal = ProgressJournal(path, fsync_every=2)
+        for i in range(1, 4):
+            journal.append({'article_id': i, 'url': f"http://x/{i}", 'word_count': 10 * i,
+                            'saved_file_path': f"article_{i}.txt", 'content_type': 'HTML', 'status': 'ok'})
+        journal.close()
+        with open(path, 'ab') as f:
+            f.write(b'{"article_id": 4, "url": "http://x/4", "sta')
+
+        journal = ProgressJournal(path)
+        assert len(journal.load()) == 3
+        journal.append({'article_id': 5, 'url': "http://x/5", 'word_count': 50,
+                        'saved_file_path': "article_5.txt", 'content_type': 'PDF', 'status': 'ok'})
+        journal.append({'article_id': 2, 'url': "http://x/2", 'word_count': 0,
+                        'saved_file_path': 'ERROR', 'content_type': 'ERROR', 'status': 'error'})
+        journal.close()
+
+        journal = ProgressJournal(path)
+        journal.load()
+        assert journal.completed_urls() == {"http://x/1", "http://x/3", "http://x/5"}
+
+        summary = os.path.join(tmp, 'summary.csv')
+        assert journal.compact_summary(summary) == 3
+        with open(summary, 'r', encoding='utf-8') as f:
+            assert [row['article_id'] for row in csv.DictReader(f)] == ['1', '3', '5']
+
+
+def write_summary(path: str, files: Dict[int, str]):
+    """Write a scraper summary CSV listing ``files`` by article id."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['article_id', 'url', 'word_count', 'saved_file_path', 'content_type'])
+        for article_id, file_path in sorted(files.items()):
+            writer.writerow([article_id, f"http://x/{article_id}", 3, file_path, 'HTML'])
+
+
+def test_bulk_load_rebuilds_index_in_one_transaction():
+    """A bulk load fills an empty database with a consistent FTS index, and a failed batch leaves no rows."""
+    import sqlite3
+
+    def batches(count, fail_after=None):
+        for start in range(0, count, 50):
+            if fail_after is not None and start >= fail_after:
+                raise RuntimeError("scraped file unreadable")
+            yield [{'article_id': i, 'url': f"http://x/{i}", 'title': f"Article {i}",
+                    'content': f"microgravity osteoclast sample{i}", 'word_count': 3,
+                    'content_type': 'html', 'file_path': ''} for i in range(start + 1, min(start + 50, count) + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.db')
+        db = DatabaseManager(path, search_cache_size=0)
+        assert db.bulk_insert_articles(batches(120)) == 120
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 120
+        assert db.maintain_index()['integrity'] == 'ok'
+        assert db.search_page('osteoclast')['total'] == 120
+        assert [r['article_id'] for r in db.search_articles('sample77')] == [77]
+        db.close()
+
+        path = os.path.join(tmp, 'failed.db')
+        db = DatabaseManager(path, search_cache_size=0)
+        try:
+            db.bulk_insert_articles(batches(120, fail_after=100))
+            assert False, "the failing batch must propagate"
+        except RuntimeError:
+            pass
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0
+            assert conn.execute('SELECT COUNT(*) FROM passages').fetchone()[0] == 0
+        # The dropped index triggers came back with the rollback
+        db.insert_articles(next(batches(5)))
+        assert db.search_page('osteoclast')['total'] == 5
+        assert db.maintain_index()['integrity'] == 'ok'
+        db.close()
+
+
+def test_incremental_reingest_touches_only_changed_files():
+    """Re-ingest skips unchanged files unread, refreshes touched ones, and adds, updates and removes the rest."""
+    import app as search_app
+
+    texts = {1: 'osteoclast bone density', 2: 'muscle atrophy spaceflight', 3: 'plant root gravitropism',
+             4: 'radiation dna damage'}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {}
+        for article_id, text in texts.items():
+            files[article_id] = os.path.join(tmp, f"article_{article_id}.txt")
+            with open(files[article_id], 'w', encoding='utf-8') as f:
+                f.write(text)
+        summary_csv = os.path.join(tmp, 'summary.csv')
+        write_summary(summary_csv, files)
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0)
+
+        reads = []
+        read_article_row = search_app.read_article_row
+        search_app.read_article_row = lambda row: reads.append(row['article_id']) or read_article_row(row)
+        try:
+            report = search_app.load_articles_from_files(summary_csv, database=db)
+            assert (report['added'], report['changed'], report['unchanged'], report['removed']) == (4, 0, 0, 0)
+
+            reads.clear()
+            report = search_app.load_articles_from_files(summary_csv, database=db)
+            assert report['unchanged'] == 4 and reads == []
+
+            # Touch 1, edit 2, delete 3's file, add 5
+            mtime_ns = os.stat(files[1]).st_mtime_ns + 5_000_000_000
+            os.utime(files[1], ns=(mtime_ns, mtime_ns))
+            with open(files[2], 'w', encoding='utf-8') as f:
+                f.write('zebrafish heart regeneration')
+            os.unlink(files[3])
+            files[5] = os.path.join(tmp, 'article_5.txt')
+            with open(files[5], 'w', encoding='utf-8') as f:
+                f.write('tardigrade desiccation tolerance')
+            write_summary(summary_csv, files)
+
+            reads.clear()
+            report = search_app.load_articles_from_files(summary_csv, database=db)
+            assert (report['added'], report['changed'], report['unchanged'], report['removed'],
+                    report['missing']) == (1, 1, 2, 1, 1)
+            assert sorted(reads) == ['1', '2', '5']
+            assert db.get_sources()[1]['mtime_ns'] == mtime_ns
+
+            assert [r['article_id'] for r in db.search_articles('zebrafish')] == [2]
+            assert db.search_articles('atrophy') == [] and db.search_articles('gravitropism') == []
+            assert [r['article_id'] for r in db.search_articles('tardigrade')] == [5]
+            assert not db.get_article(3) and db.get_article(1)['content'] == texts[1]
+
+            # A full reload reads everything and still drops articles whose file is gone
+            os.unlink(files[4])
+            report = search_app.load_articles_from_files(summary_csv, database=db, full=True)
+            assert (report['changed'], report['unchanged'], report['removed']) == (3, 0, 1)
+            assert db.search_articles('radiation') == [] and sorted(db.get_sources()) == [1, 2, 5]
+            assert db.maintain_index()['integrity'] == 'ok'
+        finally:
+            search_app.read_article_row = read_article_row
+            db.close()
+
+
+def test_background_load_reports_progress_and_readiness():
+    """The startup load goes loading -> ready with progress, /readyz follows it, and a broken summary fails it."""
+    import json
+    import app as search_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {}
+        for article_id in range(1, 4):
+            files[article_id] = os.path.join(tmp, f"article_{article_id}.txt")
+            with open(files[article_id], 'w', encoding='utf-8') as f:
+                f.write(f"osteoclast study {article_id}")
+        summary_csv = os.path.join(tmp, 'summary.csv')
+        write_summary(summary_csv, files)
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0)
+
+        release = threading.Event()
+        read_article_row = search_app.read_article_row
+        saved = (search_app.db, search_app.SUMMARY_CSV, search_app.SIMILAR_ARTICLES, dict(search_app.load_status))
+        search_app.db, search_app.SUMMARY_CSV, search_app.SIMILAR_ARTICLES = db, summary_csv, False
+        search_app.read_article_row = lambda row: release.wait(10) and read_article_row(row)
+        try:
+            client = search_app.app.test_client()
+            # Served without starting a load (gunicorn app:app): nothing recorded in the database, so ready
+            assert client.get('/readyz').status_code == 200
+            loader = search_app.start_background_load()
+            deadline = time.monotonic() + 10
+            while search_app.get_load_status()['total'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            status = search_app.get_load_status()
+            assert (status['state'], status['processed'], status['total']) == ('loading', 0, 3)
+            readyz = client.get('/readyz')
+            assert readyz.status_code == 503 and json.loads(readyz.data)['load']['state'] == 'loading'
+
+            release.set()
+            loader.join(timeout=10)
+            status = search_app.get_load_status()
+            assert (status['state'], status['processed'], status['total']) == ('ready', 3, 3)
+            assert status['report']['added'] == 3 and status['finished_at']
+            assert client.get('/readyz').status_code == 200
+            assert db.search_page('osteoclast')['total'] == 3
+
+            with open(summary_csv, 'w', encoding='utf-8') as f:
+                f.write('article_id,url\nnot-a-number,http://x\n')
+            search_app.run_background_load()
+            status = search_app.get_load_status()
+            assert status['state'] == 'failed' and status['error']
+            assert client.get('/readyz').status_code == 503
+        finally:
+            search_app.read_article_row = read_article_row
+            search_app.db, search_app.SUMMARY_CSV, search_app.SIMILAR_ARTICLES = saved[:3]
+            search_app.update_load_status(**saved[3])
+            db.close()
+
+
+def test_pooled_connections_under_concurrent_writes():
+    """Pooled readers reuse a bounded set of connections and see rows committed by the writer."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), read_pool_size=2)
+        errors = []
+
+        def write():
+            for i in range(1, 51):
+                db.insert_articles([{'article_id': i, 'url': f"http://x/{i}", 'title': f"Article {i}",
+                                     'content': 'spaceflight biology', 'word_count': 2,
+                                     'content_type': 'html', 'file_path': ''}])
+
+        def read():
+            try:
+                for _ in range(50):
+                    db.search_articles('spaceflight')
+                    db.get_statistics()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert db.read_pool._created <= 2
+        assert db.get_statistics()['total_articles'] == 50
+        assert db.get_article(50)['title'] == "Article 50"
+        db.close()
+
+
+def test_search_pagination_cursor_matches_offset():
+    """Cursor pages walk the same ranked hits as offset pages, with an exact total."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        db.insert_articles([{'article_id': i, 'url': f"http://x/{i}", 'title': f"Article {i}",
+                             'content': 'spaceflight ' * (i % 7 + 1) + 'biology', 'word_count': i % 7 + 2,
+                             'content_type': 'html', 'file_path': ''} for i in range(1, 46)])
+
+        expected = [r['article_id'] for r in db.search_articles('spaceflight', limit=100)]
+        by_cursor, cursor = [], None
+        while True:
+            page = db.search_page('spaceflight', limit=10, cursor=cursor)
+            assert page['total'] == 45
+            by_cursor += [r['article_id'] for r in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        by_offset = [r['article_id'] for offset in range(0, 45, 10)
+                     for r in db.search_page('spaceflight', limit=10, offset=offset)['results']]
+
+        assert by_cursor == by_offset == expected
+        assert len(expected) == 45
+        db.close()
+
+
+def test_last_full_page_has_no_next_cursor():
+    """When the corpus is an exact multiple of the page size, the last page offers no next page."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0)
+        db.insert_articles([{'article_id': i, 'url': f"http://x/{i}", 'title': f"Article {i}",
+                             'content': 'spaceflight biology', 'word_count': 2,
+                             'content_type': 'html', 'file_path': ''} for i in range(1, 31)])
+
+        for query in ('spaceflight', ''):
+            pages, cursor = [], None
+            while True:
+                page = db.search_page(query, limit=10, cursor=cursor)
+                pages.append(len(page['results']))
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            assert pages == [10, 10, 10]
+            assert db.search_page(query, limit=10, offset=20)['next_cursor'] is None
+            assert db.search_page(query, limit=10, offset=10)['next_cursor'] is not None
+            assert db.search_page(query, limit=10, count=False, offset=20)['next_cursor'] is None
+        db.close()
+
+
+def test_search_cache_invalidated_by_ingest():
+    """Repeated searches hit the cache until a write bumps the corpus generation."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=2)
+        article = {'url': 'http://x', 'title': 'Article', 'content': 'microgravity bone loss',
+                   'word_count': 3, 'content_type': 'html', 'file_path': ''}
+        db.insert_articles([dict(article, article_id=1)])
+
+        assert db.search_page('microgravity')['total'] == 1
+        assert db.search_page('  microgravity ')['total'] == 1
+        assert db.search_cache.hits == 1
+
+        db.insert_articles([dict(article, article_id=2)])
+        assert db.search_page('microgravity')['total'] == 2
+        assert db.search_cache.invalidations == 1
+
+        db.search_page('bone')
+        db.search_page('loss')
+        assert db.search_cache.evictions == 1
+        assert db.search_cache.stats()['size'] == 2
+        db.close()
+
+
+def test_materialized_statistics_follow_writes():
+    """The statistics tables track inserts, replacements and deletes like a full scan would."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        article = {'url': 'http://x', 'title': 'Article', 'content': 'text',
+                   'content_type': 'html', 'file_path': ''}
+        db.bulk_insert_articles([[dict(article, article_id=i, word_count=500 * i) for i in range(1, 5)]])
+        db.insert_articles([dict(article, article_id=2, word_count=10, content_type='pdf')])
+        db.record_sources([], [4])
+
+        stats = db.get_statistics()
+        assert stats['total_articles'] == 3
+        assert stats['total_words'] == 500 + 10 + 1500
+        assert stats['content_types'] == {'html': 2, 'pdf': 1}
+        assert [(b['min_words'], b['articles']) for b in stats['word_count_histogram']] == [(0, 2), (1000, 1)]
+        assert sum(day['articles'] for day in stats['articles_by_day']) == 3
+        assert db.get_statistics() is stats
+        db.close()
+
+
+def test_fts_index_stays_in_sync_on_replace_and_delete():
+    """Re-ingested and removed articles leave no stale index entries behind."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        article = {'url': 'http://x', 'title': 'Article', 'word_count': 2,
+                   'content_type': 'html', 'file_path': ''}
+        for revision in ('first', 'second', 'third'):
+            db.insert_articles([dict(article, article_id=i, content=f"spaceflight {revision}")
+                                for i in range(1, 11)])
+        db.record_sources([], [10])
+
+        assert db.search_page('spaceflight')['total'] == 9
+        assert db.search_page('first')['total'] == 0
+        assert db.search_page('third')['total'] == 9
+
+        report = db.maintain_index(automerge=8)
+        assert report['integrity'] == 'ok'
+        assert report['before']['indexed_rows'] == report['after']['indexed_rows'] == 9
+        assert report['after']['segments'] == 1
+        db.close()
+
+
+def test_weighted_ranking_and_suggestions():
+    """Title matches outrank body matches when boosted, and prefixes complete from the vocabulary."""
+    with tempfile.TemporaryDirectory() as tmp:
+        articles = [
+            {'article_id': 1, 'title': 'Plant growth', 'content': 'osteoblast ' + 'plant ' * 50},
+            {'article_id': 2, 'title': 'Osteoblast differentiation', 'content': 'plant ' * 50},
+            {'article_id': 3, 'title': 'Bone', 'content': 'osteoblast osteoblast ' + 'plant ' * 48},
+        ]
+        for article in articles:
+            article.update(url=f"http://x/{article['article_id']}", word_count=51, content_type='html', file_path='')
+
+        boosted = DatabaseManager(os.path.join(tmp, 'articles.db'), title_weight=10.0)
+        boosted.insert_articles(articles)
+        assert boosted.search_articles('osteoblast')[0]['article_id'] == 2
+
+        unboosted = DatabaseManager(os.path.join(tmp, 'articles.db'), title_weight=0.0)
+        assert unboosted.search_articles('osteoblast')[0]['article_id'] == 3
+
+        assert [s['term'] for s in boosted.suggest_terms('oste')] == ['osteoblast']
+        assert boosted.suggest_terms('pl')[0] == {'term': 'plant', 'documents': 3}
+        assert boosted.suggest_terms('p') == []
+        boosted.close()
+        unboosted.close()
+
+
+def test_passage_index_finds_best_passage():
+    """Search snippets come from the matching passage, which follows re-ingest and delete."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        filler = 'plant ' * 400
+        article = {'article_id': 1, 'url': 'http://x/1', 'title': 'Article', 'word_count': 801,
+                   'content_type': 'html', 'file_path': ''}
+        db.insert_articles([dict(article, content=filler + 'osteoclast ' + filler)])
+
+        result = db.search_page('osteoclast')['results'][0]
+        assert result['passage_no'] == 400 // 150
+        assert '<mark>osteoclast</mark>' in result['snippet']
+        assert len(db.get_passages(1)) == 6
+
+        db.insert_articles([dict(article, content='osteoclast ' + filler)])
+        assert db.search_page('osteoclast')['results'][0]['passage_no'] == 0
+        assert len(db.get_passages(1)) == 3
+
+        db.record_sources([], [1])
+        assert db.get_passages(1) == []
+        assert db.search_page('plant')['total'] == 0
+        assert db.maintain_index()['integrity'] == 'ok'
+        db.close()
+
+
+def test_compressed_storage_matches_plain():
+    """Compressed articles search, snippet and read back like plain ones, and storage converts both ways."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.db')
+        plain = DatabaseManager(path, search_cache_size=0)
+        filler = 'plant ' * 400
+        article = {'url': 'http://x', 'title': 'Article', 'word_count': 801,
+                   'content_type': 'html', 'file_path': ''}
+        plain.insert_articles([dict(article, article_id=1, content=filler + 'osteoclast ' + filler)])
+        expected = plain.search_page('osteoclast')
+
+        compressed = DatabaseManager(path, search_cache_size=0, compress=True)
+        compressed.insert_articles([dict(article, article_id=2, content=filler + 'osteoclast ' + filler)])
+        results = compressed.search_page('osteoclast')['results']
+        assert [r['snippet'] for r in results] == [expected['results'][0]['snippet']] * 2
+        assert compressed.get_article(2)['content'] == plain.get_article(1)['content']
+        assert compressed.get_passages(2) == plain.get_passages(1)
+        assert compressed.get_index_info()['compressed_articles'] == 1
+
+        report = compressed.convert_storage()
+        assert report['converted'] == {'articles': 1, 'passages': 6}
+        compressed.insert_articles([dict(article, article_id=1, content='osteoclast')])
+        assert compressed.search_page('osteoclast')['total'] == 2
+        assert compressed.search_page('')['results'][0]['snippet'] == 'osteoclast...'
+        assert compressed.maintain_index()['integrity'] == 'ok'
+
+        assert plain.convert_storage()['converted'] == {'articles': 2, 'passages': 7}
+        assert plain.get_index_info()['compressed_articles'] == 0
+        assert plain.get_article(1)['content'] == 'osteoclast'
+        assert plain.maintain_index()['integrity'] == 'ok'
+        plain.close()
+        compressed.close()
+
+
+def test_http_validators_and_compression():
+    """ETags answer 304 until the corpus or the article changes, and responses are gzipped on request."""
+    import gzip
+    import json
+    import app as search_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        original_db, search_app.db = search_app.db, db
+        try:
+            article = {'article_id': 1, 'url': 'http://x/1', 'title': 'Article', 'word_count': 200,
+                       'content': 'spaceflight biology ' * 100, 'content_type': 'html', 'file_path': ''}
+            db.insert_articles([article])
+            client = search_app.app.test_client()
+
+            search = client.get('/api/search?q=spaceflight', headers={'Accept-Encoding': 'gzip'})
+            assert search.headers['Content-Encoding'] == 'gzip'
+            assert search.headers['Cache-Control'] == search_app.CACHE_CONTROL['api_search']
+            assert json.loads(gzip.decompress(search.data))['total'] == 1
+            search_etag = search.headers['ETag']
+            page = client.get('/article/1')
+            assert page.status_code == 200 and 'Content-Encoding' not in page.headers
+
+            def status(url, etag):
+                return client.get(url, headers={'If-None-Match': etag}).status_code
+
+            assert status('/api/search?q=spaceflight', search_etag) == 304
+            assert status('/article/1', page.headers['ETag']) == 304
+
+            db.insert_articles([dict(article, article_id=2)])
+            assert status('/api/search?q=spaceflight', search_etag) == 200
+            assert status('/article/1', page.headers['ETag']) == 304
+
+            db.insert_articles([dict(article, content='spaceflight')])
+            assert status('/article/1', page.headers['ETag']) == 200
+        finally:
+            search_app.db = original_db
+            db.close()
+
+
+def test_similar_articles_follow_ingest():
+    """Related articles are read from the precomputed lists, which follow added and removed articles."""
+    import json
+    import app as search_app
+    from similarity import build_similarity_index, update_similarity_index
+
+    topics = {'bone': 'osteoclast bone density calcium microgravity',
+              'plant': 'arabidopsis root gravitropism seedling auxin'}
+
+    def article(article_id, topic, extra=''):
+        return {'article_id': article_id, 'url': f'http://x/{article_id}', 'title': f'Article {article_id}',
+                'word_count': 8, 'content': f"{topics[topic]} {extra} study results", 'content_type': 'html',
+                'file_path': ''}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'))
+        db.insert_articles([article(1, 'bone', 'radiation'), article(2, 'bone'), article(3, 'bone', 'radiation'),
+                            article(4, 'plant'), article(5, 'plant', 'light'), article(6, 'plant', 'light')])
+        assert build_similarity_index(db, neighbors=2)['lists'] == 6
+        assert [n['article_id'] for n in db.get_similar(1)] == [3, 2]
+        assert {n['article_id'] for n in db.get_similar(4)} == {5, 6}
+        assert update_similarity_index(db)['mode'] == 'unchanged'
+
+        # A new bone article only enters, and rewrites, the bone articles' lists
+        db.insert_articles([article(7, 'bone', 'radiation')])
+        report = update_similarity_index(db)
+        assert report['mode'] == 'incremental' and report['vectorized'] == 1 and report['lists'] <= 4
+        assert [n['article_id'] for n in db.get_similar(1)] == [3, 7]
+        assert {n['article_id'] for n in db.get_similar(4)} == {5, 6}
+
+        db.record_sources([], [7])
+        update_similarity_index(db)
+        assert [n['article_id'] for n in db.get_similar(1)] == [3, 2]
+
+        original_db, search_app.db = search_app.db, db
+        try:
+            client = search_app.app.test_client()
+            similar = client.get('/api/similar/4?limit=1')
+            assert json.loads(similar.data)['similar'][0]['article_id'] in (5, 6)
+            assert similar.headers['Cache-Control'] == search_app.CACHE_CONTROL['api_similar']
+            assert client.get('/api/similar/99').status_code == 404
+            assert b'Related articles' in client.get('/article/4').data
+        finally:
+            search_app.db = original_db
+            db.close()
+
+
+def test_near_duplicates_collapse_to_canonical():
+    """Near-duplicates stay out of search and show up as clusters; deleting the canonical article promotes one."""
+    import json
+    import app as search_app
+
+    words = [f"term{i}" for i in range(400)]
+    article = {'url': 'http://x', 'title': 'Article', 'word_count': 400, 'content_type': 'html', 'file_path': ''}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0, deduplicate=True)
+        db.insert_articles([
+            dict(article, article_id=1, content=' '.join(words) + ' osteoclast'),
+            # Same paper from the PDF: 2% of the words missing
+            dict(article, article_id=2, content=' '.join(words[i] for i in range(400) if i % 50) + ' osteoclast',
+                 content_type='pdf'),
+            dict(article, article_id=3, content='osteoclast differentiation under simulated microgravity'),
+        ])
+        assert [r['article_id'] for r in db.search_page('osteoclast')['results']] in ([1, 3], [3, 1])
+        assert db.search_page('')['total'] == 2
+        clusters = db.get_duplicate_clusters()
+        assert [(c['canonical']['article_id'], [d['article_id'] for d in c['duplicates']]) for c in clusters] == [(1, [2])]
+        assert clusters[0]['duplicates'][0]['similarity'] >= 0.7
+        assert db.get_passages(2) == [] and db.get_index_info()['duplicates'] == 1
+
+        db.record_sources([], [1])
+        assert {r['article_id'] for r in db.search_page('osteoclast')['results']} == {2, 3}
+        assert db.get_duplicate_clusters() == [] and db.get_passages(2)
+        db.insert_articles([dict(article, article_id=4, content=' '.join(words), url='http://mirror')])
+        assert db.get_article(4)['canonical_id'] == 2
+        assert db.maintain_index()['integrity'] == 'ok'
+
+        original_db, search_app.db = search_app.db, db
+        try:
+            client = search_app.app.test_client()
+            redirect = client.get('/article/4?passage=1')
+            assert redirect.status_code == 302 and redirect.location.endswith('/article/2?passage=1')
+            report = json.loads(client.get('/api/duplicates').data)
+            assert report['duplicates'] == 1 and report['clusters'][0]['canonical']['article_id'] == 2
+            assert 0 < report['index_bytes_saved'] < report['index_bytes']
+        finally:
+            search_app.db = original_db
+            db.close()
+
+
+def test_duplicates_follow_canonical_rewrite():
+    """Duplicates of an article whose text changed are matched again, and only canonical articles are counted."""
+    words = [f"term{i}" for i in range(400)]
+    article = {'url': 'http://x', 'title': 'Article', 'word_count': 400, 'content_type': 'html', 'file_path': ''}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0, deduplicate=True)
+        db.insert_articles([
+            dict(article, article_id=1, content=' '.join(words) + ' osteoclast'),
+            dict(article, article_id=2, content=' '.join(words[i] for i in range(400) if i % 50) + ' osteoclast'),
+            dict(article, article_id=3, content=' '.join(words[:390]) + ' osteoclast'),
+        ])
+        assert db.get_statistics()['total_articles'] == db.search_page('')['total'] == 1
+
+        db.insert_articles([dict(article, article_id=1, content='microgravity alters plant root gravitropism')])
+        assert db.get_article(2)['canonical_id'] is None and db.get_article(3)['canonical_id'] == 2
+        assert [r['article_id'] for r in db.search_page('osteoclast')['results']] == [2]
+        assert db.get_passages(2) and db.get_passages(3) == []
+        assert db.get_statistics()['total_articles'] == db.search_page('')['total'] == 2
+        assert db.get_statistics()['total_words'] == 800
+
+        db.rebuild_statistics()
+        assert db.get_statistics()['total_articles'] == 2
+        assert db.maintain_index()['integrity'] == 'ok'
+        db.close()
+
+
+def test_read_only_workers_serve_without_writing():
+    """A read-only manager serves what another process writes, cannot write, and backs the WSGI factory."""
+    import json
+    import sqlite3
+    import app as search_app
+
+    article = {'url': 'http://x', 'title': 'Article', 'word_count': 3, 'content_type': 'html', 'file_path': ''}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.db')
+        try:
+            DatabaseManager(path, read_only=True)
+            assert False, "a read-only manager must not create the database"
+        except FileNotFoundError:
+            pass
+
+        writer = DatabaseManager(path)
+        writer.insert_articles([dict(article, article_id=1, content='osteoclast bone density')])
+        reader = DatabaseManager(path, read_only=True)
+        assert [r['article_id'] for r in reader.search_page('osteoclast')['results']] == [1]
+        writer.insert_articles([dict(article, article_id=2, content='osteoclast differentiation')])
+        assert reader.search_page('osteoclast')['total'] == 2
+        try:
+            reader.insert_articles([dict(article, article_id=3, content='osteoclast')])
+            assert False, "writes through a read-only manager must fail"
+        except sqlite3.OperationalError:
+            pass
+        reader.close()
+
+        original_db, saved_env = search_app.db, dict(os.environ)
+        try:
+            from wsgi import create_app
+            client = create_app(path, read_only=True).test_client()
+            assert search_app.db.read_only and search_app.get_load_status()['state'] == 'skipped'
+            assert json.loads(client.get('/api/search?q=osteoclast').data)['total'] == 2
+            # Out-of-range and malformed paging parameters are clamped or defaulted, never passed through
+            assert json.loads(client.get('/api/search?q=osteoclast&limit=-5').data)['count'] == 1
+            assert json.loads(client.get('/api/search?q=osteoclast&limit=x&offset=y').data)['count'] == 2
+            assert client.get('/search?q=osteoclast&page=x').status_code == 200
+            assert client.get('/api/suggest?q=osteo&limit=x').status_code == 200
+            assert client.get('/readyz').status_code == 200
+            # Readiness follows the ingest another process records in the database
+            writer.set_ingest_state('loading')
+            assert client.get('/readyz').status_code == 503
+            writer.set_ingest_state('ready')
+            assert client.get('/readyz').status_code == 200
+        finally:
+            search_app.db.close()
+            search_app.db = original_db
+            os.environ.clear()
+            os.environ.update(saved_env)
+        writer.close()
+
+
+def test_benchmark_suite_synthetic_corpus_and_json():
+    """The synthetic corpus is reproducible and free of near-duplicates, and a suite run compares as JSON."""
+    import csv
+    import json
+    from benchmark_suite import compare, read_corpus, run_suite, write_synthetic_corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_csv = os.path.join(tmp, 'summary.csv')
+        with open(summary_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['article_id', 'url', 'word_count', 'saved_file_path', 'content_type'])
+            writer.writeheader()
+            for n in (1, 2, 3):
+                writer.writerow({'article_id': n, 'url': f'https://example.org/PMC{n}/', 'word_count': 0,
+                                 'saved_file_path': os.path.join('test_scraped_articles', f'article_{n}.txt'),
+                                 'content_type': 'HTML'})
+        rows = read_corpus(summary_csv)
+        first = write_synthetic_corpus(rows, 3, os.path.join(tmp, 'first'), seed=1)
+        second = write_synthetic_corpus(rows, 3, os.path.join(tmp, 'second'), seed=1)
+        with open(first, encoding='utf-8') as a, open(second, encoding='utf-8') as b:
+            first_rows, second_rows = list(csv.DictReader(a)), list(csv.DictReader(b))
+        assert len(first_rows) == 9 and len({row['article_id'] for row in first_rows}) == 9
+        for a, b in zip(first_rows[3:], second_rows[3:]):
+            with open(a['saved_file_path'], encoding='utf-8') as fa, open(b['saved_file_path'], encoding='utf-8') as fb:
+                assert fa.read() == fb.read()
+
+        results = run_suite(summary_csv, [1, 3], repeat=1, corpus_dir=os.path.join(tmp, 'corpus'), fixtures=3)
+        assert results['text']['html_pages'] == 3 and results['text']['clean_text']['mb_per_s'] > 0
+        assert results['scales']['3']['articles'] == 9 and results['scales']['3']['duplicates'] == 0
+        assert results['scales']['3']['search_articles']['calls'] > 0
+        results = json.loads(json.dumps(results))
+        assert compare(results, results, 0.1) == []
+
+
+def test_stage_timings_and_metrics_endpoint():
+    """The scraper times every stage per host, and the app exports route and SQL histograms with a slow-query log."""
+    import logging
+    import app as search_app
+    from metrics import REGISTRY
+    from scrape_articles import HOST_BYTES, STAGE_SECONDS
+
+    REGISTRY.clear()
+    server = start_local_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            metrics_file = os.path.join(tmp, 'scrape.prom')
+            scraper = make_local_scraper(tmp, write_local_csv(tmp, f"http://127.0.0.1:{server.server_port}"),
+                                         metrics_file=metrics_file)
+            scraper.run()
+            for stage in ('wait', 'headers', 'download', 'parse', 'clean', 'save'):
+                assert STAGE_SECONDS.summary(stage)['count'] == 40, stage
+            assert HOST_BYTES.value(f"127.0.0.1:{server.server_port}") > 0
+            with open(metrics_file, encoding='utf-8') as f:
+                assert 'scraper_stage_seconds_bucket{stage="parse",le="+Inf"} 40' in f.read()
+    finally:
+        server.shutdown()
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logging.getLogger('database').addHandler(handler)
+    article = {'url': 'http://x', 'title': 'Article', 'word_count': 3, 'content_type': 'html', 'file_path': ''}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'articles.db'), search_cache_size=0, metrics=True, slow_query_ms=0)
+        original_db, search_app.db = search_app.db, db
+        try:
+            db.insert_articles([dict(article, article_id=1, content='osteoclast bone density')])
+            client = search_app.app.test_client()
+            assert client.get('/api/search?q=osteoclast').status_code == 200
+            response = client.get('/metrics')
+            body = response.get_data(as_text=True)
+            assert response.headers['Cache-Control'] == 'no-store'
+            assert 'http_request_duration_seconds_count{route="/api/search",method="GET",status="200"} 1' in body
+            assert 'sqlite_statement_seconds_count{statement="SELECT COUNT(*) FROM articles_fts' in body
+            assert any('MATCH' in r.getMessage() and 'SCAN articles_fts' in r.getMessage() for r in records)
+        finally:
+            logging.getLogger('database').removeHandler(handler)
+            search_app.db = original_db
+            db.close()
+
+
 if __name__ == "__main__":
-    test_scraper()
\ No newline at end of file
+    if '--offline' in sys.argv:
+        test_concurrent_scraper_offline()
+        test_cache_revalidation_and_reextract_offline()
+        test_process_pool_pipeline_offline()
+        test_pipeline_interrupt_does_not_hang()
+        test_failed_parse_submit_discards_spool_file()
+        test_spooled_pdf_extraction_offline()
+        test_parallel_pdf_pages_match_serial()
+        test_clean_text_matches_legacy_cleaner()
+        test_database_sink_offline()
+        test_journal_resume_and_compaction()
+        test_bulk_load_rebuilds_index_in_one_transaction()
+        test_incremental_reingest_touches_only_changed_files()
+        test_background_load_reports_progress_and_readiness()
+        test_pooled_connections_under_concurrent_writes()
+        test_search_pagination_cursor_matches_offset()
+        test_last_full_page_has_no_next_cursor()
+        test_search_cache_invalidated_by_ingest()
+        test_materialized_statistics_follow_writes()
+        test_fts_index_stays_in_sync_on_replace_and_delete()
+        test_weighted_ranking_and_suggestions()
+        test_passage_index_finds_best_passage()
+        test_compressed_storage_matches_plain()
+        test_http_validators_and_compression()
+        test_similar_articles_follow_ingest()
+        test_near_duplicates_collapse_to_canonical()
+        test_duplicates_follow_canonical_rewrite()
+        test_read_only_workers_serve_without_writing()
+        test_benchmark_suite_synthetic_corpus_and_json()
+        test_stage_timings_and_metrics_endpoint()
+    else:
+        test_scraper()
\ No newline at end of file
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for serving the Biology Research Search Engine with
+several worker processes.
+
+Workers only read: the database is opened read-only (DB_READ_ONLY defaults
+to 1 here), each worker pools its own read-only connections over a shared
+memory map of the file, and the startup load from scraped_articles/ is left
+to whoever writes the database (serve.py's master, scrape_articles.py --db
+or a one-off ``python serve.py --ingest only``). The database must exist
+before the workers start. /readyz reports the state that ingest records in
+the database, so workers are not ready while it is still loading.
+
+    gunicorn -w 8 --preload 'wsgi:create_app()'
+    waitress-serve --threads 16 --call wsgi:create_app
+"""
+
+import os
+
+os.environ.setdefault('DB_READ_ONLY', '1')
+
+import app as search_app
+
+
+def create_app(db_path: str = None, read_only: bool = None):
+    """Return the Flask app, opening ``db_path`` instead of the configured DB_PATH if given.
+
+    Nothing is connected until the first request, so the app can be created
+    in a master process and inherited by forked workers.
+    """
+    if db_path is not None or (read_only is not None and read_only != search_app.db.read_only):
+        search_app.db.close()
+        search_app.db = search_app.open_database(db_path, read_only)
+    search_app.update_load_status(state='external')
+    return search_app.app
+
+
+application = create_app()